@@ -0,0 +1,81 @@
+"""Benchmarks of the mass attenuation data and of the transmission and response
+of materials, stacks and responses."""
+
+import numpy as np
+
+import astropy.units as u
+
+from roentgen.absorption import MassAttenuationCoefficient, Material, Response, Stack
+
+# the number of energies of the small and large energy arrays
+ENERGY_SIZES = [10, 1_000, 100_000]
+# materials with different numbers of edges and an air mixture
+LAYER_MATERIALS = ["Be", "air", "Al", "mylar", "Cu", "Ge", "cdte", "W"]
+
+
+def energies(size):
+    return u.Quantity(np.geomspace(1, 1000, size), "keV")
+
+
+def layers(num_layers):
+    return [
+        Material(LAYER_MATERIALS[i % len(LAYER_MATERIALS)], 10 * u.um) for i in range(num_layers)
+    ]
+
+
+class MassAttenuationCoefficientSuite:
+    params = ["Si", "cdte", "air"]
+    param_names = ["material"]
+
+    def time_construction(self, material):
+        MassAttenuationCoefficient(material)
+
+    def time_material_construction(self, material):
+        Material(material, 1 * u.mm)
+
+
+class MaterialSuite:
+    params = [ENERGY_SIZES]
+    param_names = ["energy_size"]
+
+    def setup(self, energy_size):
+        self.energy = energies(energy_size)
+        self.material = Material("cdte", 1 * u.mm)
+
+    def time_mass_attenuation_coefficient(self, energy_size):
+        self.material.mass_attenuation_coefficient(self.energy)
+
+    def time_transmission(self, energy_size):
+        self.material.transmission(self.energy)
+
+    def time_absorption(self, energy_size):
+        self.material.absorption(self.energy)
+
+
+class StackSuite:
+    params = [ENERGY_SIZES, [1, 4, 16]]
+    param_names = ["energy_size", "num_layers"]
+
+    def setup(self, energy_size, num_layers):
+        self.energy = energies(energy_size)
+        self.stack = Stack(layers(num_layers))
+
+    def time_transmission(self, energy_size, num_layers):
+        self.stack.transmission(self.energy)
+
+
+class ResponseSuite:
+    params = [ENERGY_SIZES, [1, 4, 16]]
+    param_names = ["energy_size", "num_layers"]
+
+    def setup(self, energy_size, num_layers):
+        self.energy = energies(energy_size)
+        self.response = Response(Stack(layers(num_layers)), detector=Material("Si", 500 * u.um))
+
+    def time_response(self, energy_size, num_layers):
+        self.response.response(self.energy)
+
+    def time_construction_and_response(self, energy_size, num_layers):
+        Response(Stack(layers(num_layers)), detector=Material("Si", 500 * u.um)).response(
+            self.energy
+        )
@@ -0,0 +1,33 @@
+"""Benchmarks which track the accuracy of the evaluation modes of a transmission
+against the default mode, see `roentgen.absorption.accuracy`."""
+
+from roentgen.absorption.accuracy import _MODES, compare_evaluation_modes
+
+MODES = [mode for mode in _MODES if mode != "default"]
+
+
+class AccuracySuite:
+    params = [MODES]
+    param_names = ["mode"]
+    timeout = 120
+
+    def setup_cache(self):
+        return compare_evaluation_modes(repeat=3)
+
+    def _rows(self, comparison, mode):
+        return comparison[comparison["mode"] == mode]
+
+    def track_max_error(self, comparison, mode):
+        return float(self._rows(comparison, mode)["max error"].max())
+
+    track_max_error.unit = "transmission"
+
+    def track_max_relative_error(self, comparison, mode):
+        return float(self._rows(comparison, mode)["max relative error"].max())
+
+    track_max_relative_error.unit = "relative"
+
+    def track_min_speedup(self, comparison, mode):
+        return float(self._rows(comparison, mode)["speedup"].min())
+
+    track_min_speedup.unit = "speedup"
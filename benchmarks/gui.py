@@ -0,0 +1,63 @@
+"""Benchmarks of the update path of the GUI (gui/main.py) without bokeh.
+
+The GUI is not part of the installed package, so it is imported from the gui
+directory next to the benchmarks, and skipped if that is not available."""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+import astropy.units as u
+
+from roentgen.absorption import Response
+
+_gui_directory = Path(__file__).parents[1] / "gui"
+
+
+def import_shared():
+    if str(_gui_directory) not in sys.path:
+        sys.path.insert(0, str(_gui_directory))
+    try:
+        import shared
+    except ImportError as error:
+        raise NotImplementedError("The GUI is not available.") from error
+    return shared
+
+
+class GuiSuite:
+    # the default grid and the largest grid allowed by the GUI with a fine step
+    params = [[(1.0, 50.0, 0.1), (1.0, 2000.0, 0.01)]]
+    param_names = ["grid"]
+
+    def setup(self, grid):
+        self.shared = import_shared()
+        self.store = self.shared.load_store()
+        self.components = dict(self.store["components"])
+        # fill the cache of mass attenuation coefficients of the grid
+        for name, _ in self.components.values():
+            self.shared.get_mass_attenuation(name, grid)
+        self.thickness = 0
+
+    def time_load_store(self, grid):
+        self.shared.load_store()
+
+    def time_thickness_change(self, grid):
+        # only the filter changes and its coefficients are cached
+        self.thickness += 1
+        name, _ = self.components["filter"]
+        this_material = self.shared.get_material(name, self.thickness * u.um)
+        optical_depth = self.shared.get_mass_attenuation(name, grid) * this_material._areal_density
+        np.exp(-optical_depth)
+
+    def time_material_change(self, grid):
+        # a new material on the grid, without the cache
+        this_material = self.shared.get_material("cdte", 1 * u.mm)
+        np.exp(-this_material._mass_attenuation_values(np.arange(*grid)) * 0.1)
+
+    def time_full_response(self, grid):
+        # the calculation of the GUI before any caching
+        materials = [this_material for _, this_material in self.components.values()]
+        Response(optical_path=materials[0] + materials[1], detector=materials[2]).response(
+            u.Quantity(np.arange(*grid), "keV")
+        )
@@ -0,0 +1,17 @@
+"""Benchmarks of the time to import roentgen."""
+
+
+def timeraw_import_roentgen():
+    return "import roentgen"
+
+
+def timeraw_import_absorption():
+    return "import roentgen.absorption"
+
+
+def timeraw_import_lines():
+    return "import roentgen.lines"
+
+
+def timeraw_import_nuclides():
+    return "import roentgen.nuclides"
@@ -0,0 +1,22 @@
+"""Benchmarks of the emission line and absorption edge queries."""
+
+import astropy.units as u
+
+from roentgen.lines import get_edges, get_lines
+
+
+class GetLinesSuite:
+    # narrow and wide energy ranges, for all elements or one
+    params = [[(6, 7), (1, 100)], [None, "Fe"]]
+    param_names = ["energy_range", "element"]
+
+    def time_get_lines(self, energy_range, element):
+        get_lines(energy_range[0] * u.keV, energy_range[1] * u.keV, element=element)
+
+
+class GetEdgesSuite:
+    params = ["Be", "Fe", "U"]
+    param_names = ["element"]
+
+    def time_get_edges(self, element):
+        get_edges(element)
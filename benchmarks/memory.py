@@ -0,0 +1,68 @@
+"""Benchmarks of the memory held by the loaded tables, by many materials and by
+the full radionuclide library."""
+
+import astropy.units as u
+
+from roentgen.absorption import Material
+from roentgen.nuclides import Nuclide
+from roentgen.nuclides.nuclides import _get_lara_store, _nuclide_index
+from roentgen.util import memory_usage
+
+# materials with different numbers of edges and an air mixture
+MATERIALS = ["Be", "air", "Al", "mylar", "Cu", "Ge", "cdte", "W"]
+NUM_MATERIALS = 10_000
+TABLES = ["elements", "compounds", "emission_lines", "binding_energies", "nuclides_list"]
+
+
+def materials(num_materials):
+    return [Material(MATERIALS[i % len(MATERIALS)], 10 * u.um) for i in range(num_materials)]
+
+
+def nuclide_library():
+    return [Nuclide(*this_key) for this_key in _nuclide_index]
+
+
+class PeakMemorySuite:
+    timeout = 300
+
+    def peakmem_nuclide_library(self):
+        nuclide_library()
+
+    def peakmem_materials(self):
+        materials(NUM_MATERIALS)
+
+
+class TableMemorySuite:
+    params = [TABLES]
+    param_names = ["table"]
+
+    def setup(self, table):
+        self.usage = memory_usage()
+        self.usage.add_index("name")
+
+    def track_size(self, table):
+        return int(self.usage.loc[table]["size"].to_value(u.byte))
+
+    track_size.unit = "bytes"
+
+    def track_index_size(self, table):
+        return int(self.usage.loc[table]["index size"].to_value(u.byte))
+
+    track_index_size.unit = "bytes"
+
+
+class ObjectMemorySuite:
+    timeout = 300
+
+    def track_nuclide_library_size(self):
+        usage = memory_usage({"lara store": _get_lara_store(), "nuclides": nuclide_library()})
+        return int(usage["unique size"].sum().to_value(u.byte))
+
+    track_nuclide_library_size.unit = "bytes"
+
+    def track_material_size(self):
+        # the memory held by each material, which is not shared between materials
+        usage = memory_usage(materials(len(MATERIALS)))
+        return int(usage["unique size"].mean().to_value(u.byte))
+
+    track_material_size.unit = "bytes"
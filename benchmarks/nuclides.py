@@ -0,0 +1,41 @@
+"""Benchmarks of loading radionuclides."""
+
+from roentgen.nuclides import Nuclide, get_lara_file, load_nuclides, read_lara_tables
+from roentgen.nuclides.nuclides import _get_cached_nuclide, _get_lara_store, _nuclide_index
+
+
+class NuclideSuite:
+    params = [("Fe", 55), ("Am", 241), ("Ra", 226)]
+    param_names = ["nuclide"]
+
+    def setup(self, nuclide):
+        self.file_path = get_lara_file(*nuclide)
+
+    def time_construction(self, nuclide):
+        Nuclide(*nuclide)
+
+    def time_read_lara_tables(self, nuclide):
+        read_lara_tables(self.file_path)
+
+
+class NuclideLibrarySuite:
+    timeout = 300
+
+    def setup(self):
+        # the store is loaded once per process, as in an application
+        _get_lara_store()
+
+    def time_load_store(self):
+        _get_lara_store.cache_clear()
+        _get_lara_store()
+
+    def time_construct_all(self):
+        for this_key in _nuclide_index:
+            Nuclide(*this_key)
+
+    def time_load_nuclides_cached(self):
+        load_nuclides()
+
+    def time_load_nuclides_uncached(self):
+        _get_cached_nuclide.cache_clear()
+        load_nuclides()
@@ -0,0 +1,11 @@
+"""
+Server lifecycle hooks of the GUI, which ``bokeh serve`` runs for the whole
+server rather than for each session.
+"""
+
+from shared import load_store
+
+
+def on_server_loaded(server_context):
+    # load the data which is shared by all sessions before the first session starts
+    load_store()
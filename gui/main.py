@@ -4,6 +4,8 @@ Use the ``bokeh serve`` command to run the example by executing:
 in your browser.
 """
 
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
 import numpy as np
 
@@ -25,26 +27,28 @@ from bokeh.plotting import figure
 import astropy.units as u
 from astropy import constants as const
 
-from roentgen.absorption import Material, Response
+from roentgen.absorption import Response
 from roentgen.util import get_material_density, density_ideal_gas
 import roentgen
 
-u.imperial.enable()
-
-DEFAULT_MATERIAL = "beryllium"
-DEFAULT_THICKNESS_UM = 500.0
-
-DEFAULT_ENERGY_LOW = 1.0
-DEFAULT_ENERGY_HIGH = 50.0
-DEFAULT_ENERGY_STEP = 0.1
-
-DEFAULT_DETECTOR_MATERIAL = "silicon"
-DEFAULT_DETECTOR_THICKNESS_MM = 0.5
-DEFAULT_DETECTOR_DENSITY = get_material_density(DEFAULT_DETECTOR_MATERIAL).value
+from shared import (
+    DEFAULT_MATERIAL,
+    DEFAULT_THICKNESS_UM,
+    DEFAULT_ENERGY_LOW,
+    DEFAULT_ENERGY_HIGH,
+    DEFAULT_ENERGY_STEP,
+    DEFAULT_DETECTOR_MATERIAL,
+    DEFAULT_DETECTOR_THICKNESS_MM,
+    DEFAULT_DETECTOR_DENSITY,
+    DEFAULT_AIR_THICKNESS_M,
+    DEFAULT_AIR_PRESSURE,
+    DEFAULT_AIR_TEMPERATURE,
+    get_material,
+    get_mass_attenuation,
+    load_store,
+)
 
-DEFAULT_AIR_THICKNESS_M = 0.1
-DEFAULT_AIR_PRESSURE = 1
-DEFAULT_AIR_TEMPERATURE = 20
+u.imperial.enable()
 
 PLOT_HEIGHT = 400
 PLOT_WIDTH = 900
@@ -59,28 +63,46 @@ custom_hover = HoverTool(
     mode="vline",
 )
 
-this_material = Material(DEFAULT_MATERIAL, DEFAULT_THICKNESS_UM * u.micron)
-air_density = density_ideal_gas(
-    DEFAULT_AIR_PRESSURE * const.atm, DEFAULT_AIR_TEMPERATURE * u.Celsius
-)
-air = Material("air", DEFAULT_AIR_THICKNESS_M * u.m, density=air_density)
-this_detector = Material(
-    DEFAULT_DETECTOR_MATERIAL, DEFAULT_DETECTOR_THICKNESS_MM * u.mm
-)
+# the inputs and the transmission of each component (filter, air and detector)
+# at the last update, so that only components whose inputs changed are recomputed
+component_inputs = {}
+component_values = {}
 
-response = Response(optical_path=this_material + air, detector=this_detector)
 
-energy = u.Quantity(
-    np.arange(DEFAULT_ENERGY_LOW, DEFAULT_ENERGY_HIGH, DEFAULT_ENERGY_STEP), "keV"
-)
+def get_component_transmission(component, name, this_material, grid):
+    inputs = (name, this_material._areal_density, grid)
+    if component_inputs.get(component) != inputs:
+        component_values[component] = np.exp(
+            -get_mass_attenuation(name, grid) * this_material._areal_density
+        )
+        component_inputs[component] = inputs
+    return component_values[component]
 
-x = energy.value
-y = response.response(energy)
-source = ColumnDataSource(data={"x": x, "y": y})
 
-all_materials = list(roentgen.elements["name"]) + list(roentgen.compounds["symbol"])
-all_materials.sort()
-all_materials = [this_material.lower() for this_material in all_materials]
+def calculate_response(these_components, grid):
+    # same as response.response but reusing unchanged components
+    transmission = get_component_transmission(
+        "filter", *these_components["filter"], grid
+    )
+    transmission = transmission * get_component_transmission(
+        "air", *these_components["air"], grid
+    )
+    return transmission * (
+        1 - get_component_transmission("detector", *these_components["detector"], grid)
+    )
+
+
+# the attenuation data, completions and default response are loaded once by the
+# server (see app_hooks.py) and shared by all sessions
+store = load_store()
+# the material name and the material of each component
+components = dict(store["components"])
+response = store["response"]
+this_material = components["filter"][1]
+# the shared arrays are read-only, the source is patched in place
+source = ColumnDataSource(data={"x": store["x"].copy(), "y": store["y"].copy()})
+
+all_materials = store["all_materials"]
 
 # Set up the plot
 plot = figure(
@@ -99,7 +121,7 @@ ylog_checkbox = CheckboxGroup(labels=["y-log"], active=[0])
 
 # materials in the path
 material_input = AutocompleteInput(title="Material (lowercase)", value=DEFAULT_MATERIAL)
-material_input.completions = all_materials
+material_input.completions = list(all_materials)
 material_thickness_input = NumericInput(
     title="thickness", value=DEFAULT_THICKNESS_UM, mode="float"
 )
@@ -120,7 +142,7 @@ air_temperature_input = NumericInput(
 detector_material_input = AutocompleteInput(
     title="Detector", value=DEFAULT_DETECTOR_MATERIAL
 )
-detector_material_input.completions = all_materials
+detector_material_input.completions = list(all_materials)
 detector_thickness_input = NumericInput(
     title="thickness", value=DEFAULT_DETECTOR_THICKNESS_MM, mode="float"
 )
@@ -144,6 +166,9 @@ p.text = f"Running roentgen version {roentgen.__version__}"
 plot_title = Paragraph(text="", width=500)
 plot_title.text = f"{response}"
 
+# shows whether a calculation is running
+status = Paragraph(text="", width=500)
+
 columns = [
     TableColumn(field="x", title="energy [keV]"),
     TableColumn(field="y", title="Percent"),
@@ -160,6 +185,13 @@ download_button.js_on_event(
 )
 
 
+doc = curdoc()
+# calculations run in a worker thread, only the latest one is applied
+executor = ThreadPoolExecutor(max_workers=1)
+computation = {"generation": 0, "future": None}
+doc.on_session_destroyed(lambda session_context: executor.shutdown(wait=False))
+
+
 def convert_air_pressure(value, current_unit, new_unit):
     if current_unit == "atm":
         air_pressure = u.Quantity(value * const.atm, "Pa")
@@ -188,32 +220,38 @@ def update_response(attrname, old, new):
             this_density = u.Quantity(
                 material_density_input.value, material_density_unit.value
             )
-            this_material = Material(
-                material_input.value.lower(), this_thickness, density=this_density
+            components["filter"] = (
+                material_input.value.lower(),
+                get_material(
+                    material_input.value.lower(), this_thickness, density=this_density
+                ),
             )
     else:
         # if material not selected, just make a bogus material with no thickness
-        this_material = Material(material_input.value.lower(), 0 * u.mm)
+        components["filter"] = (
+            material_input.value.lower(),
+            get_material(material_input.value.lower(), 0 * u.mm),
+        )
 
     if not air_pressure_input.disabled:
-        if air_pressure_unit.value == "atm":
-            air_pressure = u.Quantity(air_pressure_input.value * const.atm, "Pa")
-        elif air_pressure_unit.value == "torr":
-            air_pressure = u.Quantity(
-                air_pressure_input.value * const.atm / 760.0, "Pa"
-            )
-        else:
-            air_pressure = u.Quantity(air_pressure_input.value, air_pressure_unit.value)
-
+        air_pressure = convert_air_pressure(
+            air_pressure_input.value, air_pressure_unit.value, "Pa"
+        )
         air_path_length = u.Quantity(air_thickness_input.value, air_thick_unit.value)
         air_temperature = u.Quantity(
             air_temperature_input.value, air_temp_unit.value
         ).to("Celsius", equivalencies=u.temperature())
         air_density = density_ideal_gas(air_pressure, air_temperature)
-        air = Material("air", air_path_length, density=air_density)
+        components["air"] = (
+            "air",
+            get_material("air", air_path_length, density=air_density),
+        )
     else:
         # if air is not selected than just add bogus air with no thickness
-        air = Material("air", 0 * u.mm, density=0 * u.g / u.cm**3)
+        components["air"] = (
+            "air",
+            get_material("air", 0 * u.mm, density=0 * u.g / u.cm**3),
+        )
 
     if not detector_material_input.disabled:
         if detector_material_input.value.lower() in all_materials:
@@ -223,32 +261,78 @@ def update_response(attrname, old, new):
             this_density = u.Quantity(
                 detector_density_input.value, detector_density_unit.value
             )
-            this_detector = Material(
+            components["detector"] = (
                 detector_material_input.value.lower(),
-                this_thickness,
-                density=this_density,
+                get_material(
+                    detector_material_input.value.lower(),
+                    this_thickness,
+                    density=this_density,
+                ),
             )
     else:
         # if detector is not selected than add bogus super thick detector
-        this_detector = Material(detector_material_input.value.lower(), 1 * u.Mm)
-    response = Response(optical_path=this_material + air, detector=this_detector)
+        components["detector"] = (
+            detector_material_input.value.lower(),
+            get_material(detector_material_input.value.lower(), 1 * u.Mm),
+        )
+    response = Response(
+        optical_path=components["filter"][1] + components["air"][1],
+        detector=components["detector"][1],
+    )
+
+
+def update_source(x, y):
+    if len(source.data["x"]) == len(x) and np.array_equal(source.data["x"], x):
+        # only send the new values to the browser
+        source.patch({"y": [(slice(len(y)), y)]})
+    else:
+        source.data = dict(x=x, y=y)
+
+
+def get_energy_grid():
+    return (energy_low_input.value, energy_high_input.value, energy_step_input.value)
 
 
 def update_data(attrname, old, new):
-    global source
-    energy = u.Quantity(
-        np.arange(
-            energy_low_input.value, energy_high_input.value, energy_step_input.value
-        ),
-        "keV",
+    # calculate in the background so that the session stays responsive, any
+    # calculation which is still running is made stale
+    computation["generation"] += 1
+    if computation["future"] is not None:
+        computation["future"].cancel()
+    status.text = "Calculating..."
+    computation["future"] = executor.submit(
+        calculate_data,
+        computation["generation"],
+        dict(components),
+        get_energy_grid(),
+        f"{response}",
     )
-    x = energy.value
-    y = response.response(energy)
 
-    plot_title.text = f"{response}"
+
+def calculate_data(this_generation, these_components, grid, title):
+    # runs in the worker thread, the document is only changed on the next tick
+    try:
+        x = np.arange(*grid)
+        y = calculate_response(these_components, grid)
+    except ValueError as error:
+        doc.add_next_tick_callback(partial(show_error, this_generation, error))
+    else:
+        doc.add_next_tick_callback(partial(apply_data, this_generation, x, y, title))
+
+
+def show_error(this_generation, error):
+    if this_generation == computation["generation"]:
+        status.text = f"Error: {error}"
+
+
+def apply_data(this_generation, x, y, title):
+    if this_generation != computation["generation"]:
+        # a newer calculation was requested while this one was running
+        return
+    plot_title.text = title
 
     if plot_checkbox_group.active:
-        y = np.log10(response.response(energy))
+        y = np.log10(y)
         plot.y_range.start = -4
         plot.y_range.end = np.max(y)
         if not detector_material_input.disabled:
@@ -263,7 +347,10 @@ def update_data(attrname, old, new):
         else:
             plot.yaxis.axis_label = "Transmission fraction"
 
-    source.data = dict(x=x, y=y)
+    update_source(x, y)
+    if compute_mode.active:
+        update_attenuation_source()
+    status.text = ""
 
 
 def toggle_active(attr, old, new):
@@ -419,12 +506,104 @@ def update_detector_density(attr, old, new):
 
 detector_material_input.on_change("value", update_detector_density)
 
+# in browser mode, the server sends the mass attenuation coefficients of the
+# selected materials once and changes of thickness, density, air pressure or
+# temperature are evaluated in the browser without a round-trip to the server
+compute_mode = CheckboxGroup(labels=["Compute in browser"], active=[])
+attenuation_source = ColumnDataSource(data={})
+# the material names and energy grid of the coefficients in attenuation_source
+shipped_inputs = {}
+
+
+def update_attenuation_source():
+    grid = get_energy_grid()
+    inputs = (tuple(name for name, _ in components.values()), grid)
+    if shipped_inputs.get("inputs") != inputs:
+        attenuation_source.data = {
+            f"mu_{component}": get_mass_attenuation(name, grid)
+            for component, (name, _) in components.items()
+        }
+        shipped_inputs["inputs"] = inputs
+
+
+def update_client_materials(attr, old, new):
+    # materials and energy grid are not known in the browser
+    if compute_mode.active:
+        update_response("update_client_materials", 0, 0)
+        update_data("update_client_materials", 0, 0)
+
+
+for this_widget in [
+    material_input,
+    detector_material_input,
+    energy_low_input,
+    energy_high_input,
+    energy_step_input,
+]:
+    this_widget.on_change("value", update_client_materials)
+compute_mode.on_change("active", update_client_materials)
+
+client_transmission = CustomJS(
+    args=dict(
+        source=source,
+        attenuation_source=attenuation_source,
+        plot=plot,
+        compute_mode=compute_mode,
+        checkbox_group=checkbox_group,
+        plot_checkbox_group=plot_checkbox_group,
+        material_thickness_input=material_thickness_input,
+        material_thick_unit=material_thick_unit,
+        material_density_input=material_density_input,
+        material_density_unit=material_density_unit,
+        air_pressure_input=air_pressure_input,
+        air_pressure_unit=air_pressure_unit,
+        air_thickness_input=air_thickness_input,
+        air_thick_unit=air_thick_unit,
+        air_temperature_input=air_temperature_input,
+        air_temp_unit=air_temp_unit,
+        detector_thickness_input=detector_thickness_input,
+        detector_thick_unit=detector_thick_unit,
+        detector_density_input=detector_density_input,
+        detector_density_unit=detector_density_unit,
+        length_to_cm={unit: u.Unit(unit).to("cm") for unit in length_units},
+        density_to_g_cm3={
+            unit: u.Unit(unit).to("g / cm ** 3") for unit in density_units
+        },
+        pressure_to_pa={
+            unit: convert_air_pressure(1.0, unit, "Pa").value for unit in pressure_units
+        },
+        # the specific gas constant of dry air in J / (kg K), see density_ideal_gas
+        air_gas_constant=287.058,
+    ),
+    code=(Path(__file__).parent / "transmission.js").read_text("utf8"),
+)
+for this_widget in [
+    material_thickness_input,
+    material_thick_unit,
+    material_density_input,
+    material_density_unit,
+    air_pressure_input,
+    air_pressure_unit,
+    air_thickness_input,
+    air_thick_unit,
+    air_temperature_input,
+    air_temp_unit,
+    detector_thickness_input,
+    detector_thick_unit,
+    detector_density_input,
+    detector_density_unit,
+]:
+    this_widget.js_on_change("value", client_transmission)
+checkbox_group.js_on_change("active", client_transmission)
+plot_checkbox_group.js_on_change("active", client_transmission)
+attenuation_source.js_on_change("data", client_transmission)
+
 curdoc().add_root(
     layout(
         [
-            [plot_title],
+            [plot_title, status],
             [plot],
-            [checkbox_group, plot_checkbox_group],
+            [checkbox_group, plot_checkbox_group, compute_mode],
             [energy_low_input, energy_high_input, energy_step_input],
             [
                 material_input,
@@ -0,0 +1,126 @@
+"""
+Data which is shared by all sessions of the GUI. It is loaded once when the
+server starts by ``on_server_loaded`` in app_hooks.py, or by the first session
+otherwise, and must not be changed by the sessions.
+"""
+
+import copy
+from functools import lru_cache
+import threading
+from types import MappingProxyType
+import numpy as np
+
+import astropy.units as u
+from astropy import constants as const
+
+from roentgen.absorption import Material, Response
+from roentgen.util import get_material_density, density_ideal_gas
+import roentgen
+
+DEFAULT_MATERIAL = "beryllium"
+DEFAULT_THICKNESS_UM = 500.0
+
+DEFAULT_ENERGY_LOW = 1.0
+DEFAULT_ENERGY_HIGH = 50.0
+DEFAULT_ENERGY_STEP = 0.1
+DEFAULT_ENERGY_GRID = (DEFAULT_ENERGY_LOW, DEFAULT_ENERGY_HIGH, DEFAULT_ENERGY_STEP)
+
+DEFAULT_DETECTOR_MATERIAL = "silicon"
+DEFAULT_DETECTOR_THICKNESS_MM = 0.5
+DEFAULT_DETECTOR_DENSITY = get_material_density(DEFAULT_DETECTOR_MATERIAL).value
+
+DEFAULT_AIR_THICKNESS_M = 0.1
+DEFAULT_AIR_PRESSURE = 1
+DEFAULT_AIR_TEMPERATURE = 20
+
+# the maximum number of mass attenuation coefficient arrays to keep
+MAX_CACHED_COEFFICIENTS = 64
+
+# the mass attenuation coefficients (cm^2/g) of each material on each energy grid
+mass_attenuation_cache = {}
+# the caches are shared by all sessions and their worker threads
+cache_lock = threading.Lock()
+store_lock = threading.Lock()
+# the completion list and the default materials, response and data, see load_store
+_store = {}
+store = MappingProxyType(_store)
+
+
+@lru_cache(maxsize=None)
+def get_base_material(name):
+    # the attenuation data of each material is only read once
+    return Material(name, 1 * u.m)
+
+
+def get_material(name, thickness, density=None):
+    this_material = copy.copy(get_base_material(name))
+    this_material.thickness = thickness
+    if density is not None:
+        this_material.density = density
+    return this_material
+
+
+def get_mass_attenuation(name, grid):
+    key = (name, grid)
+    with cache_lock:
+        if key not in mass_attenuation_cache:
+            if len(mass_attenuation_cache) >= MAX_CACHED_COEFFICIENTS:
+                # forget the oldest entry
+                del mass_attenuation_cache[next(iter(mass_attenuation_cache))]
+            mass_attenuation_cache[key] = get_base_material(
+                name
+            )._mass_attenuation_values(np.arange(*grid))
+        return mass_attenuation_cache[key]
+
+
+def load_store():
+    """Load the attenuation data of all materials and the defaults of the GUI
+    into the shared store, if not done already, and return the store."""
+    with store_lock:
+        if _store:
+            return store
+        all_materials = list(roentgen.elements["name"]) + list(
+            roentgen.compounds["symbol"]
+        )
+        all_materials.sort()
+        all_materials = tuple(this_material.lower() for this_material in all_materials)
+        for this_name in all_materials:
+            try:
+                get_base_material(this_name)
+            except FileNotFoundError:
+                # not all elements have attenuation data
+                pass
+
+        this_material = get_material(DEFAULT_MATERIAL, DEFAULT_THICKNESS_UM * u.micron)
+        air_density = density_ideal_gas(
+            DEFAULT_AIR_PRESSURE * const.atm, DEFAULT_AIR_TEMPERATURE * u.Celsius
+        )
+        air = get_material("air", DEFAULT_AIR_THICKNESS_M * u.m, density=air_density)
+        this_detector = get_material(
+            DEFAULT_DETECTOR_MATERIAL, DEFAULT_DETECTOR_THICKNESS_MM * u.mm
+        )
+        # the material name and the material of each component
+        components = MappingProxyType(
+            {
+                "filter": (DEFAULT_MATERIAL, this_material),
+                "air": ("air", air),
+                "detector": (DEFAULT_DETECTOR_MATERIAL, this_detector),
+            }
+        )
+        for this_name, _ in components.values():
+            get_mass_attenuation(this_name, DEFAULT_ENERGY_GRID)
+
+        response = Response(optical_path=this_material + air, detector=this_detector)
+        x = np.arange(*DEFAULT_ENERGY_GRID)
+        y = response.response(u.Quantity(x, "keV"))
+        x.setflags(write=False)
+        y.setflags(write=False)
+
+        _store.update(
+            all_materials=all_materials,
+            components=components,
+            response=response,
+            x=x,
+            y=y,
+        )
+        return store
@@ -0,0 +1,64 @@
+// Evaluate the response in the browser from the mass attenuation coefficients
+// (cm^2/g) of the selected materials, which are sent by the server once per
+// material and energy grid. The transmission of each component is
+// exp(-mu * rho * t).
+if (compute_mode.active.length == 0) {
+    return
+}
+
+const mu = attenuation_source.data
+const nrows = attenuation_source.get_length()
+if (nrows != source.get_length()) {
+    // the server has not yet sent the coefficients for the new energy grid
+    return
+}
+
+function temperature_to_kelvin(value, unit) {
+    if (unit == 'deg_C') {
+        return value + 273.15
+    } else if (unit == 'deg_F') {
+        return (value - 32.0) * 5.0 / 9.0 + 273.15
+    }
+    return value
+}
+
+// areal densities in g/cm^2
+let filter_areal_density = 0.0
+if (checkbox_group.active.includes(0)) {
+    filter_areal_density = material_thickness_input.value * length_to_cm[material_thick_unit.value]
+        * material_density_input.value * density_to_g_cm3[material_density_unit.value]
+}
+let air_areal_density = 0.0
+if (checkbox_group.active.includes(1)) {
+    const pressure = air_pressure_input.value * pressure_to_pa[air_pressure_unit.value]
+    const temperature = temperature_to_kelvin(air_temperature_input.value, air_temp_unit.value)
+    // ideal gas density in kg/m^3 converted to g/cm^3
+    const air_density = pressure / (air_gas_constant * temperature) / 1000.0
+    air_areal_density = air_thickness_input.value * length_to_cm[air_thick_unit.value] * air_density
+}
+const detector_active = checkbox_group.active.includes(2)
+const detector_areal_density = detector_thickness_input.value * length_to_cm[detector_thick_unit.value]
+    * detector_density_input.value * density_to_g_cm3[detector_density_unit.value]
+
+const ylog = plot_checkbox_group.active.length > 0
+const y = new Float64Array(nrows)
+let y_max = -Infinity
+for (let i = 0; i < nrows; i++) {
+    let value = Math.exp(-mu['mu_filter'][i] * filter_areal_density - mu['mu_air'][i] * air_areal_density)
+    if (detector_active) {
+        value *= 1.0 - Math.exp(-mu['mu_detector'][i] * detector_areal_density)
+    }
+    y[i] = ylog ? Math.log10(value) : value
+    y_max = Math.max(y_max, y[i])
+}
+if (ylog) {
+    plot.y_range.start = -4
+    plot.y_range.end = y_max
+} else {
+    plot.y_range.start = 0
+    plot.y_range.end = 1
+}
+
+// update in place so that the new values are not sent back to the server
+source.data['y'] = y
+source.change.emit()
@@ -1 +1,5 @@
 from .material import *
+from .events import *
+from .radiography import *
+from .grid import *
+from .accuracy import *
@@ -0,0 +1,239 @@
+"""A module to check the accuracy and speed of the ways to evaluate a transmission."""
+
+import timeit
+
+import numpy as np
+
+import astropy.units as u
+from astropy.constants import atm
+from astropy.table import QTable
+
+import roentgen
+from roentgen.absorption.events import EventThinner
+from roentgen.absorption.grid import adaptive_energy_grid
+from roentgen.absorption.material import Material
+from roentgen.util import density_ideal_gas
+
+__all__ = ["get_cxro_references", "compare_evaluation_modes", "check_evaluation_modes"]
+
+# the CXRO reference files with the material and thickness of each, see docs/guide/cxro_compare.rst
+_CXRO_REFERENCES = (
+    ("be_100micron.dat", "Be", 100 * u.micron),
+    ("al_1mm.dat", "Al", 1 * u.mm),
+    ("si_500micron.dat", "Si", 500 * u.micron),
+    ("water_1000micron.dat", "water", 1000 * u.micron),
+    ("ge_500micron.dat", "ge", 500 * u.micron),
+    ("air_1m_1atm_295kelvin.dat", "air", 1 * u.m),
+)
+# relative errors are only measured where the reference transmission is above this
+_MIN_TRANSMISSION = 1e-6
+
+
+def _default(material, energy_kev):
+    energy = u.Quantity(energy_kev, "keV")
+    return lambda: material.transmission(energy)
+
+
+def _unit_free(material, energy_kev):
+    return lambda: np.exp(-material._optical_depth_values(energy_kev))
+
+
+def _float32(material, energy_kev):
+    energy_kev = energy_kev.astype(np.float32)
+    return lambda: np.exp(-material._optical_depth_values(energy_kev).astype(np.float32))
+
+
+def _event_table(material, energy_kev):
+    thinner = EventThinner(material)
+    return lambda: thinner.detection_probability(energy_kev)
+
+
+def _adaptive_grid(material, energy_kev):
+    grid = adaptive_energy_grid(
+        material, energy_kev.min() * u.keV, energy_kev.max() * u.keV, rtol=1e-3
+    )
+    grid_kev = grid.to_value("keV")
+    table = material.transmission(grid)
+    return lambda: np.interp(energy_kev, grid_kev, table)
+
+
+# the function which prepares each mode and returns the evaluation to time, and
+# the declared absolute and relative tolerance of the mode against the default
+_MODES = {
+    "default": (_default, 0.0, 0.0),
+    "unit-free": (_unit_free, 0.0, 1e-12),
+    "float32": (_float32, 1e-7, 5e-5),
+    "event table": (_event_table, 1e-4, 1e-3),
+    "adaptive grid": (_adaptive_grid, 1e-6, 1e-3),
+}
+
+
+def get_cxro_references():
+    """
+    Return the transmissions calculated by CXRO which are provided in the data
+    directory.
+
+    Returns
+    -------
+    references : list of tuple
+        The `Material`, the energies as an `astropy.units.Quantity` and the
+        transmissions as a `np.ndarray` of each reference. Air is at 1 atm and
+        295 K.
+    """
+    references = []
+    for filename, material_name, thickness in _CXRO_REFERENCES:
+        data = np.loadtxt(roentgen._data_directory / "cxro" / filename, skiprows=2)
+        if material_name == "air":
+            density = density_ideal_gas(atm, 295 * u.Kelvin)
+        else:
+            density = None
+        material = Material(material_name, thickness, density=density)
+        references.append((material, u.Quantity(data[:, 0], "eV").to("keV"), data[:, 1]))
+    return references
+
+
+def compare_evaluation_modes(modes=None, repeat: int = 5):
+    """
+    Evaluate the transmission of the CXRO references in each evaluation mode and
+    compare the results with the default mode and with CXRO.
+
+    The modes are
+
+    * ``default``: `Material.transmission`, which interpolates the mass
+      attenuation data with `scipy.interpolate.interp1d`. It is the baseline.
+    * ``unit-free``: the same interpolation on plain arrays in keV.
+    * ``float32``: the unit-free mode with single precision energies and results.
+    * ``event table``: the table of an `EventThinner`.
+    * ``adaptive grid``: `numpy.interp` on an `adaptive_energy_grid` with a
+      relative tolerance of 1e-3.
+
+    Tables are built once, before the evaluations are timed. A mode passes if
+    ``abs(result - baseline) <= atol + rtol * baseline`` at every energy, where
+    atol and rtol are the tolerances declared for the mode.
+
+    Parameters
+    ----------
+    modes : list of str, optional
+        The modes to evaluate, all of them by default. The default mode is
+        always evaluated as the baseline.
+    repeat : int, optional
+        The number of times each evaluation is timed, of which the fastest is kept.
+
+    Returns
+    -------
+    comparison : `astropy.table.QTable`
+        One row per reference and mode with the maximum absolute and relative
+        error against the default mode and against CXRO, the evaluation time,
+        the speedup over the default mode, the tolerances and whether the mode
+        passed. Relative errors are only measured where the transmission is
+        above 1e-6.
+
+    Raises
+    ------
+    ValueError
+        If a mode is not known.
+
+    Examples
+    --------
+    >>> from roentgen.absorption.accuracy import compare_evaluation_modes
+    >>> comparison = compare_evaluation_modes(["unit-free"], repeat=1)
+    >>> bool(comparison["passed"].all())
+    True
+    """
+    if modes is None:
+        modes = list(_MODES)
+    unknown = [mode for mode in modes if mode not in _MODES]
+    if unknown:
+        raise ValueError(f"Unknown evaluation modes {unknown}, use one of {list(_MODES)}.")
+    modes = ["default"] + [mode for mode in modes if mode != "default"]
+
+    rows = []
+    for material, energy, cxro_transmission in get_cxro_references():
+        energy_kev = energy.to_value("keV")
+        baseline = None
+        for mode in modes:
+            prepare, atol, rtol = _MODES[mode]
+            evaluate = prepare(material, energy_kev)
+            result = np.asarray(evaluate(), dtype=float)
+            elapsed = min(timeit.repeat(evaluate, number=1, repeat=repeat))
+            if baseline is None:
+                baseline, baseline_time = result, elapsed
+            error, relative_error = _errors(result, baseline)
+            cxro_error, cxro_relative_error = _errors(result, cxro_transmission)
+            rows.append(
+                (
+                    material.name,
+                    mode,
+                    error,
+                    relative_error,
+                    cxro_error,
+                    cxro_relative_error,
+                    elapsed,
+                    baseline_time / elapsed,
+                    atol,
+                    rtol,
+                    bool(np.all(np.abs(result - baseline) <= atol + rtol * baseline)),
+                )
+            )
+    comparison = QTable(
+        rows=rows,
+        names=[
+            "material",
+            "mode",
+            "max error",
+            "max relative error",
+            "cxro max error",
+            "cxro max relative error",
+            "time",
+            "speedup",
+            "atol",
+            "rtol",
+            "passed",
+        ],
+    )
+    comparison["time"] = u.Quantity(comparison["time"], u.s)
+    return comparison
+
+
+def check_evaluation_modes(modes=None, repeat: int = 5):
+    """
+    Compare the evaluation modes, see `compare_evaluation_modes`, and raise an
+    error if any of them does not agree with the default mode to within its
+    declared tolerance.
+
+    Parameters
+    ----------
+    modes : list of str, optional
+        The modes to check, all of them by default.
+    repeat : int, optional
+        The number of times each evaluation is timed.
+
+    Returns
+    -------
+    comparison : `astropy.table.QTable`
+        The comparison, see `compare_evaluation_modes`.
+
+    Raises
+    ------
+    ValueError
+        If a mode exceeds its tolerance for any reference.
+    """
+    comparison = compare_evaluation_modes(modes, repeat=repeat)
+    failed = comparison[~comparison["passed"]]
+    if len(failed) > 0:
+        failures = ", ".join(
+            f"{row['mode']} for {row['material']} (max error {row['max error']:.3g}, "
+            f"max relative error {row['max relative error']:.3g})"
+            for row in failed
+        )
+        raise ValueError(f"Evaluation modes exceed their tolerance: {failures}.")
+    return comparison
+
+
+def _errors(result, reference):
+    """Return the maximum absolute error and the maximum relative error where
+    the reference is above the minimum transmission."""
+    difference = np.abs(result - reference)
+    measured = reference > _MIN_TRANSMISSION
+    relative_error = np.max(difference[measured] / reference[measured], initial=0.0)
+    return float(np.max(difference)), float(relative_error)
@@ -0,0 +1,201 @@
+"""A module to simulate the detection of individual photon events."""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import astropy.units as u
+
+from roentgen.absorption.material import Material, Response, Stack, _get_materials
+
+__all__ = ["EventThinner"]
+
+
+class EventThinner(object):
+    """
+    An object which thins a list of photon events down to the subset which is
+    detected, by drawing a Bernoulli trial for each event with a probability
+    given by the transmission or response at the energy of that event.
+
+    The detection probability is tabulated once, when the object is created,
+    on the energies of the underlying mass attenuation data, so that each
+    event only requires an interpolation in that table.
+
+    Parameters
+    ----------
+    model : `Material`, `Stack` or `Response`
+        For a `Response`, an event is detected if it is transmitted through the
+        optical path and absorbed in the detector. For a `Material` or a `Stack`,
+        an event is kept if it is transmitted.
+    oversample : int, optional
+        The number of intervals into which each interval of the tabulated mass
+        attenuation data is divided (in log energy) to build the table.
+
+    Attributes
+    ----------
+    energy : `astropy.units.Quantity`
+        The energies at which the detection probability is tabulated.
+    probability : `np.ndarray`
+        The detection probability at each tabulated energy.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> import astropy.units as u
+    >>> from roentgen.absorption import EventThinner, Material, Response
+    >>> resp = Response(Material('Be', 100 * u.um), detector=Material('Si', 500 * u.um))
+    >>> thinner = EventThinner(resp)
+    >>> events = u.Quantity(np.random.default_rng(1).uniform(2, 50, 10_000), 'keV')
+    >>> detected = np.concatenate(list(thinner.thin(events, chunk_size=1000, seed=1)))
+    """
+
+    def __init__(self, model, oversample: int = 32):
+        if not isinstance(model, (Material, Stack, Response)):
+            raise TypeError("model must be a Material, Stack or Response")
+        if oversample < 1:
+            raise ValueError("oversample must be at least 1")
+        self.model = model
+        log_energy = _tabulated_log_energy(model, oversample)
+        self._log_energy = log_energy
+        # guard against round-off pushing the ends outside of the data range
+        self.energy = u.Quantity(
+            np.clip(10**log_energy, 10 ** log_energy[0], 10 ** log_energy[-1]), "keV"
+        )
+        if isinstance(model, Response):
+            self.probability = model.response(self.energy)
+        else:
+            self.probability = model.transmission(self.energy)
+
+    def __repr__(self) -> str:
+        """Returns a developer-relevant representation."""
+        # at this point, no reason for this to be different than __str__
+        return self.__str__()
+
+    def __str__(self) -> str:
+        """Returns a human-readable user-focused representation."""
+        txt = f"EventThinner({self.model})"
+        return txt
+
+    def detection_probability(self, energy):
+        """Return the detection probability of events at the given energies.
+
+        Parameters
+        ----------
+        energy : `astropy.units.Quantity` or `np.ndarray`
+            The event energies. Plain arrays are assumed to be in keV.
+
+        Raises
+        ------
+        ValueError
+            If energy is outside of the interpolation range of 1 keV to 20 MeV.
+        """
+        log_energy = np.log10(_to_kev(energy))
+        if np.any(log_energy < self._log_energy[0]) or np.any(log_energy > self._log_energy[-1]):
+            raise ValueError("Event energies must be within the range of 1 keV to 20 MeV.")
+        return np.interp(log_energy, self._log_energy, self.probability)
+
+    def detect(self, energy, rng=None):
+        """Return a boolean mask which is True for the events which are detected.
+
+        Parameters
+        ----------
+        energy : `astropy.units.Quantity` or `np.ndarray`
+            The event energies. Plain arrays are assumed to be in keV.
+        rng : `numpy.random.Generator` or int, optional
+            The random number generator, or a seed to create one.
+        """
+        rng = np.random.default_rng(rng)
+        probability = self.detection_probability(energy)
+        return rng.random(np.shape(probability)) < probability
+
+    def thin(self, events, chunk_size: int = 1_000_000, seed=None, n_workers: int = 1):
+        """Iterate over an event list and yield the detected events chunk by chunk.
+
+        Each chunk is given its own random number generator spawned from ``seed``
+        so that results are reproducible and do not depend on ``n_workers``.
+
+        Parameters
+        ----------
+        events : array-like or iterable of array-like
+            The event energies. An array (including a memory-mapped array) is
+            processed in chunks of ``chunk_size`` events. Any other iterable
+            (e.g. a generator) is assumed to yield chunks of event energies.
+            Plain arrays are assumed to be in keV.
+        chunk_size : int, optional
+            The number of events per chunk when ``events`` is an array.
+        seed : int or `numpy.random.SeedSequence`, optional
+            The seed from which the random number generators are spawned.
+        n_workers : int, optional
+            The number of threads used to process chunks in parallel.
+
+        Yields
+        ------
+        detected : `astropy.units.Quantity` or `np.ndarray`
+            The detected events of each chunk, of the same type as the input.
+        """
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        jobs = (
+            (chunk, np.random.default_rng(seed.spawn(1)[0]))
+            for chunk in _iter_chunks(events, chunk_size)
+        )
+        if n_workers <= 1:
+            for chunk, rng in jobs:
+                yield chunk[self.detect(chunk, rng)]
+        else:
+            with ThreadPoolExecutor(max_workers=n_workers) as executor:
+                # keep a bounded number of chunks in flight so that long streams
+                # are never fully loaded into memory
+                pending = deque()
+                for chunk, rng in jobs:
+                    pending.append(executor.submit(_thin_chunk, self, chunk, rng))
+                    if len(pending) >= 2 * n_workers:
+                        yield pending.popleft().result()
+                while pending:
+                    yield pending.popleft().result()
+
+
+def _thin_chunk(thinner, chunk, rng):
+    return chunk[thinner.detect(chunk, rng)]
+
+
+def _to_kev(energy):
+    """Return energy values in keV as a plain array."""
+    if isinstance(energy, u.Quantity):
+        return energy.to_value(u.keV)
+    return np.asarray(energy, dtype=float)
+
+
+def _iter_chunks(events, chunk_size):
+    """Iterate over an array in chunks or over an iterable of chunks."""
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    if isinstance(events, np.ndarray):
+        for start in range(0, len(events), chunk_size):
+            yield events[start : start + chunk_size]
+    else:
+        for chunk in events:
+            if not isinstance(chunk, np.ndarray):
+                chunk = np.asarray(chunk, dtype=float)
+            yield chunk
+
+
+def _tabulated_log_energy(model, oversample):
+    """Return the log10 energies (in keV) at which to tabulate a model: the
+    union of the energies of all of its mass attenuation data, each interval
+    divided into ``oversample`` intervals."""
+    attenuations = [
+        atten
+        for material in _get_materials(model)
+        for atten in material.mass_attenuation_coefficients
+    ]
+    low = max(atten.energy[0].to_value("keV") for atten in attenuations)
+    high = min(atten.energy[-1].to_value("keV") for atten in attenuations)
+    energy = np.unique(np.concatenate([atten.energy.to_value("keV") for atten in attenuations]))
+    energy = energy[(energy >= low) & (energy <= high)]
+    log_energy = np.log10(energy)
+    fractions = np.arange(oversample) / oversample
+    steps = np.diff(log_energy)
+    result = (log_energy[:-1, np.newaxis] + steps[:, np.newaxis] * fractions).ravel()
+    return np.append(result, log_energy[-1])
@@ -0,0 +1,158 @@
+"""A module to build energy grids adapted to the absorption edges of a model."""
+
+import numpy as np
+
+import astropy.units as u
+
+from roentgen.absorption.material import Response, _get_materials
+from roentgen.lines.lines import _EDGE_MATCH_RTOL, get_material_edges
+
+__all__ = ["adaptive_energy_grid"]
+
+# the energy of the bottom of an edge in the mass attenuation data below its top, see MassAttenuationCoefficient._remove_double_vals_from_data
+_EDGE_OFFSET_KEV = 1e-6
+# the fractions of an interval (in log energy) at which the interpolation is checked
+_CHECK_FRACTIONS = np.array([0.25, 0.5, 0.75])
+# intervals narrower than this (relative) are never divided further
+_MIN_RELATIVE_WIDTH = 1e-9
+
+
+@u.quantity_input(energy_low=u.keV, energy_high=u.keV)
+def adaptive_energy_grid(
+    model, energy_low, energy_high, rtol: float = 1e-3, atol: float = 0.0, max_nodes=100_000
+):
+    """
+    Build an energy grid on which a model can be linearly interpolated to a
+    given tolerance.
+
+    A node is placed on both sides of every absorption edge of the model, taken
+    from its mass attenuation data and from the binding energies of its elements.
+    Each interval between nodes is then divided in half (in log energy) until
+    linearly interpolating the model within it, as `numpy.interp` does, agrees
+    with the model to within the tolerance. Nodes are therefore dense where the
+    model changes quickly and sparse on the smooth power-law segments.
+
+    Parameters
+    ----------
+    model : `Material`, `Stack` or `Response`
+        The transmission of a `Material` or `Stack`, or the response of a
+        `Response`, is interpolated.
+    energy_low : `astropy.units.Quantity`
+        The lowest energy of the grid.
+    energy_high : `astropy.units.Quantity`
+        The highest energy of the grid.
+    rtol : float, optional
+        The relative tolerance of the interpolation.
+    atol : float, optional
+        The absolute tolerance of the interpolation, which limits the number of
+        nodes where the model is close to zero.
+    max_nodes : int, optional
+        The maximum number of nodes.
+
+    Returns
+    -------
+    energy : `astropy.units.Quantity`
+        The sorted energies of the grid, in keV.
+
+    Raises
+    ------
+    ValueError
+        If the energy range is outside of the mass attenuation data or if more
+        than ``max_nodes`` nodes are needed.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> import astropy.units as u
+    >>> from roentgen.absorption import Material, Response, adaptive_energy_grid
+    >>> resp = Response(Material('Be', 100 * u.um), detector=Material('cdte', 1 * u.mm))
+    >>> energy = adaptive_energy_grid(resp, 1 * u.keV, 50 * u.keV, rtol=1e-3)
+    >>> len(energy) < len(np.arange(1, 50, 0.1))
+    True
+    """
+    if rtol <= 0 and atol <= 0:
+        raise ValueError("At least one of rtol or atol must be positive.")
+    if isinstance(model, Response):
+        evaluate = model.response
+    else:
+        evaluate = model.transmission
+    low, high = energy_low.to_value("keV"), energy_high.to_value("keV")
+    attenuations = [
+        atten
+        for material in _get_materials(model)
+        for atten in material.mass_attenuation_coefficients
+    ]
+    data_low = max(atten.energy[0].to_value("keV") for atten in attenuations)
+    data_high = min(atten.energy[-1].to_value("keV") for atten in attenuations)
+    if low < data_low or high > data_high or low >= high:
+        raise ValueError(
+            f"The energy range must be increasing and within {data_low} keV to {data_high} keV."
+        )
+
+    edges = _get_edges(model, low, high)
+    # the edge bottoms of the mass attenuation data lie just below the edges
+    nodes = np.unique(
+        np.concatenate([[low, high], edges, np.clip(edges - _EDGE_OFFSET_KEV, low, high)])
+    )
+    values = evaluate(u.Quantity(nodes, "keV"))
+    finished_nodes = [nodes]
+    # intervals which are still to be checked, given by their end points
+    left, right = nodes[:-1], nodes[1:]
+    left_value, right_value = values[:-1], values[1:]
+    # intervals across an edge are never interpolated to the tolerance
+    bridge = np.isin(right, edges) & np.isclose(right - left, _EDGE_OFFSET_KEV)
+    left, right = left[~bridge], right[~bridge]
+    left_value, right_value = left_value[~bridge], right_value[~bridge]
+    num_nodes = len(nodes)
+    while len(left) > 0:
+        log_left, log_right = np.log(left), np.log(right)
+        check = np.exp(
+            log_left[:, np.newaxis] + (log_right - log_left)[:, np.newaxis] * _CHECK_FRACTIONS
+        )
+        exact = evaluate(u.Quantity(check.ravel(), "keV")).reshape(check.shape)
+        weight = (check - left[:, np.newaxis]) / (right - left)[:, np.newaxis]
+        interpolated = (
+            left_value[:, np.newaxis] * (1 - weight) + right_value[:, np.newaxis] * weight
+        )
+        error = np.abs(interpolated - exact)
+        refine = np.any(error > rtol * np.abs(exact) + atol, axis=1)
+        refine &= (right - left) > _MIN_RELATIVE_WIDTH * right
+        if not np.any(refine):
+            break
+        num_nodes += np.count_nonzero(refine)
+        if num_nodes > max_nodes:
+            raise ValueError(
+                f"More than {max_nodes} nodes are needed, increase rtol, atol or max_nodes."
+            )
+        # the midpoint in log energy is the middle check point
+        middle, middle_value = check[refine, 1], exact[refine, 1]
+        finished_nodes.append(middle)
+        left = np.concatenate([left[refine], middle])
+        right = np.concatenate([middle, right[refine]])
+        left_value = np.concatenate([left_value[refine], middle_value])
+        right_value = np.concatenate([middle_value, right_value[refine]])
+    return u.Quantity(np.unique(np.concatenate(finished_nodes)), "keV")
+
+
+def _get_edges(model, low, high):
+    """Return the energies in keV of all absorption edges of a model between
+    low and high. Edges in the mass attenuation data are used, and the binding
+    energies of the elements of the model are added where the data has no edge."""
+    table_edges = [
+        atten.edges.to_value("keV")
+        for material in _get_materials(model)
+        for atten in material.mass_attenuation_coefficients
+    ]
+    table_edges = np.unique(np.concatenate(table_edges))
+    binding_edges = np.concatenate(
+        [
+            get_material_edges(material)["energy"].to_value("keV")
+            for material in _get_materials(model)
+        ]
+    )
+    if len(table_edges) > 0:
+        nearest = np.abs(binding_edges[:, np.newaxis] - table_edges).min(axis=1)
+        binding_edges = binding_edges[nearest > _EDGE_MATCH_RTOL * binding_edges]
+    edges = np.unique(np.concatenate([table_edges, binding_edges]))
+    # keep a whole edge (top and bottom) within the range
+    return edges[(edges - _EDGE_OFFSET_KEV > low) & (edges <= high)]
@@ -15,12 +15,16 @@ from roentgen.util import (
     is_an_element,
     is_in_known_compounds,
 )
+from roentgen.util.profiling import _section
 
-__all__ = ["Material", "MassAttenuationCoefficient", "Stack", "Response"]
+__all__ = ["Material", "MassAttenuationCoefficient", "Stack", "Response", "CollectionEfficiency"]
 
 _package_directory = roentgen._package_directory
 _data_directory = roentgen._data_directory
 
+# the maximum number of energy grids for which results are cached
+_MAX_CACHED_GRIDS = 8
+
 
 class Material(object):
     """
@@ -137,22 +141,39 @@ class Material(object):
 
     @u.quantity_input(energy=u.keV)
     def mass_attenuation_coefficient(self, energy):
-        result = np.sum(
-            np.vstack(
-                [
-                    atten.func(energy) * frac_mass
-                    for atten, frac_mass in zip(
-                        self.mass_attenuation_coefficients, self.fractional_masses
-                    )
-                ]
-            ),
-            axis=0,
-        )
+        with _section("absorption.interpolate", energy.size * len(self.fractional_masses)):
+            result = np.sum(
+                np.vstack(
+                    [
+                        atten.func(energy) * frac_mass
+                        for atten, frac_mass in zip(
+                            self.mass_attenuation_coefficients, self.fractional_masses
+                        )
+                    ]
+                ),
+                axis=0,
+            )
         if energy.isscalar:
             return result[0]
         else:
             return result
 
+    def _mass_attenuation_values(self, energy_kev):
+        """Return the mass attenuation coefficient in cm^2/g as a plain array
+        given plain energy values in keV. This avoids unit handling in tight
+        loops."""
+        log_energy = np.log10(energy_kev)
+        result = np.zeros(np.shape(log_energy), dtype=float)
+        with _section("absorption.interpolate", result.size * len(self.fractional_masses)):
+            for atten, frac_mass in zip(self.mass_attenuation_coefficients, self.fractional_masses):
+                result += frac_mass * 10 ** atten._f(log_energy)
+        return result
+
+    @property
+    def _areal_density(self):
+        """The areal density (density times thickness) in g/cm^2 as a float."""
+        return (self.density * self.thickness).to_value("g / cm**2")
+
     @u.quantity_input(energy=u.keV)
     def transmission(self, energy):
         """Provide the transmission fraction (0 to 1).
@@ -168,8 +189,12 @@ class Material(object):
             If energy is outside of the interpolation range of 1 keV to 20 MeV.
         """
         coefficients = self.mass_attenuation_coefficient(energy)
-        transmission = np.exp(-coefficients * self.density * self.thickness)
-        return transmission.value  # remove the dimensionless unit
+        with _section("absorption.units", energy.size):
+            optical_depth = (coefficients * self.density * self.thickness).to_value(
+                u.dimensionless_unscaled
+            )
+        with _section("absorption.exp", energy.size):
+            return np.exp(-optical_depth)
 
     @u.quantity_input(energy=u.keV)
     def absorption(self, energy):
@@ -204,6 +229,83 @@ class Material(object):
         """
         return self.mass_attenuation_coefficient(energy) * self.density
 
+    def _optical_depth_values(self, energy_kev):
+        """Return the optical depth (mass attenuation times areal density) at
+        normal incidence as a plain array given plain energy values in keV."""
+        return self._mass_attenuation_values(energy_kev) * self._areal_density
+
+    @u.quantity_input(energy=u.keV)
+    def ray_transmission(self, energy, incidence_angle=None, path_scale=None):
+        """Provide the transmission fraction (0 to 1) for many rays which each
+        cross the material along a different path length.
+
+        The attenuation is evaluated once per energy and scaled for each ray.
+
+        Parameters
+        ----------
+        energy : `astropy.units.Quantity`
+            An array of energies in keV.
+        incidence_angle : `astropy.units.Quantity`, optional
+            An array of angles between each ray and the normal of the material.
+        path_scale : array-like, optional
+            An array of path lengths of each ray in units of the thickness.
+            Exactly one of ``incidence_angle`` or ``path_scale`` must be given.
+
+        Returns
+        -------
+        transmission : `np.ndarray`
+            An array of shape ``(n_rays, n_energy)``.
+
+        Raises
+        ------
+        ValueError
+            If energy is outside of the interpolation range of 1 keV to 20 MeV.
+        """
+        scale = _get_path_scale(incidence_angle, path_scale)
+        optical_depth = self._optical_depth_values(np.atleast_1d(energy.to_value("keV")))
+        return np.exp(-scale[:, np.newaxis] * optical_depth)
+
+    @u.quantity_input(energy=u.keV)
+    def sample_interaction_depth(self, energy, rng=None):
+        """Draw the depth at which photons absorbed in the material interact.
+
+        The depths follow the exponential attenuation profile truncated at the
+        thickness of the material and are drawn by inverse transform sampling,
+        one depth per photon energy.
+
+        Parameters
+        ----------
+        energy : `astropy.units.Quantity`
+            An array of photon energies in keV. Energies may be mixed.
+        rng : `numpy.random.Generator` or int, optional
+            The random number generator, or a seed to create one.
+
+        Returns
+        -------
+        depth : `astropy.units.Quantity`
+            The interaction depths measured from the front surface, in the
+            same unit as the thickness.
+
+        Raises
+        ------
+        ValueError
+            If energy is outside of the interpolation range of 1 keV to 20 MeV.
+        """
+        rng = np.random.default_rng(rng)
+        thickness = self.thickness.value
+        linear_coeff = self._mass_attenuation_values(energy.to_value("keV")) * (
+            self.density * self.thickness.unit
+        ).to_value("g / cm**2")
+        # 1 - exp(-mu * thickness), the probability to interact at all
+        absorbed = -np.expm1(-linear_coeff * thickness)
+        uniform = rng.random(np.shape(linear_coeff))
+        depth = -np.log1p(-uniform * absorbed) / linear_coeff
+        # guard against round-off pushing samples past the back surface
+        depth = np.minimum(depth, thickness)
+        if energy.isscalar:
+            depth = depth[()]
+        return u.Quantity(depth, self.thickness.unit)
+
 
 class Stack(object):
     """
@@ -282,6 +384,44 @@ class Stack(object):
         """
         return 1.0 - self.transmission(energy)
 
+    def _optical_depth_values(self, energy_kev):
+        """Return the total optical depth of all materials at normal incidence
+        as a plain array given plain energy values in keV."""
+        return np.sum(
+            [material._optical_depth_values(energy_kev) for material in self.materials], axis=0
+        )
+
+    @u.quantity_input(energy=u.keV)
+    def ray_transmission(self, energy, incidence_angle=None, path_scale=None):
+        """Provide the transmission fraction (0 to 1) for many rays which each
+        cross the stack along a different path length.
+
+        The attenuation is evaluated once per energy and scaled for each ray.
+
+        Parameters
+        ----------
+        energy : `astropy.units.Quantity`
+            An array of energies in keV.
+        incidence_angle : `astropy.units.Quantity`, optional
+            An array of angles between each ray and the normal of the stack.
+        path_scale : array-like, optional
+            An array of path lengths of each ray in units of the thicknesses.
+            Exactly one of ``incidence_angle`` or ``path_scale`` must be given.
+
+        Returns
+        -------
+        transmission : `np.ndarray`
+            An array of shape ``(n_rays, n_energy)``.
+
+        Raises
+        ------
+        ValueError
+            If energy is outside of the interpolation range of 1 keV to 20 MeV.
+        """
+        scale = _get_path_scale(incidence_angle, path_scale)
+        optical_depth = self._optical_depth_values(np.atleast_1d(energy.to_value("keV")))
+        return np.exp(-scale[:, np.newaxis] * optical_depth)
+
 
 class Response(object):
     """
@@ -299,26 +439,63 @@ class Response(object):
         are absorbed. If provided with None, than assume a perfectly absorbing
         detector material.
 
+    collection_efficiency : CollectionEfficiency, optional
+        The charge collection efficiency as a function of depth in the
+        detector. If not provided, the detector is assumed to be uniformly
+        efficient through its whole thickness.
+
     Examples
     --------
     >>> from roentgen.absorption.material import Material, Response, Stack
     >>> import astropy.units as u
     >>> optical_path = Stack([Material('air', 1 * u.m), Material('Al', 500 * u.mm)])
     >>> resp = Response(optical_path, detector=Material('cdte', 500 * u.um))
+    >>> from roentgen.absorption.material import CollectionEfficiency
+    >>> resp = Response(
+    ...     optical_path,
+    ...     detector=Material('cdte', 500 * u.um),
+    ...     collection_efficiency=CollectionEfficiency.dead_layer(1 * u.um),
+    ... )
     """
 
-    def __init__(self, optical_path, detector):
+    def __init__(self, optical_path, detector, collection_efficiency=None):
         # make sure the materials are a list since we iterate over them
         # to calculate the transmission
         if isinstance(optical_path, Stack) or isinstance(optical_path, Material):
             self.optical_path = optical_path
         else:
             raise TypeError("optical_path must be a Stack or Material")
-
-        if isinstance(detector, Material):
-            self.detector = detector
-        else:
+        # detector absorption weighted by the collection efficiency, per energy
+        # grid, which is cleared when the detector or collection efficiency is set
+        self._collected_absorption_cache = {}
+        self.detector = detector
+        self.collection_efficiency = collection_efficiency
+
+    @property
+    def detector(self):
+        """The detector material."""
+        return self._detector
+
+    @detector.setter
+    def detector(self, detector):
+        if not isinstance(detector, Material):
             raise TypeError("detector must be a Material")
+        self._detector = detector
+        self._collected_absorption_cache.clear()
+
+    @property
+    def collection_efficiency(self):
+        """The charge collection efficiency of the detector, or None."""
+        return self._collection_efficiency
+
+    @collection_efficiency.setter
+    def collection_efficiency(self, collection_efficiency):
+        if not (
+            collection_efficiency is None or isinstance(collection_efficiency, CollectionEfficiency)
+        ):
+            raise TypeError("collection_efficiency must be a CollectionEfficiency or None")
+        self._collection_efficiency = collection_efficiency
+        self._collected_absorption_cache.clear()
 
     def __repr__(self) -> str:
         """Returns a developer-relevant representation."""
@@ -327,7 +504,10 @@ class Response(object):
 
     def __str__(self) -> str:
         """Returns a human-readable user-focused representation."""
-        txt = f"Response(optical_path={self.optical_path} detector={self.detector})"
+        txt = f"Response(optical_path={self.optical_path} detector={self.detector}"
+        if self.collection_efficiency is not None:
+            txt += f" collection_efficiency={self.collection_efficiency}"
+        txt += ")"
         return txt
 
     def response(self, energy):
@@ -350,10 +530,202 @@ class Response(object):
         detector_absorption = np.ones(len(energy), dtype=float)
 
         transmission = self.optical_path.transmission(energy)
-        detector_absorption = self.detector.absorption(energy)
+        if self.collection_efficiency is None:
+            detector_absorption = self.detector.absorption(energy)
+        else:
+            detector_absorption = self._collected_absorption(energy)
+
+        return transmission * detector_absorption
+
+    @u.quantity_input(energy=u.keV)
+    def ray_response(self, energy, incidence_angle=None, path_scale=None):
+        """Returns the response for many rays which each cross the optical path
+        and the detector along a different path length, for example the rays
+        reaching each pixel of an imager at a different incidence angle.
+
+        The attenuation is evaluated once per energy and scaled for each ray.
+
+        Parameters
+        ----------
+        energy : `astropy.units.Quantity`
+            An array of energies in keV.
+        incidence_angle : `astropy.units.Quantity`, optional
+            An array of angles between each ray and the normal of the materials.
+        path_scale : array-like, optional
+            An array of path lengths of each ray in units of the thicknesses.
+            Exactly one of ``incidence_angle`` or ``path_scale`` must be given.
 
+        Returns
+        -------
+        response : `np.ndarray`
+            An array of shape ``(n_rays, n_energy)``.
+
+        Raises
+        ------
+        ValueError
+            If energy is outside of the interpolation range of 1 keV to 20 MeV.
+        """
+        scale = _get_path_scale(incidence_angle, path_scale)[:, np.newaxis]
+        energy_kev = np.atleast_1d(energy.to_value("keV"))
+        transmission = np.exp(-scale * self.optical_path._optical_depth_values(energy_kev))
+        if self.collection_efficiency is None:
+            detector_optical_depth = self.detector._optical_depth_values(energy_kev)
+            detector_absorption = -np.expm1(-scale * detector_optical_depth)
+        else:
+            # a ray crossing at an angle sees a larger attenuation per unit depth
+            linear_coeff = (
+                self.detector._mass_attenuation_values(energy_kev)
+                * self.detector.density.to_value("g / cm**3")
+                / u.cm
+            )
+            detector_absorption = self.collection_efficiency.absorption(
+                scale * linear_coeff, self.detector.thickness
+            )
         return transmission * detector_absorption
 
+    def _collected_absorption(self, energy):
+        """The detector absorption weighted by the collection efficiency. The
+        result is cached for each energy grid and detector configuration."""
+        energy_kev = np.asarray(energy.to_value("keV"), dtype=float)
+        # the detector may also be changed in place
+        key = (
+            energy_kev.shape,
+            energy_kev.tobytes(),
+            tuple(self.detector.list_symbols),
+            self.detector.fractional_masses.tobytes(),
+            self.detector.thickness.to_value("m"),
+            self.detector.density.to_value("kg / m**3"),
+        )
+        if key not in self._collected_absorption_cache:
+            if len(self._collected_absorption_cache) >= _MAX_CACHED_GRIDS:
+                # forget the oldest energy grid
+                del self._collected_absorption_cache[next(iter(self._collected_absorption_cache))]
+            linear_coeff = (
+                self.detector._mass_attenuation_values(energy_kev)
+                * self.detector.density.to_value("g / cm**3")
+                / u.cm
+            )
+            self._collected_absorption_cache[key] = self.collection_efficiency.absorption(
+                linear_coeff, self.detector.thickness
+            )
+        return self._collected_absorption_cache[key]
+
+
+class CollectionEfficiency(object):
+    """
+    The charge collection efficiency of a detector as a function of depth from
+    its front surface.
+
+    The efficiency is linearly interpolated between the tabulated depths and
+    held constant beyond them. A step, such as the edge of a dead layer, is
+    described by repeating a depth with two different efficiencies.
+
+    Parameters
+    ----------
+    depth : `astropy.units.Quantity`
+        The tabulated depths in increasing order.
+    efficiency : array-like
+        The collection efficiency (0 to 1) at each depth.
+
+    Examples
+    --------
+    >>> from roentgen.absorption.material import CollectionEfficiency
+    >>> import astropy.units as u
+    >>> dead_layer = CollectionEfficiency([0, 1, 1] * u.um, [0, 0, 1])
+    >>> partially_depleted = CollectionEfficiency.depletion_depth(300 * u.um)
+    """
+
+    @u.quantity_input
+    def __init__(self, depth: u.m, efficiency):
+        depth = np.atleast_1d(depth)
+        efficiency = np.atleast_1d(np.asarray(efficiency, dtype=float))
+        if depth.shape != efficiency.shape or depth.ndim != 1:
+            raise ValueError("depth and efficiency must be one-dimensional and of equal length.")
+        if np.any(np.diff(depth) < 0):
+            raise ValueError("depth must be in increasing order.")
+        self.depth = depth
+        self.efficiency = efficiency
+
+    @classmethod
+    @u.quantity_input
+    def dead_layer(cls, thickness: u.m):
+        """A detector which collects no charge in a front layer of a given
+        thickness and collects all charge beyond it."""
+        return cls(u.Quantity([0 * thickness.unit, thickness, thickness]), [0, 0, 1])
+
+    @classmethod
+    @u.quantity_input
+    def depletion_depth(cls, depth: u.m):
+        """A partially depleted detector which collects all charge up to a given
+        depth and no charge beyond it."""
+        return cls(u.Quantity([0 * depth.unit, depth, depth]), [1, 1, 0])
+
+    def __repr__(self) -> str:
+        """Returns a developer-relevant representation."""
+        # at this point, no reason for this to be different than __str__
+        return self.__str__()
+
+    def __str__(self) -> str:
+        """Returns a human-readable user-focused representation."""
+        txt = f"CollectionEfficiency(depth={self.depth} efficiency={self.efficiency})"
+        return txt
+
+    @u.quantity_input
+    def __call__(self, depth: u.m):
+        """Return the collection efficiency at the given depths."""
+        z0, z1, c0, c1 = self._segments(np.max(depth), depth.unit)
+        depth = np.clip(depth.value, z0[0], z1[-1])
+        index = np.clip(np.searchsorted(z1, depth, side="left"), 0, len(z1) - 1)
+        width = z1[index] - z0[index]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            slope = np.where(width > 0, (c1[index] - c0[index]) / width, 0.0)
+        return c0[index] + slope * (depth - z0[index])
+
+    def _segments(self, thickness, unit):
+        """Return the start and end depths (in unit) and efficiencies of the
+        linear segments which cover the depth range from 0 to thickness."""
+        thickness = thickness.to_value(unit)
+        depth = np.concatenate([[0], self.depth.to_value(unit), [max(thickness, 0)]])
+        efficiency = np.concatenate([[self.efficiency[0]], self.efficiency, [self.efficiency[-1]]])
+        z0, z1 = depth[:-1], depth[1:]
+        c0, c1 = efficiency[:-1], efficiency[1:]
+        # clip every segment to the detector, interpolating the efficiency at the cut
+        width = z1 - z0
+        new_z0, new_z1 = np.clip(z0, 0, thickness), np.clip(z1, 0, thickness)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            slope = np.where(width > 0, (c1 - c0) / width, 0.0)
+        c0, c1 = c0 + slope * (new_z0 - z0), c0 + slope * (new_z1 - z0)
+        keep = new_z1 > new_z0
+        return new_z0[keep], new_z1[keep], c0[keep], c1[keep]
+
+    @u.quantity_input
+    def absorption(self, linear_attenuation_coefficient: 1 / u.m, thickness: u.m):
+        """Return the fraction of photons absorbed in a detector weighted by the
+        collection efficiency at the depth of interaction.
+
+        The integral over depth of the exponential attenuation profile times the
+        efficiency is evaluated exactly on each linear segment, for all
+        attenuation coefficients and segments at once.
+
+        Parameters
+        ----------
+        linear_attenuation_coefficient : `astropy.units.Quantity`
+            The linear attenuation coefficients of the detector, of any shape.
+        thickness : `astropy.units.Quantity`
+            The thickness of the detector.
+        """
+        unit = thickness.unit
+        z0, z1, c0, c1 = self._segments(thickness, unit)
+        mu = linear_attenuation_coefficient.to_value(1 / unit)[..., np.newaxis]
+        x = mu * (z1 - z0)
+        # fraction of the photons entering the segment which are absorbed in it
+        absorbed = -np.expm1(-x)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # mean depth weight of the absorbed photons along a linear segment
+            ramp = np.where(x > 0, absorbed / x - np.exp(-x), 0.0)
+        weighted = c0 * absorbed + (c1 - c0) * ramp
+        return np.sum(np.exp(-mu * z0) * weighted, axis=-1)
+
 
 class MassAttenuationCoefficient(object):
     """
@@ -381,6 +753,8 @@ class MassAttenuationCoefficient(object):
         any given energy. Energies must be given by an `astropy.units.Quantity`.
         The interpolation range is 1 keV to 20 MeV.
         Going outside that range will result in a ValueError.
+    edges : `astropy.units.Quantity`
+        The energies of the absorption edges in the data.
 
     Examples
     --------
@@ -411,7 +785,8 @@ class MassAttenuationCoefficient(object):
             datafile_path = _data_directory / "compounds_mixtures" / filename
         else:
             raise ValueError(f"Element or compound {material} not found.")
-        data = np.loadtxt(datafile_path, delimiter=",")
+        with _section("absorption.load_data"):
+            data = np.loadtxt(datafile_path, delimiter=",")
         # find the material in our list
         self.symbol = symbol
         self.name = name
@@ -422,12 +797,13 @@ class MassAttenuationCoefficient(object):
 
         data_energy_kev = np.log10(self.energy.value)
         data_attenuation_coeff = np.log10(self.data.value)
-        self._f = interpolate.interp1d(
-            data_energy_kev,
-            data_attenuation_coeff,
-            bounds_error=True,
-            assume_sorted=True,
-        )
+        with _section("absorption.build_interpolator", len(data_energy_kev)):
+            self._f = interpolate.interp1d(
+                data_energy_kev,
+                data_attenuation_coeff,
+                bounds_error=True,
+                assume_sorted=True,
+            )
         self.func = lambda x: u.Quantity(10 ** self._f(np.log10(x.to("keV").value)), "cm^2/g")
 
     def __repr__(self) -> str:
@@ -446,7 +822,37 @@ class MassAttenuationCoefficient(object):
         must be removed to enable correct interpolation."""
         uniq, count = np.unique(self.energy, return_counts=True)
         duplicates = uniq[count > 1]
+        self.edges = duplicates.copy()
         for this_dup in duplicates:
             ind = (self.energy == this_dup).nonzero()
             # shift the first instance of the energy, the bottom of the edge
             self.energy[ind[0][0]] -= 1e-3 * u.eV
+
+
+def _get_path_scale(incidence_angle, path_scale):
+    """Return the path length of each ray in units of the thickness given
+    either the incidence angles or the path length scale factors."""
+    if (incidence_angle is None) == (path_scale is None):
+        raise ValueError("Exactly one of incidence_angle or path_scale must be provided.")
+    if incidence_angle is not None:
+        angle = np.atleast_1d(incidence_angle.to_value("rad"))
+        if np.any(np.abs(angle) >= np.pi / 2):
+            raise ValueError("Incidence angles must be less than 90 degrees.")
+        return 1.0 / np.cos(angle)
+    path_scale = np.atleast_1d(np.asarray(path_scale, dtype=float))
+    if np.any(path_scale < 0):
+        raise ValueError("path_scale must not be negative.")
+    return path_scale
+
+
+def _get_materials(model):
+    """Return a flat list of all `Material` objects which make up a `Material`,
+    `Stack` or `Response`."""
+    if isinstance(model, Material):
+        return [model]
+    elif isinstance(model, Stack):
+        return list(model.materials)
+    elif isinstance(model, Response):
+        return _get_materials(model.optical_path) + [model.detector]
+    else:
+        raise TypeError("model must be a Material, Stack or Response")
@@ -0,0 +1,191 @@
+"""A module to calculate the polychromatic transmission through thickness maps."""
+
+from pathlib import Path
+
+import numpy as np
+
+import astropy.units as u
+
+from roentgen.absorption.material import Material
+
+__all__ = ["PolychromaticTransmission"]
+
+# smallest transmitted fraction kept in the lookup table before taking the log
+_MIN_TRANSMISSION = 1e-300
+
+
+class PolychromaticTransmission(object):
+    """
+    An object which calculates the fraction of an incident spectrum which is
+    transmitted through one or two materials whose thicknesses vary per pixel,
+    such as a radiograph of a thickness image or volume.
+
+    The spectrum-integrated transmission is tabulated once as a function of
+    thickness (or of both thicknesses for two materials), which includes beam
+    hardening, and is then interpolated for every pixel.
+
+    Parameters
+    ----------
+    materials : `Material` or list of `Material`
+        One or two materials. Only their composition and density are used, their
+        thickness is ignored.
+    energy : `astropy.units.Quantity`
+        The energies of the incident spectrum.
+    spectrum : array-like
+        The incident intensity at each energy.
+    max_thickness : `astropy.units.Quantity` or list of `astropy.units.Quantity`
+        The largest thickness of each material to tabulate, which must be
+        positive. Thickness maps given as plain arrays are assumed to be in
+        this unit.
+    n_samples : int, optional
+        The number of tabulated thicknesses for each material, at least 2.
+
+    Attributes
+    ----------
+    thickness : list of `astropy.units.Quantity`
+        The tabulated thicknesses of each material.
+    table : `np.ndarray`
+        The transmitted fraction at each tabulated thickness.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> import astropy.units as u
+    >>> from roentgen.absorption import Material, PolychromaticTransmission
+    >>> energy = u.Quantity(np.arange(10, 80, 0.5), 'keV')
+    >>> spectrum = np.exp(-energy.value / 30)
+    >>> radiograph = PolychromaticTransmission(Material('Al', 1 * u.mm), energy, spectrum, 5 * u.cm)
+    >>> image = np.random.default_rng(0).uniform(0, 5, (64, 64)) * u.cm
+    >>> transmitted = radiograph(image)
+    """
+
+    @u.quantity_input(energy=u.keV)
+    def __init__(self, materials, energy, spectrum, max_thickness, n_samples: int = 1024):
+        if isinstance(materials, Material):
+            materials = [materials]
+        if isinstance(max_thickness, u.Quantity) and max_thickness.isscalar:
+            max_thickness = [max_thickness]
+        if n_samples < 2:
+            raise ValueError("n_samples must be at least 2")
+        if len(materials) not in (1, 2) or len(max_thickness) != len(materials):
+            raise ValueError("Provide one or two materials, each with a maximum thickness.")
+        if not all(isinstance(material, Material) for material in materials):
+            raise TypeError("materials must be Material objects")
+        if not all(this_max.value > 0 for this_max in max_thickness):
+            raise ValueError("max_thickness must be positive")
+        spectrum = np.asarray(u.Quantity(spectrum).value, dtype=float)
+        if spectrum.shape != energy.shape:
+            raise ValueError("spectrum must have the same shape as energy")
+        weights = spectrum / spectrum.sum()
+
+        self.materials = list(materials)
+        self.energy = energy
+        self.spectrum = spectrum
+        self.thickness = []
+        # transmission of each tabulated thickness at each energy
+        transmissions = []
+        for material, this_max in zip(self.materials, max_thickness):
+            thickness = np.linspace(0, this_max.value, n_samples)
+            linear_coeff = material._mass_attenuation_values(energy.to_value("keV")) * (
+                material.density * this_max.unit
+            ).to_value("g / cm**2")
+            transmissions.append(np.exp(-thickness[:, np.newaxis] * linear_coeff))
+            self.thickness.append(u.Quantity(thickness, this_max.unit))
+        if len(transmissions) == 1:
+            self.table = transmissions[0] @ weights
+        else:
+            self.table = (transmissions[0] * weights) @ transmissions[1].T
+        # the log of the transmission is close to linear in thickness
+        self._log_table = np.log(np.maximum(self.table, _MIN_TRANSMISSION))
+
+    def __repr__(self) -> str:
+        """Returns a developer-relevant representation."""
+        # at this point, no reason for this to be different than __str__
+        return self.__str__()
+
+    def __str__(self) -> str:
+        """Returns a human-readable user-focused representation."""
+        txt = f"PolychromaticTransmission({self.materials})"
+        return txt
+
+    def __call__(self, *thickness_maps, out=None, chunk_size: int = 2**22, dtype=np.float64):
+        """Return the transmitted fraction of the incident spectrum per pixel.
+
+        Parameters
+        ----------
+        *thickness_maps : `astropy.units.Quantity` or `np.ndarray`
+            One thickness map per material, all of the same shape. Plain arrays
+            (including memory-mapped arrays) are assumed to be in the unit of
+            ``max_thickness`` and are read one chunk at a time.
+        out : `np.ndarray`, str or `pathlib.Path`, optional
+            The array in which to store the result. If a path is given, the
+            result is written to a memory-mapped ``.npy`` file at that path.
+        chunk_size : int, optional
+            The approximate number of pixels processed at once.
+        dtype : data-type, optional
+            The data type of the result if ``out`` is not an array.
+
+        Returns
+        -------
+        transmission : `np.ndarray`
+
+        Raises
+        ------
+        ValueError
+            If a thickness is outside of the tabulated range.
+        """
+        if len(thickness_maps) != len(self.materials):
+            raise ValueError(f"Expected {len(self.materials)} thickness map(s).")
+        thickness_maps = [
+            np.asarray(this_map) if not isinstance(this_map, np.ndarray) else this_map
+            for this_map in thickness_maps
+        ]
+        shape = thickness_maps[0].shape
+        if any(this_map.shape != shape for this_map in thickness_maps):
+            raise ValueError("All thickness maps must have the same shape.")
+        if isinstance(out, (str, Path)):
+            out = np.lib.format.open_memmap(out, mode="w+", dtype=dtype, shape=shape)
+        elif out is None:
+            out = np.empty(shape, dtype=dtype)
+        elif out.shape != shape:
+            raise ValueError("out must have the same shape as the thickness maps")
+
+        if len(shape) == 0:
+            out[...] = self._evaluate(thickness_maps)
+            return out
+        row_size = int(np.prod(shape[1:]))
+        rows = max(1, chunk_size // max(row_size, 1))
+        for start in range(0, shape[0], rows):
+            chunk = [this_map[start : start + rows] for this_map in thickness_maps]
+            out[start : start + rows] = self._evaluate(chunk)
+        return out
+
+    def _evaluate(self, thickness_maps):
+        """Interpolate the table for plain arrays of thicknesses."""
+        indices = []
+        for this_map, thickness in zip(thickness_maps, self.thickness):
+            if isinstance(this_map, u.Quantity):
+                this_map = this_map.to_value(thickness.unit)
+            step = thickness[1].value - thickness[0].value
+            index = np.asarray(this_map, dtype=float) / step
+            # allow for round-off at the ends of the table
+            if np.any(index < -1e-9) or np.any(index > len(thickness) - 1 + 1e-9):
+                raise ValueError(
+                    f"Thicknesses must be between 0 and {thickness[-1]} for the tabulated range."
+                )
+            indices.append(np.clip(index, 0, len(thickness) - 1))
+        if len(indices) == 1:
+            return np.exp(np.interp(indices[0], np.arange(len(self.table)), self._log_table))
+        # bilinear interpolation on the regular grid of both thicknesses
+        corners = []
+        for index, size in zip(indices, self._log_table.shape):
+            lower = np.minimum(index.astype(int), size - 2)
+            corners.append((lower, index - lower))
+        (i0, wi), (j0, wj) = corners
+        result = (
+            self._log_table[i0, j0] * (1 - wi) * (1 - wj)
+            + self._log_table[i0 + 1, j0] * wi * (1 - wj)
+            + self._log_table[i0, j0 + 1] * (1 - wi) * wj
+            + self._log_table[i0 + 1, j0 + 1] * wi * wj
+        )
+        return np.exp(result)
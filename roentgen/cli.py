@@ -0,0 +1,435 @@
+"""A command-line interface to evaluate batches of transmissions and responses."""
+
+import argparse
+import asyncio
+import csv
+import json
+import sys
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+import astropy.units as u
+
+from roentgen.absorption.material import Material, Response, Stack
+from roentgen.util import is_an_element, is_in_known_compounds
+
+__all__ = ["main", "read_configurations", "evaluate_configuration", "evaluate_configurations"]
+
+# the separator of the layers in the columns of a csv configuration file
+_LAYER_SEPARATOR = ";"
+_OUTPUT_FORMATS = {".csv": "csv", ".npz": "npz", ".parquet": "parquet"}
+_CSV_REQUIRED_COLUMNS = ("name", "materials", "thicknesses")
+# the number of materials kept by each process, which are shared by the
+# configurations with the same material, thickness and density
+_MATERIAL_CACHE_SIZE = 256
+
+
+def read_configurations(file_path):
+    """
+    Read the response configurations from a csv, json or yaml file.
+
+    In a json or yaml file, the configurations are a list of mappings with the
+    keys ``name``, ``layers`` (a list of mappings with the keys ``material``,
+    ``thickness`` and optionally ``density``), optionally ``detector`` (a
+    mapping with the same keys as a layer) and optionally ``energy`` (a mapping
+    with the keys ``low``, ``high`` and ``step``). Quantities are given as
+    strings with units (e.g. "100 um") or as plain numbers, which are in mm for
+    thicknesses, g/cm^3 for densities and keV for energies.
+
+    In a csv file, each row is a configuration with the columns ``name``,
+    ``materials``, ``thicknesses``, ``densities`` (where layers are separated by
+    ";" and an empty density is the default density), ``detector``,
+    ``detector_thickness``, ``detector_density``, ``energy_low``, ``energy_high``
+    and ``energy_step``. Only ``name``, ``materials`` and ``thicknesses`` are
+    required, and ``detector_thickness`` if there is a detector.
+
+    Parameters
+    ----------
+    file_path : str or `pathlib.Path`
+        The configuration file, whose format is given by its extension.
+
+    Returns
+    -------
+    configurations : list of dict
+        The configurations, in the form of a json configuration file.
+
+    Raises
+    ------
+    ValueError
+        If a required column or key is missing, a material is not known or a
+        quantity does not have the units of a length, a density or an energy,
+        with the number of the configuration (the row of a csv file, starting
+        from 1).
+    """
+    file_path = Path(file_path)
+    suffix = file_path.suffix.lower()
+    if suffix == ".csv":
+        with open(file_path, newline="") as csv_file:
+            reader = csv.DictReader(csv_file)
+            missing = [
+                this_column
+                for this_column in _CSV_REQUIRED_COLUMNS
+                if this_column not in (reader.fieldnames or [])
+            ]
+            if missing:
+                raise ValueError(f"{file_path} is missing the columns {missing}.")
+            configurations = [
+                _from_csv_row(row, number) for number, row in enumerate(reader, start=1)
+            ]
+    elif suffix == ".json":
+        with open(file_path) as json_file:
+            configurations = list(json.load(json_file))
+    elif suffix in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError as error:
+            raise ImportError("Reading yaml files requires pyyaml.") from error
+        with open(file_path) as yaml_file:
+            configurations = list(yaml.safe_load(yaml_file))
+    else:
+        raise ValueError(f"Unknown configuration file format {suffix}, use csv, json or yaml.")
+    for number, configuration in enumerate(configurations, start=1):
+        _validate_configuration(configuration, number, file_path)
+    return configurations
+
+
+def evaluate_configuration(configuration, energy=None):
+    """
+    Evaluate the response of one configuration.
+
+    Parameters
+    ----------
+    configuration : dict
+        A configuration, see `read_configurations`.
+    energy : `astropy.units.Quantity`, optional
+        The energies, used if the configuration does not include them.
+
+    Returns
+    -------
+    name : str
+        The name of the configuration.
+    energy : `np.ndarray`
+        The energies in keV.
+    response : `np.ndarray`
+        The response at each energy, or the transmission of the layers if the
+        configuration has no detector.
+    """
+    if "energy" in configuration:
+        grid = configuration["energy"]
+        low = _to_quantity(grid["low"], u.keV).value
+        high = _to_quantity(grid["high"], u.keV).value
+        step = _to_quantity(grid["step"], u.keV).value
+        energy = _energy_grid(low, high, step)
+    elif energy is None:
+        raise ValueError(f"No energies given for configuration {configuration['name']}.")
+    layers = [_to_material(layer) for layer in configuration["layers"]]
+    optical_path = layers[0] if len(layers) == 1 else Stack(layers)
+    if configuration.get("detector"):
+        values = Response(optical_path, detector=_to_material(configuration["detector"])).response(
+            energy
+        )
+    else:
+        values = optical_path.transmission(energy)
+    return str(configuration["name"]), energy.to_value(u.keV), np.asarray(values, dtype=float)
+
+
+def evaluate_configurations(configurations, energy=None, n_workers: int = 1):
+    """
+    Evaluate many configurations, in parallel processes if requested.
+
+    Parameters
+    ----------
+    configurations : iterable of dict
+        The configurations, see `read_configurations`.
+    energy : `astropy.units.Quantity`, optional
+        The energies of the configurations which do not include them.
+    n_workers : int, optional
+        The number of processes which evaluate configurations in parallel.
+
+    Yields
+    ------
+    result : tuple
+        The result of `evaluate_configuration` for each configuration, in order.
+    """
+    if n_workers <= 1:
+        for configuration in configurations:
+            yield evaluate_configuration(configuration, energy)
+    else:
+        # energies are sent to the processes as plain arrays, since units do not
+        # compare equal between processes with different unit registries
+        energy_kev = None if energy is None else energy.to_value(u.keV)
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            # keep a bounded number of results in flight so that they are written
+            # as they are done and never all held in memory
+            pending = deque()
+            for configuration in configurations:
+                pending.append(executor.submit(_evaluate, configuration, energy_kev))
+                if len(pending) >= 2 * n_workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+
+def main(argv=None):
+    """Run the roentgen command-line interface."""
+    parser = argparse.ArgumentParser(
+        prog="roentgen", description="Calculate x-ray transmissions and responses."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    batch = subparsers.add_parser(
+        "batch", help="Evaluate a batch of response configurations from a file."
+    )
+    batch.add_argument("configurations", help="The configuration file (csv, json or yaml).")
+    batch.add_argument("output", help="The output file (csv, npz or parquet).")
+    batch.add_argument(
+        "--format", choices=sorted(set(_OUTPUT_FORMATS.values())), help="The output format."
+    )
+    batch.add_argument("--workers", type=int, default=1, help="The number of processes.")
+    batch.add_argument("--energy-low", type=float, default=1.0, help="The lowest energy in keV.")
+    batch.add_argument("--energy-high", type=float, default=50.0, help="The highest energy in keV.")
+    batch.add_argument("--energy-step", type=float, default=0.1, help="The energy step in keV.")
+    serve = subparsers.add_parser("serve", help="Answer queries over HTTP with JSON.")
+    serve.add_argument("--host", default="127.0.0.1", help="The address to listen on.")
+    serve.add_argument("--port", type=int, default=8080, help="The port to listen on.")
+    accuracy = subparsers.add_parser(
+        "accuracy", help="Check the accuracy and speed of the evaluation modes against CXRO."
+    )
+    accuracy.add_argument("--repeat", type=int, default=5, help="The number of timings.")
+    args = parser.parse_args(argv)
+
+    if args.command == "accuracy":
+        from roentgen.absorption.accuracy import compare_evaluation_modes
+
+        comparison = compare_evaluation_modes(repeat=args.repeat)
+        comparison.pprint_all()
+        return 0 if comparison["passed"].all() else 1
+
+    if args.command == "serve":
+        from roentgen.server import serve as run_server
+
+        try:
+            asyncio.run(run_server(args.host, args.port))
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    output_format = args.format or _OUTPUT_FORMATS.get(Path(args.output).suffix.lower())
+    if output_format is None:
+        parser.error("Unknown output format, use --format.")
+    energy = _energy_grid(args.energy_low, args.energy_high, args.energy_step)
+
+    start = time.perf_counter()
+    results = evaluate_configurations(
+        read_configurations(args.configurations), energy=energy, n_workers=args.workers
+    )
+    writer = {"csv": _write_csv, "npz": _write_npz, "parquet": _write_parquet}[output_format]
+    num_configurations, num_values = writer(results, args.output)
+    elapsed = time.perf_counter() - start
+    print(
+        f"Evaluated {num_configurations} configurations ({num_values} values) in {elapsed:.2f} s, "
+        f"{num_configurations / elapsed:.1f} configurations/s, {num_values / elapsed:.0f} values/s",
+        file=sys.stderr,
+    )
+    return 0
+
+
+def _evaluate(configuration, energy_kev):
+    """Evaluate one configuration given energies as a plain array in keV."""
+    energy = None if energy_kev is None else u.Quantity(energy_kev, u.keV)
+    return evaluate_configuration(configuration, energy)
+
+
+def _energy_grid(low, high, step):
+    """Return evenly spaced energies in keV from low to high, both included."""
+    return u.Quantity(np.linspace(low, high, int(round((high - low) / step)) + 1), u.keV)
+
+
+def _to_quantity(value, unit):
+    """Return a quantity from a string with units or a number, which is in the
+    given unit."""
+    if isinstance(value, str):
+        value = u.Quantity(value)
+        if value.unit != u.dimensionless_unscaled:
+            return value.to(unit)
+        value = value.value
+    return u.Quantity(value, unit)
+
+
+def _to_material(layer) -> Material:
+    """Return the material of a layer or detector of a configuration, where a
+    thickness without units is in mm and a density without units in g/cm^3."""
+    density = layer.get("density")
+    if density is not None and density != "":
+        density = _to_quantity(density, u.g / u.cm**3).value
+    else:
+        density = None
+    material = layer["material"]
+    if isinstance(material, dict):
+        material = json.dumps(material, sort_keys=True)
+    return _get_material(material, _to_quantity(layer["thickness"], u.mm).value, density)
+
+
+@lru_cache(maxsize=_MATERIAL_CACHE_SIZE)
+def _get_material(material, thickness_mm, density) -> Material:
+    """Return a material given its name (or a json mapping of names to fractional
+    masses), its thickness in mm and its density in g/cm^3 or None, which is
+    only created once by each process."""
+    if material.startswith("{"):
+        material = json.loads(material)
+    if density is not None:
+        density = u.Quantity(density, u.g / u.cm**3)
+    return Material(material, u.Quantity(thickness_mm, u.mm), density=density)
+
+
+def _validate_configuration(configuration, number, file_path):
+    """Raise a ValueError if a configuration is missing a required key or value."""
+    where = f"Configuration {number} in {file_path}"
+    if not isinstance(configuration, dict):
+        raise ValueError(f"{where} is not a mapping.")
+    if _is_missing(configuration.get("name")):
+        raise ValueError(f"{where} has no name.")
+    layers = configuration.get("layers")
+    if not layers:
+        raise ValueError(f"{where} has no layers.")
+    parts = [("layer", this_layer) for this_layer in layers]
+    if configuration.get("detector"):
+        parts.append(("detector", configuration["detector"]))
+    for part_name, part in parts:
+        for key in ("material", "thickness"):
+            if not isinstance(part, dict) or _is_missing(part.get(key)):
+                raise ValueError(f"{where} has a {part_name} without a {key}.")
+        material = part["material"]
+        names = list(material.keys()) if isinstance(material, dict) else [material]
+        for this_name in names:
+            if not isinstance(this_name, str) or not (
+                is_an_element(this_name) or is_in_known_compounds(this_name)
+            ):
+                raise ValueError(f"{where} has an unknown material {this_name}.")
+        _check_quantity(part["thickness"], u.mm, "length", f"{where} has a {part_name} thickness")
+        if not _is_missing(part.get("density")):
+            _check_quantity(
+                part["density"], u.g / u.cm**3, "density", f"{where} has a {part_name} density"
+            )
+    if "energy" in configuration:
+        if not isinstance(configuration["energy"], dict):
+            raise ValueError(f"{where} has an energy grid which is not a mapping.")
+        for key in ("low", "high", "step"):
+            if _is_missing(configuration["energy"].get(key)):
+                raise ValueError(f"{where} has an energy grid without {key}.")
+            _check_quantity(
+                configuration["energy"][key], u.keV, "energy", f"{where} has an energy {key}"
+            )
+
+
+def _check_quantity(value, unit, kind, message):
+    """Raise a ValueError, starting with the message, if a value is not a single
+    quantity which can be converted to the unit of the kind of quantity."""
+    try:
+        quantity = _to_quantity(value, unit)
+    except (ValueError, TypeError, u.UnitsError) as error:
+        raise ValueError(f"{message} {value!r} which is not a {kind}.") from error
+    if not quantity.isscalar:
+        raise ValueError(f"{message} {value!r} which is not a single value.")
+
+
+def _is_missing(value) -> bool:
+    return value is None or (isinstance(value, str) and value.strip() == "")
+
+
+def _from_csv_row(row, number) -> dict:
+    """Return a configuration from a row of a csv configuration file."""
+    materials = row["materials"].split(_LAYER_SEPARATOR)
+    thicknesses = row["thicknesses"].split(_LAYER_SEPARATOR)
+    densities = (row.get("densities") or "").split(_LAYER_SEPARATOR)
+    if len(thicknesses) != len(materials):
+        raise ValueError(
+            f"Configuration {number} ({row['name']}) needs one thickness per material."
+        )
+    densities = densities + [""] * (len(materials) - len(densities))
+    configuration = {
+        "name": row["name"],
+        "layers": [
+            {"material": material.strip(), "thickness": thickness, "density": density}
+            for material, thickness, density in zip(materials, thicknesses, densities)
+        ],
+    }
+    if row.get("detector"):
+        configuration["detector"] = {
+            "material": row["detector"].strip(),
+            "thickness": row.get("detector_thickness"),
+            "density": row.get("detector_density"),
+        }
+    # any energy column gives a grid, so that a grid without energy_low is
+    # rejected instead of silently replaced by the default energies
+    energy = {key: row.get(f"energy_{key}") or None for key in ("low", "high", "step")}
+    if any(value is not None for value in energy.values()):
+        configuration["energy"] = energy
+    return configuration
+
+
+def _write_csv(results, file_path):
+    """Write results to a csv file with one row per energy, row by row."""
+    num_configurations, num_values = 0, 0
+    with open(file_path, "w", newline="") as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(["name", "energy", "response"])
+        for name, energy, values in results:
+            writer.writerows(zip([name] * len(energy), energy, values))
+            num_configurations += 1
+            num_values += len(values)
+    return num_configurations, num_values
+
+
+def _write_npz(results, file_path):
+    """Write results to a npz file with the arrays energy_i and response_i of
+    each configuration i and the array of names, configuration by configuration."""
+    num_configurations, num_values = 0, 0
+    names = []
+    with zipfile.ZipFile(file_path, "w", compression=zipfile.ZIP_DEFLATED) as npz_file:
+        for name, energy, values in results:
+            for key, array in (
+                (f"energy_{num_configurations}", energy),
+                (f"response_{num_configurations}", values),
+            ):
+                with npz_file.open(f"{key}.npy", "w", force_zip64=True) as npy_file:
+                    np.lib.format.write_array(npy_file, array)
+            names.append(name)
+            num_configurations += 1
+            num_values += len(values)
+        with npz_file.open("names.npy", "w") as npy_file:
+            np.lib.format.write_array(npy_file, np.array(names, dtype=str))
+    return num_configurations, num_values
+
+
+def _write_parquet(results, file_path):
+    """Write results to a parquet file with one row group per configuration."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as error:
+        raise ImportError("Writing parquet files requires pyarrow.") from error
+    schema = pa.schema(
+        [("name", pa.string()), ("energy", pa.float64()), ("response", pa.float64())]
+    )
+    num_configurations, num_values = 0, 0
+    with pq.ParquetWriter(file_path, schema) as writer:
+        for name, energy, values in results:
+            writer.write_table(
+                pa.table(
+                    {"name": [name] * len(energy), "energy": energy, "response": values},
+                    schema=schema,
+                )
+            )
+            num_configurations += 1
+            num_values += len(values)
+    return num_configurations, num_values
+
+
+if __name__ == "__main__":
+    sys.exit(main())
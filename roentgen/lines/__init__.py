@@ -1 +1,3 @@
 from .lines import *
+from .identify import *
+from .spectrum import *
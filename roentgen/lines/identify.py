@@ -0,0 +1,203 @@
+"""A module to identify measured peaks with known emission lines."""
+
+from functools import lru_cache
+
+import numpy as np
+
+import astropy.units as u
+from astropy.table import QTable
+
+from roentgen.lines import lines
+
+__all__ = ["identify_peaks"]
+
+_SOURCES = ("xrf", "nuclide")
+
+
+def identify_peaks(
+    peak_energy,
+    uncertainty,
+    sources=_SOURCES,
+    tolerance: float = 3.0,
+    max_candidates: int = 5,
+    min_relative_intensity: float = 0.0,
+    intensity_weight: float = 0.5,
+):
+    """
+    Find the emission lines which best match measured peak energies.
+
+    Candidate lines are the atomic emission lines in `roentgen.lines.emission_lines`
+    and the emission lines of all radionuclides in `roentgen.nuclides`. All lines
+    are kept in one array sorted by energy so that the candidates of every peak
+    are found with a binary search. Each candidate is given the score
+
+    ``exp(-0.5 * (delta / uncertainty)**2) * relative_intensity**intensity_weight``
+
+    where ``delta`` is the difference between the peak and line energies and
+    ``relative_intensity`` is the intensity of the line relative to the
+    strongest line of its element or nuclide.
+
+    Parameters
+    ----------
+    peak_energy : `astropy.units.Quantity` or list of `astropy.units.Quantity`
+        The measured peak energies, or a list with the peak energies of each
+        spectrum of a batch. For a batch, the result has an additional
+        ``spectrum`` column and peaks are numbered within each spectrum.
+    uncertainty : `astropy.units.Quantity`
+        The uncertainty (or width) of each peak energy, or a single value for all
+        peaks. For a batch, a single value or a list with one array per spectrum.
+    sources : tuple of str, optional
+        The line lists to search, "xrf" for atomic emission lines and "nuclide"
+        for radionuclide emission lines.
+    tolerance : float, optional
+        Only lines within this many uncertainties of a peak are candidates.
+    max_candidates : int, optional
+        The maximum number of candidates returned per peak.
+    min_relative_intensity : float, optional
+        Ignore lines weaker than this fraction of the strongest line of their
+        element or nuclide.
+    intensity_weight : float, optional
+        The exponent of the relative intensity in the score.
+
+    Returns
+    -------
+    candidates : `astropy.table.QTable`
+        One row per candidate sorted by peak and by decreasing score. The
+        ``label`` column holds the element or the radionuclide, and the
+        ``transition`` column holds the transition of atomic lines or the
+        origin of radionuclide lines.
+
+    Examples
+    --------
+    >>> import astropy.units as u
+    >>> from roentgen.lines import identify_peaks
+    >>> candidates = identify_peaks([6.40, 8.05] * u.keV, 20 * u.eV, sources=("xrf",))
+    >>> [str(label) for label in candidates[candidates["rank"] == 0]["label"]]
+    ['Fe', 'Cu']
+    """
+    batch = isinstance(peak_energy, (list, tuple))
+    if batch:
+        num_peaks = [np.size(this_energy) for this_energy in peak_energy]
+        peak_kev = _concatenate_kev(peak_energy)
+        if not (isinstance(uncertainty, u.Quantity) and uncertainty.isscalar):
+            uncertainty = u.Quantity(_concatenate_kev(uncertainty), "keV")
+    else:
+        peak_kev = np.atleast_1d(peak_energy.to_value(u.keV, equivalencies=u.spectral()))
+    sigma_kev = np.broadcast_to(np.atleast_1d(uncertainty.to_value(u.keV)), peak_kev.shape)
+    if np.any(sigma_kev <= 0):
+        raise ValueError("uncertainty must be positive.")
+    unknown = set(sources) - set(_SOURCES)
+    if unknown:
+        raise ValueError(f"Unknown sources {unknown}, must be in {_SOURCES}.")
+
+    catalog = _get_line_catalog(tuple(sorted(sources)), float(min_relative_intensity))
+    line_energy = catalog["energy"]
+    start = np.searchsorted(line_energy, peak_kev - tolerance * sigma_kev, side="left")
+    stop = np.searchsorted(line_energy, peak_kev + tolerance * sigma_kev, side="right")
+    counts = stop - start
+
+    # gather the candidates of all peaks into flat arrays
+    peak = np.repeat(np.arange(len(peak_kev)), counts)
+    line = np.repeat(start - (np.cumsum(counts) - counts), counts) + np.arange(counts.sum())
+    delta = peak_kev[peak] - line_energy[line]
+    score = np.exp(-0.5 * (delta / sigma_kev[peak]) ** 2) * catalog["relative_intensity"][
+        line
+    ] ** float(intensity_weight)
+
+    # rank the candidates of each peak by decreasing score
+    order = np.lexsort((-score, peak))
+    peak, line, delta, score = peak[order], line[order], delta[order], score[order]
+    rank = np.arange(len(peak)) - np.repeat(np.cumsum(counts) - counts, counts)
+    keep = rank < max_candidates
+    peak, line, delta, score, rank = peak[keep], line[keep], delta[keep], score[keep], rank[keep]
+
+    result = QTable()
+    if batch:
+        spectrum = np.repeat(np.arange(len(num_peaks)), num_peaks)
+        first_peak = np.cumsum(num_peaks) - num_peaks
+        result["spectrum"] = spectrum[peak]
+        result["peak"] = peak - first_peak[spectrum[peak]]
+    else:
+        result["peak"] = peak
+    result["rank"] = rank
+    result["peak energy"] = u.Quantity(peak_kev[peak], "keV")
+    result["energy"] = u.Quantity(line_energy[line], "keV")
+    result["delta"] = u.Quantity(delta, "keV")
+    result["source"] = catalog["source"][line]
+    result["label"] = catalog["label"][line]
+    result["transition"] = catalog["transition"][line]
+    result["intensity"] = catalog["intensity"][line]
+    result["score"] = score
+    return result
+
+
+def _concatenate_kev(quantities):
+    """Concatenate a list of energy quantities into one plain array in keV."""
+    return np.concatenate(
+        [
+            np.atleast_1d(this_quantity.to_value(u.keV, equivalencies=u.spectral()))
+            for this_quantity in quantities
+        ]
+    )
+
+
+@lru_cache
+def _get_line_catalog(sources, min_relative_intensity):
+    """Return the emission lines of the given sources as plain arrays sorted
+    by energy."""
+    columns = {
+        "energy": [],
+        "intensity": [],
+        "relative_intensity": [],
+        "source": [],
+        "label": [],
+        "transition": [],
+    }
+    for source in sources:
+        if source == "xrf":
+            this_catalog = _get_xrf_lines()
+        else:
+            this_catalog = _get_nuclide_lines()
+        for key, value in this_catalog.items():
+            columns[key].append(value)
+        columns["source"].append(np.full(len(this_catalog["energy"]), source))
+    columns = {key: np.concatenate(value) for key, value in columns.items()}
+    keep = columns["relative_intensity"] >= min_relative_intensity
+    order = np.argsort(columns["energy"][keep], kind="stable")
+    return {key: value[keep][order] for key, value in columns.items()}
+
+
+def _relative_intensity(intensity, group):
+    """Return the intensity relative to the strongest line of each group."""
+    _, inverse = np.unique(group, return_inverse=True)
+    strongest = np.zeros(inverse.max() + 1 if len(inverse) else 0)
+    np.maximum.at(strongest, inverse, intensity)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(strongest[inverse] > 0, intensity / strongest[inverse], 0.0)
+
+
+def _get_xrf_lines():
+    """Return the atomic emission lines as plain arrays."""
+    intensity = lines._line_intensity
+    return {
+        "energy": lines._line_energy,
+        "intensity": intensity,
+        "relative_intensity": _relative_intensity(intensity, lines._line_z),
+        "label": np.asarray(lines.emission_lines["symbol"], dtype=str),
+        "transition": np.asarray(lines.emission_lines["transition"], dtype=str),
+    }
+
+
+def _get_nuclide_lines():
+    """Return the emission lines of all radionuclides as plain arrays."""
+    # imported here to avoid loading the radionuclide data unless needed
+    from roentgen.nuclides.search import _get_emission_index
+
+    index = _get_emission_index()
+    return {
+        "energy": index["energy"],
+        "intensity": index["intensity"],
+        "relative_intensity": _relative_intensity(index["intensity"], index["nuclide"]),
+        "label": index["nuclide"],
+        "transition": index["origin"],
+    }
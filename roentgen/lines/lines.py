@@ -1,5 +1,7 @@
 """A module to access atomic line emission, binding energies, and transmission edges."""
 
+from functools import lru_cache
+
 import numpy as np
 
 import astropy.units as u
@@ -7,9 +9,24 @@ from astropy.io import ascii
 from astropy.table import QTable
 
 import roentgen
-from roentgen.util import get_atomic_number, get_element_symbol
+from roentgen.util import (
+    get_atomic_number,
+    get_compound_index,
+    get_element_symbol,
+    is_an_element,
+)
+from roentgen.util.profiling import _section
 
-__all__ = ["get_lines", "get_edges", "emission_lines"]
+__all__ = [
+    "get_lines",
+    "get_line_indices",
+    "get_edges",
+    "get_material_edges",
+    "get_elements_with_edges",
+    "get_edge_indices",
+    "emission_lines",
+    "absorption_edges",
+]
 
 emission_lines = QTable(
     ascii.read(
@@ -40,6 +57,21 @@ emission_lines.meta = {
     "url": "https://xdb.lbl.gov/Section1/Table_1-3.pdf",
 }
 
+# plain sorted columns of the emission lines for fast window queries
+_line_energy = np.asarray(emission_lines["energy"].to_value("keV"), dtype=float)
+_line_z = np.asarray(emission_lines["z"], dtype=int)
+_line_intensity = np.asarray(emission_lines["intensity"], dtype=float)
+# table indices of the lines sorted by energy, and sorted by element then energy
+_energy_order = np.argsort(_line_energy, kind="stable")
+_z_order = np.lexsort((_line_energy, _line_z))
+# line energies are far below this value (in keV) so that z * _Z_KEY_SCALE + energy
+# sorts lines by element and then by energy
+_Z_KEY_SCALE = 1000.0
+_search_keys = np.concatenate(
+    [_line_energy[_energy_order], _line_z[_z_order] * _Z_KEY_SCALE + _line_energy[_z_order]]
+)
+_search_order = np.concatenate([_energy_order, _z_order])
+
 binding_energies = QTable(
     ascii.read(
         roentgen._data_directory / "electron_binding_energies.csv",
@@ -58,6 +90,54 @@ binding_energies.meta = {
     "url": "https://xdb.lbl.gov/Section1/Table_1-1.pdf",
 }
 
+# dense array of the edge energies in eV, one row per element (z - 1) and one
+# column per shell, nan where there is no edge
+_edge_names = np.array(
+    [this_colname.split(" ")[0] for this_colname in binding_energies.colnames[2:]]
+)
+_edge_energy = np.array(
+    [
+        np.ma.filled(
+            np.ma.masked_array(
+                binding_energies[this_colname].to_value("eV"),
+                mask=getattr(binding_energies[this_colname], "mask", False),
+            ),
+            np.nan,
+        )
+        for this_colname in binding_energies.colnames[2:]
+    ]
+).T
+_edge_energy[~(_edge_energy > 0)] = np.nan
+# all edges of all elements sorted by energy
+_edge_z, _edge_shell = np.nonzero(np.isfinite(_edge_energy))
+_edge_order = np.argsort(_edge_energy[_edge_z, _edge_shell], kind="stable")
+_edge_z, _edge_shell = _edge_z[_edge_order] + 1, _edge_shell[_edge_order]
+_sorted_edge_energy = _edge_energy[_edge_z - 1, _edge_shell]
+absorption_edges = QTable(
+    [
+        u.Quantity(_sorted_edge_energy, "eV"),
+        _edge_z,
+        np.asarray(roentgen.elements["symbol"])[_edge_z - 1],
+        _edge_names[_edge_shell],
+    ],
+    names=("energy", "z", "symbol", "edge name"),
+    meta=binding_energies.meta,
+)
+# edge energies are far below this value (in eV) so that z * _EDGE_KEY_SCALE + energy
+# sorts edges by element and then by energy
+_EDGE_KEY_SCALE = 1e6
+_edge_z_order = np.lexsort((_sorted_edge_energy, _edge_z))
+_edge_search_keys = np.concatenate(
+    [
+        _sorted_edge_energy,
+        _edge_z[_edge_z_order] * _EDGE_KEY_SCALE + _sorted_edge_energy[_edge_z_order],
+    ]
+)
+_edge_search_order = np.concatenate([np.arange(len(_edge_z)), _edge_z_order])
+
+# the relative tolerance to match edges in the attenuation data to binding energies
+_EDGE_MATCH_RTOL = 0.005
+
 
 @u.quantity_input(energy_low=u.keV, energy_high=u.keV, equivalencies=u.spectral())
 def get_lines(energy_low, energy_high, element=None, min_intensity: int = 0):
@@ -84,20 +164,110 @@ def get_lines(energy_low, energy_high, element=None, min_intensity: int = 0):
     """
     result = QTable()  # this is the default result
 
-    energies = emission_lines["energy"]
-    bool_array = (energies < energy_high) * (energies > energy_low)
-    if element is not None:
-        z = get_atomic_number(element)
-        bool_array *= emission_lines["z"] == z
-    if min_intensity > 0:
-        bool_array *= emission_lines["intensity"] >= min_intensity
-
-    if np.any(bool_array):
-        result = emission_lines[bool_array]
+    index = np.sort(get_line_indices(energy_low, energy_high, element, min_intensity)[0])
+    if len(index) > 0:
+        with _section("lines.build_table", len(index)):
+            # indexing with an array returns a copy, so the result can be changed
+            # without changing emission_lines
+            result = emission_lines[index]
 
     return result
 
 
+def get_line_indices(energy_low, energy_high, element=None, min_intensity=0):
+    """
+    Retrieve the emission lines in many energy ranges at once.
+
+    Each range is answered with a binary search in sorted arrays of the line
+    energies instead of a scan of the emission line table.
+
+    Parameters
+    ----------
+    energy_low : `astropy.units.Quantity`
+        The low end of each energy range
+
+    energy_high : `astropy.units.Quantity`
+        The high end of each energy range
+
+    element : str or list of str, optional
+        Select only lines from a specific element, either one element for all
+        ranges or one element (or None) per range
+
+    min_intensity : int or array-like, optional
+        Select only lines above or equal to a given intensity, either one
+        value for all ranges or one value per range
+
+    Returns
+    -------
+    indices : list of `numpy.ndarray`
+        For each energy range, the indices of the lines in `emission_lines`
+        in order of increasing energy. Use ``emission_lines[indices[i]]`` to
+        retrieve the lines as a table.
+
+    Examples
+    --------
+    >>> import astropy.units as u
+    >>> from roentgen.lines import emission_lines, get_line_indices
+    >>> indices = get_line_indices([6.3, 8.0] * u.keV, [6.5, 8.1] * u.keV, element=["Fe", "Cu"])
+    >>> [len(index) for index in indices]
+    [2, 2]
+    >>> copper_lines = emission_lines[indices[1]]
+    """
+    with _section("lines.units", np.size(energy_low) + np.size(energy_high)):
+        energy_low = np.atleast_1d(
+            u.Quantity(energy_low).to_value(u.keV, equivalencies=u.spectral())
+        )
+        energy_high = np.atleast_1d(
+            u.Quantity(energy_high).to_value(u.keV, equivalencies=u.spectral())
+        )
+    energy_low, energy_high = np.broadcast_arrays(energy_low, energy_high)
+    num_windows = len(energy_low)
+    if element is None or isinstance(element, str):
+        element = [element] * num_windows
+    elif len(element) != num_windows:
+        raise ValueError("element must be a single element or one element per energy range.")
+    atomic_numbers = {this_element: 0 for this_element in set(element) if this_element is None}
+    atomic_numbers.update(
+        {
+            this_element: get_atomic_number(this_element)
+            for this_element in set(element)
+            if this_element is not None
+        }
+    )
+    z = np.array([atomic_numbers[this_element] for this_element in element], dtype=int)
+    min_intensity = np.broadcast_to(np.asarray(min_intensity, dtype=float), (num_windows,))
+
+    # windows for an element are searched in the second half of the search keys,
+    # with the energies clipped to the key range of the element so that they do
+    # not reach into the lines of the neighbouring elements
+    offset = np.where(z > 0, z * _Z_KEY_SCALE, -np.inf)
+    low_key = np.where(z > 0, offset + np.clip(energy_low, 0, _Z_KEY_SCALE), energy_low)
+    high_key = np.where(z > 0, offset + np.clip(energy_high, 0, _Z_KEY_SCALE), energy_high)
+    half = len(_line_energy)
+    start = np.where(
+        z > 0,
+        np.searchsorted(_search_keys[half:], low_key, side="right") + half,
+        np.searchsorted(_search_keys[:half], low_key, side="right"),
+    )
+    stop = np.where(
+        z > 0,
+        np.searchsorted(_search_keys[half:], high_key, side="left") + half,
+        np.searchsorted(_search_keys[:half], high_key, side="left"),
+    )
+    counts = np.maximum(stop - start, 0)
+
+    # gather all matching lines of all windows into one flat array
+    window = np.repeat(np.arange(num_windows), counts)
+    first = np.cumsum(counts) - counts
+    position = np.repeat(start - first, counts) + np.arange(counts.sum())
+    flat = _search_order[position]
+    if np.any(min_intensity > 0):
+        keep = (min_intensity[window] <= 0) | (_line_intensity[flat] >= min_intensity[window])
+        flat = flat[keep]
+        counts = np.bincount(window[keep], minlength=num_windows)
+    return np.split(flat, np.cumsum(counts)[:-1])
+
+
 def get_edges(element):
     """
     Retrieve the absorption edges for a given element.
@@ -115,16 +285,197 @@ def get_edges(element):
     if z > 92:
         raise ValueError("No data for elements beyond Uranium, z = 92.")
 
-    energies = []
-    columns = []
-    for this_colname, this_element in zip(binding_energies.colnames, binding_energies.loc[z]):
-        if isinstance(this_element, u.Quantity) and (this_element.value > 0):
-            columns.append(this_colname.split(" ")[0])
-            energies.append(this_element)
-    result = QTable(
-        [energies, columns],
-        names=("energy", "edge name"),
-        meta={"element": f"{element} z={z}"},
-    )
+    energies = _edge_energy[z - 1]
+    valid = np.isfinite(energies)
+    with _section("lines.build_table", np.count_nonzero(valid)):
+        result = QTable(
+            [u.Quantity(energies[valid], "eV"), list(_edge_names[valid])],
+            names=("energy", "edge name"),
+            meta={"element": f"{element} z={z}"},
+        )
 
     return result
+
+
+@u.quantity_input(energy_low=u.keV, energy_high=u.keV)
+def get_material_edges(material, energy_low=None, energy_high=None):
+    """
+    Retrieve the absorption edges of all elements in a material.
+
+    The elements of a compound are taken from the ``elements`` column of
+    `roentgen.compounds`.
+
+    Parameters
+    ----------
+    material : str, dict or `roentgen.absorption.Material`
+        An element, a compound, a dictionary of elements and compounds with
+        fractional masses or a Material.
+
+    energy_low : `astropy.units.Quantity`, optional
+        Select only edges at or above this energy
+
+    energy_high : `astropy.units.Quantity`, optional
+        Select only edges at or below this energy
+
+    Returns
+    -------
+    edge_list : `astropy.table.QTable`
+        The edges sorted by energy.
+
+    Examples
+    --------
+    >>> import astropy.units as u
+    >>> from roentgen.lines import get_material_edges
+    >>> edges = get_material_edges("cdte", 20 * u.keV, 40 * u.keV)
+    >>> [str(symbol) for symbol in edges["symbol"]]
+    ['Cd', 'Te']
+    """
+    index = get_edge_indices(energy_low, energy_high, [material])[0]
+    with _section("lines.build_table", len(index)):
+        # indexing with an array returns a copy, so the result can be changed
+        # without changing absorption_edges
+        return absorption_edges[index]
+
+
+@u.quantity_input(energy_low=u.keV, energy_high=u.keV)
+def get_elements_with_edges(energy_low, energy_high):
+    """
+    Retrieve all elements which have an absorption edge in an energy range.
+
+    Parameters
+    ----------
+    energy_low : `astropy.units.Quantity`
+        The low end of the energy range (inclusive)
+
+    energy_high : `astropy.units.Quantity`
+        The high end of the energy range (inclusive)
+
+    Returns
+    -------
+    edge_list : `astropy.table.QTable`
+        The edges in the energy range sorted by energy.
+    """
+    index = get_edge_indices(energy_low, energy_high)[0]
+    with _section("lines.build_table", len(index)):
+        return absorption_edges[index]
+
+
+def get_edge_indices(energy_low=None, energy_high=None, material=None):
+    """
+    Retrieve the absorption edges in many energy ranges at once.
+
+    Each range is answered with a binary search in sorted arrays of the edge
+    energies, the same way as `get_line_indices`, and no table is built.
+
+    Parameters
+    ----------
+    energy_low : `astropy.units.Quantity`, optional
+        The low end of each energy range (inclusive), no limit by default
+
+    energy_high : `astropy.units.Quantity`, optional
+        The high end of each energy range (inclusive), no limit by default
+
+    material : str, dict, `roentgen.absorption.Material` or list, optional
+        Select only edges of the elements in a material, see
+        `get_material_edges`, either one material for all ranges or a list
+        of one material (or None) per range
+
+    Returns
+    -------
+    indices : list of `numpy.ndarray`
+        For each energy range, the indices of the edges in `absorption_edges`
+        in order of increasing energy. Use ``absorption_edges[indices[i]]`` to
+        retrieve the edges as a table.
+
+    Examples
+    --------
+    >>> import astropy.units as u
+    >>> from roentgen.lines import absorption_edges, get_edge_indices
+    >>> indices = get_edge_indices([20, 6] * u.keV, [40, 9] * u.keV, ["cdte", "Fe"])
+    >>> [absorption_edges["symbol"][index].tolist() for index in indices]
+    [['Cd', 'Te'], ['Fe']]
+    """
+    with _section("lines.units", np.size(energy_low) + np.size(energy_high)):
+        energy_low = np.atleast_1d(
+            -np.inf if energy_low is None else u.Quantity(energy_low).to_value(u.eV)
+        )
+        energy_high = np.atleast_1d(
+            np.inf if energy_high is None else u.Quantity(energy_high).to_value(u.eV)
+        )
+    energy_low, energy_high = np.broadcast_arrays(energy_low, energy_high)
+    if isinstance(material, (list, tuple)):
+        if len(energy_low) == 1:
+            energy_low = np.repeat(energy_low, len(material))
+            energy_high = np.repeat(energy_high, len(material))
+        elif len(material) != len(energy_low):
+            raise ValueError("material must be a single material or one material per energy range.")
+    else:
+        material = [material] * len(energy_low)
+    num_windows = len(energy_low)
+
+    # each window is searched once for each element of its material, or once
+    # in all edges if it has no material
+    atomic_numbers = [
+        np.zeros(1, dtype=int)
+        if this_material is None
+        else _get_material_atomic_numbers(this_material)
+        for this_material in material
+    ]
+    pair_window = np.repeat(np.arange(num_windows), [len(z) for z in atomic_numbers])
+    z = np.concatenate(atomic_numbers)
+    low, high = energy_low[pair_window], energy_high[pair_window]
+
+    # searches for an element are made in the second half of the search keys,
+    # with the energies clipped to the key range of the element so that they do
+    # not reach into the edges of the neighbouring elements
+    offset = z * _EDGE_KEY_SCALE
+    low_key = np.where(z > 0, offset + np.clip(low, 0, _EDGE_KEY_SCALE), low)
+    high_key = np.where(z > 0, offset + np.clip(high, 0, _EDGE_KEY_SCALE), high)
+    half = len(_edge_z)
+    start = np.where(
+        z > 0,
+        np.searchsorted(_edge_search_keys[half:], low_key, side="left") + half,
+        np.searchsorted(_edge_search_keys[:half], low_key, side="left"),
+    )
+    stop = np.where(
+        z > 0,
+        np.searchsorted(_edge_search_keys[half:], high_key, side="right") + half,
+        np.searchsorted(_edge_search_keys[:half], high_key, side="right"),
+    )
+    counts = np.maximum(stop - start, 0)
+
+    # gather all matching edges of all searches into one flat array, and sort
+    # the edges of the elements of each window by energy, which is the order of
+    # absorption_edges
+    window = np.repeat(pair_window, counts)
+    first = np.cumsum(counts) - counts
+    position = np.repeat(start - first, counts) + np.arange(counts.sum())
+    flat = _edge_search_order[position]
+    flat = flat[np.lexsort((flat, window))]
+    counts = np.bincount(window, minlength=num_windows)
+    return np.split(flat, np.cumsum(counts)[:-1])
+
+
+def _get_material_atomic_numbers(material):
+    """Return the unique atomic numbers of the elements of an element, a
+    compound, a dictionary of elements and compounds or a Material."""
+    if hasattr(material, "list_names"):
+        names = material.list_names
+    elif isinstance(material, dict):
+        names = list(material.keys())
+    else:
+        names = [material]
+    return np.unique(
+        np.concatenate([_get_constituent_atomic_numbers(this_name) for this_name in names])
+    )
+
+
+@lru_cache
+def _get_constituent_atomic_numbers(material):
+    """Return the atomic numbers of the elements of an element or compound,
+    the elements of a compound are given in the ``elements`` column of
+    `roentgen.compounds`."""
+    if is_an_element(material):
+        return np.array([get_atomic_number(material)])
+    symbols = str(roentgen.compounds[get_compound_index(material)]["elements"]).split()
+    return np.array(sorted(get_atomic_number(this_symbol) for this_symbol in symbols), dtype=int)
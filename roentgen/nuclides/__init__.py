@@ -1 +1,4 @@
 from .nuclides import *
+from .search import *
+from .decay import *
+from .sources import *
@@ -0,0 +1,317 @@
+"""A module to calculate the activities and emissions of radionuclide decay chains."""
+
+import re
+
+import numpy as np
+from scipy.linalg import solve_triangular
+
+import astropy.units as u
+from astropy.table import QTable
+
+from roentgen.nuclides.nuclides import (
+    _get_lara_store,
+    _nuclide_index,
+    _parse_nuclide,
+    _to_bool,
+    nuclides_list,
+)
+
+__all__ = ["DecayChain"]
+
+# one daughter in the decay_chain column of nuclides_list, (mode;symbol;mass_number;ratio)
+_DAUGHTER_PATTERN = re.compile(r"\(([^;()]*);([A-Za-z]+);(\d+);([^;()]+)\)")
+# decay constants closer than this (relative) are separated to keep the solution finite
+_MIN_RELATIVE_SEPARATION = 1e-9
+
+
+class DecayChain(object):
+    """
+    An object which calculates the activity of every member of the decay
+    chains of one or more radionuclides and the emission rate of all their
+    lines as a function of time.
+
+    The chains are built from the ``decay_chain`` column of `nuclides_list`.
+    As in that column, all decays lead to the ground state of the daughter,
+    including isomeric transitions (I.T.) of metastable nuclides. Daughters
+    which are not in `nuclides_list` (e.g. stable nuclides) end the chain.
+
+    The daughters of the LARA data do not say whether a decay feeds a
+    metastable state, so a chain never passes through an isomer even if it
+    is in `nuclides_list`: Mo-99 decays to Tc-99 and not to Tc-99m, and
+    Cs-137 to Ba-137 and not to Ba-137m. The gamma rays of the isomer (e.g.
+    140.5 keV of Tc-99m, 661.7 keV of Ba-137m) are instead lines of the
+    parent, which are emitted at the activity of the parent without the delay
+    of the half-life of the isomer. An isomer can be followed by giving it as
+    a parent.
+
+    The Bateman equations of all chains are solved at once from the eigenvectors
+    of the triangular matrix of decay constants and branching ratios, so that
+    the activities at any number of times only require one exponential per
+    time and nuclide and one matrix product.
+
+    Parameters
+    ----------
+    parents : `Nuclide`, str, tuple or list of those
+        The radionuclides present at time zero, given as `Nuclide` objects, as
+        names (e.g. "Am-241") or as (symbol, mass_number, metastable) tuples.
+    initial_activity : `astropy.units.Quantity`, optional
+        The activity of each parent at time zero, one value for all or one
+        value per parent.
+
+    Attributes
+    ----------
+    nuclides : list of str
+        The names of all members of the chains, parents before daughters.
+    decay_constant : `astropy.units.Quantity`
+        The decay constant of each member.
+    branching_ratio : `np.ndarray`
+        The fraction of decays of member ``j`` which lead to member ``i``, at
+        ``[i, j]``.
+    lines : `astropy.table.QTable`
+        The emission lines of all members, with the member emitting each line
+        in the ``nuclide`` column and its intensity per decay (in percent).
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> import astropy.units as u
+    >>> from roentgen.nuclides import DecayChain
+    >>> chain = DecayChain("Mo-99", 1 * u.MBq)
+    >>> chain.nuclides
+    ['Mo-99', 'Tc-99']
+    >>> activity = chain.activity(np.linspace(0, 10, 5) * u.day)
+    >>> activity.shape
+    (5, 2)
+    """
+
+    @u.quantity_input(initial_activity=u.Bq)
+    def __init__(self, parents, initial_activity=1 * u.Bq):
+        if isinstance(parents, (str, tuple)) or hasattr(parents, "mass_number"):
+            parents = [parents]
+        parent_keys = [_get_key(this_parent) for this_parent in parents]
+        for this_key in parent_keys:
+            if this_key not in _nuclide_index:
+                raise KeyError(f"No nuclide data found for {this_key}")
+        initial_activity = np.broadcast_to(
+            np.atleast_1d(initial_activity.to_value(u.Bq)), (len(parent_keys),)
+        )
+        keys, daughters = _build_graph(parent_keys)
+        rows = [_nuclide_index[this_key] for this_key in keys]
+        half_life = nuclides_list["half_life"][rows].to_value(u.s)
+        decay_constant = np.log(2) / half_life
+        position = {this_key: i for i, this_key in enumerate(keys)}
+        branching_ratio = np.zeros((len(keys), len(keys)))
+        for this_key, this_daughters in daughters.items():
+            for daughter_key, ratio in this_daughters:
+                branching_ratio[position[daughter_key], position[this_key]] += ratio
+
+        self.parents = [_name(this_key) for this_key in parent_keys]
+        self.initial_activity = u.Quantity(initial_activity, u.Bq)
+        self.nuclides = [_name(this_key) for this_key in keys]
+        self.decay_constant = u.Quantity(decay_constant, 1 / u.s)
+        self.branching_ratio = branching_ratio
+        self.lines, self._line_nuclide = _get_chain_lines(rows, self.nuclides)
+
+        # initial number of atoms of each member
+        initial_atoms = np.zeros(len(keys))
+        for this_key, this_activity in zip(parent_keys, initial_activity):
+            initial_atoms[position[this_key]] += this_activity / decay_constant[position[this_key]]
+        self._lambda = _separate(decay_constant)
+        self._eigenvectors = _eigenvectors(self._lambda, branching_ratio)
+        self._coefficients = solve_triangular(
+            self._eigenvectors, initial_atoms, lower=True, unit_diagonal=True
+        )
+
+    def __repr__(self) -> str:
+        """Returns a developer-relevant representation."""
+        # at this point, no reason for this to be different than __str__
+        return self.__str__()
+
+    def __str__(self) -> str:
+        """Returns a human-readable user-focused representation."""
+        txt = f"DecayChain({self.parents}, {len(self.nuclides)} nuclides)"
+        return txt
+
+    @u.quantity_input(time=u.s)
+    def atoms(self, time):
+        """Return the number of atoms of each member at the given times.
+
+        Parameters
+        ----------
+        time : `astropy.units.Quantity`
+            The times since time zero.
+
+        Returns
+        -------
+        atoms : `np.ndarray`
+            An array with the shape of ``time`` followed by one value per member.
+        """
+        time_s = time.to_value(u.s)
+        decayed = np.exp(-np.multiply.outer(time_s, self._lambda))
+        return (decayed * self._coefficients) @ self._eigenvectors.T
+
+    @u.quantity_input(time=u.s)
+    def activity(self, time):
+        """Return the activity of each member at the given times.
+
+        Parameters
+        ----------
+        time : `astropy.units.Quantity`
+            The times since time zero.
+
+        Returns
+        -------
+        activity : `astropy.units.Quantity`
+            An array with the shape of ``time`` followed by one value per member.
+        """
+        activity = self.atoms(time) * self.decay_constant.to_value(1 / u.s)
+        # round-off can give tiny negative values for members with no atoms
+        return u.Quantity(np.maximum(activity, 0), u.Bq)
+
+    @u.quantity_input(time=u.s)
+    def line_rates(self, time, energy_low=None, energy_high=None):
+        """Return the emission rate of each line of all members at the given times.
+
+        Parameters
+        ----------
+        time : `astropy.units.Quantity`
+            The times since time zero.
+        energy_low : `astropy.units.Quantity`, optional
+            Only include lines at or above this energy.
+        energy_high : `astropy.units.Quantity`, optional
+            Only include lines at or below this energy.
+
+        Returns
+        -------
+        lines : `astropy.table.QTable`
+            The selected rows of ``lines``.
+        rates : `astropy.units.Quantity`
+            The emission rate of each selected line, an array with the shape of
+            ``time`` followed by one value per line.
+        """
+        select = np.ones(len(self.lines), dtype=bool)
+        if energy_low is not None:
+            select &= self.lines["energy"] >= energy_low
+        if energy_high is not None:
+            select &= self.lines["energy"] <= energy_high
+        activity = self.activity(time).to_value(u.Bq)
+        rates = activity[..., self._line_nuclide[select]] * (
+            np.asarray(self.lines["intensity"][select]) / 100.0
+        )
+        return self.lines[select], u.Quantity(rates, 1 / u.s)
+
+
+def _get_key(nuclide) -> tuple:
+    """Return the (symbol, mass_number, metastable) key of a nuclide."""
+    if hasattr(nuclide, "mass_number"):
+        symbol, mass_number = _parse_nuclide(nuclide.name.split(" ")[0])[:2]
+        return (symbol, mass_number, _to_bool(nuclide.metastable))
+    key = _parse_nuclide(nuclide)
+    if len(key) == 2:
+        key = (*key, False)
+    return key
+
+
+def _name(key) -> str:
+    """Return the name of a nuclide from its key, as in the name of its lara file."""
+    return str(nuclides_list["filename"][_nuclide_index[key]]).split(".")[0]
+
+
+def _get_daughters(key) -> list:
+    """Return the (key, branching ratio) of each daughter of a nuclide which is
+    in nuclides_list."""
+    decay_chain = str(nuclides_list["decay_chain"][_nuclide_index[key]])
+    result = []
+    for _, symbol, mass_number, ratio in _DAUGHTER_PATTERN.findall(decay_chain):
+        # the daughters are never flagged as metastable, see DecayChain
+        daughter_key = (symbol, int(mass_number), False)
+        if daughter_key in _nuclide_index and daughter_key != key:
+            result.append((daughter_key, float(ratio) / 100.0))
+    return result
+
+
+def _build_graph(parent_keys):
+    """Return all members of the decay chains of the parents sorted so that each
+    member comes before its daughters, and the daughters of each member."""
+    daughters = {}
+    to_visit = list(parent_keys)
+    while to_visit:
+        this_key = to_visit.pop()
+        if this_key in daughters:
+            continue
+        daughters[this_key] = _get_daughters(this_key)
+        to_visit.extend(daughter_key for daughter_key, _ in daughters[this_key])
+    # sort topologically
+    num_parents = {this_key: 0 for this_key in daughters}
+    for this_daughters in daughters.values():
+        for daughter_key, _ in this_daughters:
+            num_parents[daughter_key] += 1
+    ready = [this_key for this_key in daughters if num_parents[this_key] == 0]
+    result = []
+    while ready:
+        this_key = ready.pop(0)
+        result.append(this_key)
+        for daughter_key, _ in daughters[this_key]:
+            num_parents[daughter_key] -= 1
+            if num_parents[daughter_key] == 0:
+                ready.append(daughter_key)
+    if len(result) != len(daughters):
+        raise ValueError("The decay chain contains a cycle.")
+    return result, daughters
+
+
+def _separate(decay_constant):
+    """Return the decay constants with equal values moved slightly apart, for
+    which the eigenvectors would not be defined."""
+    result = decay_constant.copy()
+    order = np.argsort(result)
+    for previous, this in zip(order[:-1], order[1:]):
+        if result[this] <= result[previous] * (1 + _MIN_RELATIVE_SEPARATION):
+            result[this] = result[previous] * (1 + 2 * _MIN_RELATIVE_SEPARATION)
+    return result
+
+
+def _eigenvectors(decay_constant, branching_ratio):
+    """Return the eigenvectors (as columns) of the lower triangular matrix of the
+    Bateman equations, dN/dt = M N with M = branching_ratio * decay_constant -
+    diag(decay_constant), each scaled to one at its own member."""
+    size = len(decay_constant)
+    matrix = branching_ratio * decay_constant
+    result = np.eye(size)
+    for k in range(size):
+        for i in range(k + 1, size):
+            result[i, k] = matrix[i, k:i] @ result[k:i, k] / (decay_constant[i] - decay_constant[k])
+    return result
+
+
+def _get_chain_lines(rows, names):
+    """Return the lines emitted in the decays of each member, and the position of
+    the member of each line."""
+    store = _get_lara_store()
+    filenames = {str(this_name): i for i, this_name in enumerate(store["filename"])}
+    columns = {"energy": [], "intensity": [], "type": [], "origin": [], "nuclide": []}
+    line_nuclide = []
+    for position, (this_row, this_name) in enumerate(zip(rows, names)):
+        filename = str(nuclides_list["filename"][this_row])
+        index = filenames[filename]
+        start, stop = store["offsets"][index], store["offsets"][index + 1]
+        # only the emissions of the member itself, and not of its daughters,
+        # equilibrium files (e.g. Ra-226D) name the member without the D
+        name = filename.split(".")[0]
+        select = store["parent"][start:stop] == name
+        if not np.any(select):
+            select = store["parent"][start:stop] == re.sub(r"D$", "", name)
+        for this_column in ("energy", "intensity", "type", "origin"):
+            columns[this_column].append(store[this_column][start:stop][select])
+        columns["nuclide"].append(np.full(np.count_nonzero(select), this_name))
+        line_nuclide.append(np.full(np.count_nonzero(select), position))
+    columns = {key: np.concatenate(value) for key, value in columns.items()}
+    line_nuclide = np.concatenate(line_nuclide)
+    order = np.argsort(columns["energy"], kind="stable")
+    result = QTable()
+    result["energy"] = u.Quantity(columns["energy"][order], "keV")
+    result["intensity"] = columns["intensity"][order]
+    result["type"] = columns["type"][order]
+    result["origin"] = columns["origin"][order]
+    result["nuclide"] = columns["nuclide"][order]
+    return result, line_nuclide[order]
@@ -1,19 +1,24 @@
 """A module to provide access to x-ray and gamma-ray radiation from radionuclides"""
 
+from functools import lru_cache
 from pathlib import Path
 import re
+import threading
 
 import numpy as np
 
-from astropy.table import QTable, vstack
+from astropy.table import QTable
 import astropy.units as u
 from astropy.io import ascii
 
 import roentgen
+from roentgen.util.profiling import _section
 
 __all__ = [
     "Nuclide",
     "get_nuclide_mass_numbers",
+    "get_nuclide",
+    "load_nuclides",
     "nuclides_list",
     "get_lara_file",
     "read_lara_tables",
@@ -21,6 +26,37 @@ __all__ = [
 ]
 
 _lara_directory = Path(roentgen._data_directory) / "lara"
+# all lara files parsed into one file of columns, see scripts/build_lara_store.py
+_lara_store_file = Path(roentgen._data_directory) / "lara.npz"
+# the number of lines at the start of each lara file which hold the header
+_LARA_HEADER_LINES = 12
+# the columns of the emission tables with the position of their values in a lara file
+_LARA_FLOAT_COLUMNS = {
+    "energy_uncertainty": 1,
+    "intensity": 2,
+    "intensity_uncertainty": 3,
+    "level_start": 6,
+    "level_end": 7,
+}
+_LARA_STR_COLUMNS = {"type": 4, "origin": 5}
+# the columns of Nuclide.emissions and Nuclide.lines
+_LARA_COLUMNS = (
+    "energy",
+    "energy_uncertainty",
+    "intensity",
+    "intensity_uncertainty",
+    "type",
+    "origin",
+    "parent",
+    "level_start",
+    "level_end",
+)
+_LINES_COLUMNS = ("energy", "intensity", "origin", "parent")
+# the maximum number of Nuclide objects kept by get_nuclide, enough for all nuclides
+_NUCLIDE_CACHE_SIZE = 256
+# held while getting a cached nuclide so that concurrent requests for a nuclide
+# which is not cached yet do not each create one
+_nuclide_cache_lock = threading.Lock()
 
 nuclides_list = QTable(
     ascii.read(
@@ -33,9 +69,27 @@ nuclides_list["half_life"] = nuclides_list["half_life [year]"]
 nuclides_list.remove_column("half_life [year]")
 nuclides_list["half_life"].unit = u.yr
 
+nuclides_list["metastable"] = np.asarray(nuclides_list["metastable"]).astype(str) == "True"
+
 nuclides_list.add_index("symbol")
 nuclides_list.add_index("mass_number")
 
+# the row of each nuclide in nuclides_list by (symbol, mass_number, metastable)
+_nuclide_index = {
+    (str(symbol), int(mass_number), bool(metastable)): i
+    for i, (symbol, mass_number, metastable) in enumerate(
+        zip(nuclides_list["symbol"], nuclides_list["mass_number"], nuclides_list["metastable"])
+    )
+}
+# the mass numbers of the nuclides of each element in the order of nuclides_list
+_mass_numbers = {}
+for _symbol, _mass_number in zip(nuclides_list["symbol"], nuclides_list["mass_number"]):
+    _mass_numbers.setdefault(str(_symbol), []).append(_mass_number)
+_mass_numbers = {
+    key: np.array(value, dtype=nuclides_list["mass_number"].dtype)
+    for key, value in _mass_numbers.items()
+}
+
 
 class Nuclide(object):
     """An object to support radionuclides that emit x-ray radiation.
@@ -57,6 +111,13 @@ class Nuclide(object):
         A list of material names
     name : `str`
         A name for the material
+    lines : `astropy.table.QTable`
+        The energy, intensity, origin and parent of all emissions sorted by
+        energy. Its columns are shared by all nuclides and are read-only.
+    emissions : `astropy.table.QTable`
+        All columns of the emission tables (including uncertainties, types and
+        levels) sorted by energy. Its columns are shared by all nuclides and
+        are read-only.
 
     Methods
     -------
@@ -81,16 +142,30 @@ class Nuclide(object):
 
     def __init__(self, element: str, mass_number: int, metastable: bool = False):
         file_path = get_lara_file(element.capitalize(), mass_number, metastable)
-        self._line_tables = read_lara_tables(file_path)
-        if len(self._line_tables) > 1:
-            self.lines = vstack(self._line_tables)
-            self.lines.sort("energy")
-        elif len(self._line_tables) == 1:
-            self.lines = self._line_tables[0]
-        self.meta = read_lara_header(file_path)
+        store = _get_lara_store()
+        index = store["index"][file_path.name]
+        start, stop = store["offsets"][index], store["offsets"][index + 1]
+        # the tables hold slices of the store columns and not copies
+        with _section("nuclides.build_table", stop - start):
+            self.emissions = QTable(
+                [u.Quantity(store["energy"][start:stop], "keV", copy=False)]
+                + [store[this_column][start:stop] for this_column in _LARA_COLUMNS[1:]],
+                names=_LARA_COLUMNS,
+                copy=False,
+            )
+            if stop > start:
+                self.lines = QTable(
+                    [self.emissions[this_column] for this_column in _LINES_COLUMNS],
+                    names=_LINES_COLUMNS,
+                    copy=False,
+                )
+            else:
+                self.lines = QTable()
+        self.meta = _parse_lara_header(str(store["header"][index]).splitlines(keepends=True))
         self.name = self.meta["Nuclide"]
         self.element = self.meta["Element"]
-        self.half_life = self.meta["Half-life (s)"].to("yr")
+        with _section("nuclides.units", 1):
+            self.half_life = self.meta["Half-life (s)"].to("yr")
         self.daughters = self.meta["Daughter(s)"]
         self.mass_number = mass_number
         self.metastable = metastable
@@ -123,10 +198,8 @@ class Nuclide(object):
 
 def get_nuclide_mass_numbers(element: str) -> list:
     """Return all available nuclide mass numbers for a given element."""
-    bool_array = nuclides_list["symbol"] == element
-    if sum(bool_array) > 0:
-        mass_numbers = nuclides_list["mass_number"][bool_array].data
-        return mass_numbers
+    if element in _mass_numbers:
+        return _mass_numbers[element].copy()
     else:
         raise ValueError(f"No nuclide data found for element {element}")
 
@@ -147,20 +220,100 @@ def get_lara_file(element: str, mass_number: int, metastable: bool = False) -> P
     -------
     file_path : Path
     """
-    bool_array = nuclides_list["symbol"] == element
-    bool_array *= nuclides_list["mass_number"] == mass_number
-    descriptor = ""
-    if metastable:
-        bool_array *= nuclides_list["metastable"] == metastable
-        descriptor = "m"
-    if sum(bool_array) == 0:
+    index = _nuclide_index.get((element, int(mass_number), _to_bool(metastable)))
+    if index is None:
+        descriptor = "m" if _to_bool(metastable) else ""
         raise KeyError(f"No match for mass_number {mass_number} for {element}{descriptor}")
-    elif sum(bool_array) > 1:
-        raise KeyError(
-            f"Multiple matches for mass_number {mass_number} for {element}{descriptor}. {nuclides_list[bool_array]}"
-        )
+    return _lara_directory / str(nuclides_list["filename"][index])
+
+
+def get_nuclide(element: str, mass_number: int, metastable: bool = False) -> Nuclide:
+    """Return a radionuclide, reusing a previously created one if possible.
+
+    The most recently used nuclides are kept so that repeated requests for
+    the same nuclide do not load it again. The same object is returned for
+    each request, also from different threads, and should therefore not be
+    modified.
+
+    Parameters
+    ----------
+    element : str
+        The element symbol of the nuclide
+    mass_number : int
+        The mass number of the nuclide
+    metastable : bool
+        Whether the nuclide is metastable
+
+    Returns
+    -------
+    nuclide : `Nuclide`
+
+    Examples
+    --------
+    >>> from roentgen.nuclides import get_nuclide
+    >>> get_nuclide('Am', 241) is get_nuclide('am', 241)
+    True
+    """
+    key = (element.capitalize(), int(mass_number), _to_bool(metastable))
+    with _nuclide_cache_lock:
+        return _get_cached_nuclide(*key)
+
+
+def load_nuclides(nuclides=None) -> list:
+    """Return many radionuclides at once.
+
+    Parameters
+    ----------
+    nuclides : iterable, optional
+        The nuclides given either as names (e.g. "Am-241" or "Ag-108m") or as
+        tuples of element symbol, mass number and optionally whether the
+        nuclide is metastable. If not provided, all nuclides in `nuclides_list`
+        are returned.
+
+    Returns
+    -------
+    nuclides : list of `Nuclide`
+
+    Examples
+    --------
+    >>> from roentgen.nuclides import load_nuclides
+    >>> [nuclide.name for nuclide in load_nuclides(["Co-57", ("Ba", 133), "Ag-108m"])]
+    ['Co-57', 'Ba-133', 'Ag-108m']
+    """
+    if nuclides is None:
+        keys = list(_nuclide_index.keys())
     else:
-        return _lara_directory / str(nuclides_list["filename"][bool_array].data[0])
+        keys = [_parse_nuclide(this_nuclide) for this_nuclide in nuclides]
+    return [get_nuclide(*this_key) for this_key in keys]
+
+
+@lru_cache(maxsize=_NUCLIDE_CACHE_SIZE)
+def _get_cached_nuclide(element, mass_number, metastable):
+    return Nuclide(element, mass_number, metastable)
+
+
+def _to_bool(metastable) -> bool:
+    """Return the metastable flag as a bool, which may be given as a string as
+    in older versions of nuclides_list."""
+    if isinstance(metastable, str):
+        return metastable == "True"
+    return bool(metastable)
+
+
+def _parse_nuclide(nuclide) -> tuple:
+    """Return the (symbol, mass_number, metastable) key of a nuclide given as
+    a name or a tuple."""
+    if isinstance(nuclide, str):
+        match = re.fullmatch(r"([A-Za-z]+)-?(\d+)(m?)", nuclide.strip())
+        if match is None:
+            raise ValueError(f"Could not parse the nuclide name {nuclide}")
+        symbol, mass_number, metastable = match.groups()
+        return symbol.capitalize(), int(mass_number), metastable == "m"
+    return (
+        str(nuclide[0]).capitalize(),
+        int(nuclide[1]),
+        *[_to_bool(this) for this in nuclide[2:]],
+    )
 
 
 def read_lara_tables(file_path: str | Path) -> list:
@@ -171,7 +324,7 @@ def read_lara_tables(file_path: str | Path) -> list:
     result : list"""
     if isinstance(file_path, str):
         file_path = Path(file_path)
-    with open(file_path, "r") as fp:
+    with _section("nuclides.load_data"), open(file_path, "r") as fp:
         lines = [line.rstrip() for line in fp]
     # find the emission tables
     table_line_index = []
@@ -232,8 +385,13 @@ def read_lara_header(file_path: str | Path) -> dict:
     if isinstance(file_path, str):
         file_path = Path(file_path)
     with open(file_path, "r") as fp:
-        lines = fp.readlines()[:12]
-        result = {}
+        lines = fp.readlines()[:_LARA_HEADER_LINES]
+    return _parse_lara_header(lines)
+
+
+def _parse_lara_header(lines) -> dict:
+    """Return the metadata from the header lines of a lara file."""
+    result = {}
     for this_line in lines:
         tokens = this_line.rstrip().split(";")
         if len(tokens) > 1:
@@ -271,3 +429,99 @@ def read_lara_header(file_path: str | Path) -> dict:
                 value = value * u.Bq / u.g
             result.update({key: value})
     return result
+
+
+def _read_lara_emissions(file_path: Path) -> dict:
+    """Return all columns of all emission tables of a lara file as plain arrays
+    sorted by energy. Blank values are nan.
+
+    Energy ranges are replaced by their average as in `read_lara_tables`."""
+    with open(file_path, "r") as fp:
+        lines = [line.rstrip() for line in fp]
+    columns = {this_column: [] for this_column in _LARA_COLUMNS}
+    table_line_index = [i for i, this_line in enumerate(lines) if this_line.count("---------") > 1]
+    for j, this_index in enumerate(table_line_index):
+        # get the parent nuclide, may be self
+        table_separator = lines[this_index]
+        if table_separator.count(" "):
+            parent = table_separator.split(" ")[1]
+        else:
+            parent = file_path.name.split(".")[0]
+        skip_num = 2 if j == 0 else 1  # first table has the header line
+        rows = []
+        for this_line in lines[this_index + skip_num :]:
+            tokens = [this_token.strip() for this_token in this_line.split(";")]
+            if len(tokens) <= 1:
+                break
+            if tokens[0].count("-") == 1:
+                energy1, energy2 = tokens[0].split(" - ")
+                energy = 0.5 * (float(energy1) + float(energy2))
+            else:
+                energy = float(tokens[0])
+            rows.append((energy, tokens))
+        # each table is sorted by energy as in read_lara_tables
+        rows.sort(key=lambda row: row[0])
+        for energy, tokens in rows:
+            columns["energy"].append(energy)
+            for this_column, this_index in _LARA_FLOAT_COLUMNS.items():
+                columns[this_column].append(
+                    float(tokens[this_index]) if tokens[this_index] else np.nan
+                )
+            for this_column, this_index in _LARA_STR_COLUMNS.items():
+                columns[this_column].append(tokens[this_index])
+            columns["parent"].append(parent)
+    order = np.argsort(np.array(columns["energy"], dtype=float), kind="stable")
+    result = {}
+    for this_column, values in columns.items():
+        if this_column in _LARA_STR_COLUMNS or this_column == "parent":
+            values = np.array(values, dtype="<U7" if this_column != "type" else str)
+        else:
+            values = np.array(values, dtype=float)
+        result[this_column] = values[order] if len(order) else values
+    return result
+
+
+def _pack_lara_files(directory: Path = _lara_directory) -> dict:
+    """Parse all lara files in a directory into one dictionary of columns.
+
+    The emissions of all files are concatenated, those of the file ``filename[i]``
+    are in the rows ``offsets[i]`` to ``offsets[i + 1]``, and its header lines are
+    in ``header[i]``."""
+    file_paths = sorted(Path(directory).glob("*.lara.txt"))
+    emissions = [_read_lara_emissions(this_path) for this_path in file_paths]
+    headers = []
+    for this_path in file_paths:
+        with open(this_path, "r") as fp:
+            headers.append("".join(fp.readlines()[:_LARA_HEADER_LINES]))
+    result = {
+        this_column: np.concatenate([this_emissions[this_column] for this_emissions in emissions])
+        for this_column in _LARA_COLUMNS
+    }
+    result["offsets"] = np.cumsum(
+        [0] + [len(this_emissions["energy"]) for this_emissions in emissions]
+    )
+    result["filename"] = np.array([this_path.name for this_path in file_paths])
+    result["header"] = np.array(headers)
+    return result
+
+
+def _build_lara_store(output: Path = _lara_store_file, directory: Path = _lara_directory):
+    """Parse all lara files in a directory and save them into one ``.npz`` file."""
+    np.savez_compressed(output, **_pack_lara_files(directory))
+
+
+@lru_cache
+def _get_lara_store() -> dict:
+    """Return the columns of all lara files, from the store file if it exists
+    and otherwise by parsing the lara files."""
+    with _section("nuclides.load_data"):
+        if _lara_store_file.exists():
+            with np.load(_lara_store_file, allow_pickle=False) as npz:
+                result = {key: npz[key] for key in npz.files}
+        else:
+            result = _pack_lara_files()
+    # the tables of all nuclides are views of these columns, which must not change
+    for this_column in result.values():
+        this_column.setflags(write=False)
+    result["index"] = {str(this_name): i for i, this_name in enumerate(result["filename"])}
+    return result
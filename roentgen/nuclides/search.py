@@ -0,0 +1,132 @@
+"""A module to search the emission lines of all radionuclides by energy."""
+
+from functools import lru_cache
+
+import numpy as np
+
+import astropy.units as u
+from astropy.table import QTable
+
+from roentgen.nuclides.nuclides import (
+    _get_lara_store,
+    _parse_lara_header,
+    nuclides_list,
+)
+
+__all__ = ["find_nuclides"]
+
+
+@u.quantity_input(energy=u.keV, window=u.keV)
+def find_nuclides(
+    energy,
+    window,
+    emission_type=None,
+    min_intensity: float = 0.0,
+    half_life_low=None,
+    half_life_high=None,
+):
+    """
+    Find the radionuclides which emit lines at or near given energies.
+
+    All emission lines of all radionuclides are kept in one array sorted by
+    energy so that each query is a binary search, without creating any
+    `Nuclide` objects.
+
+    Parameters
+    ----------
+    energy : `astropy.units.Quantity`
+        One energy or an array of energies to search for.
+    window : `astropy.units.Quantity`
+        Lines within this energy of ``energy`` (inclusive) are returned. Either
+        one value or one value per energy.
+    emission_type : str or tuple of str, optional
+        Only return emissions whose type (e.g. "g" for gamma-rays, "XL" for L
+        x-rays, "XK" for K x-rays or "a" for alpha particles) starts with one of
+        these strings.
+    min_intensity : float, optional
+        Only return emissions with at least this intensity (in percent).
+    half_life_low : `astropy.units.Quantity`, optional
+        Only return emissions of radionuclides with at least this half life.
+    half_life_high : `astropy.units.Quantity`, optional
+        Only return emissions of radionuclides with at most this half life.
+
+    Returns
+    -------
+    result : `astropy.table.QTable`
+        One row per emission sorted by query and by energy. If ``energy`` is an
+        array, the ``query`` column holds the index of the energy of each row.
+
+    Examples
+    --------
+    >>> import astropy.units as u
+    >>> from roentgen.nuclides import find_nuclides
+    >>> result = find_nuclides(661.7 * u.keV, 0.1 * u.keV, emission_type="g", min_intensity=10)
+    >>> [str(name) for name in result["nuclide"]]
+    ['Ba-137m', 'Cs-137']
+    """
+    index = _get_emission_index()
+    energy_kev = np.atleast_1d(energy.to_value("keV"))
+    window_kev = np.broadcast_to(np.atleast_1d(window.to_value("keV")), energy_kev.shape)
+    if np.any(window_kev < 0):
+        raise ValueError("window must not be negative.")
+    start = np.searchsorted(index["energy"], energy_kev - window_kev, side="left")
+    stop = np.searchsorted(index["energy"], energy_kev + window_kev, side="right")
+    counts = stop - start
+
+    # gather the emissions of all queries into flat arrays
+    query = np.repeat(np.arange(len(energy_kev)), counts)
+    row = np.repeat(start - (np.cumsum(counts) - counts), counts) + np.arange(counts.sum())
+    keep = index["intensity"][row] >= min_intensity
+    if emission_type is not None:
+        if isinstance(emission_type, str):
+            emission_type = (emission_type,)
+        types = index["type"][row]
+        keep &= np.any(
+            [np.char.startswith(types, this_type) for this_type in emission_type], axis=0
+        )
+    half_life = index["half_life"][row]
+    if half_life_low is not None:
+        keep &= half_life >= half_life_low.to_value("yr")
+    if half_life_high is not None:
+        keep &= half_life <= half_life_high.to_value("yr")
+    query, row = query[keep], row[keep]
+
+    result = QTable()
+    if not energy.isscalar:
+        result["query"] = query
+    result["nuclide"] = index["nuclide"][row]
+    result["energy"] = u.Quantity(index["energy"][row], "keV")
+    result["intensity"] = index["intensity"][row]
+    result["type"] = index["type"][row]
+    result["origin"] = index["origin"][row]
+    result["parent"] = index["parent"][row]
+    result["half_life"] = u.Quantity(index["half_life"][row], "yr")
+    return result
+
+
+@lru_cache
+def _get_emission_index():
+    """Return the emission lines of all radionuclides as plain arrays sorted by
+    energy, with the name and half life of the radionuclide of each line."""
+    store = _get_lara_store()
+    # the row in nuclides_list of each file in the store
+    filenames = {str(this_name): i for i, this_name in enumerate(nuclides_list["filename"])}
+    list_row = np.array([filenames[str(this_name)] for this_name in store["filename"]])
+    names = np.array(
+        [
+            _parse_lara_header(str(this_header).splitlines(keepends=True))["Nuclide"]
+            for this_header in store["header"]
+        ]
+    )
+    file_of_line = np.repeat(np.arange(len(store["filename"])), np.diff(store["offsets"]))
+    order = np.argsort(store["energy"], kind="stable")
+    file_of_line = file_of_line[order]
+    return {
+        "energy": store["energy"][order],
+        "intensity": store["intensity"][order],
+        "type": store["type"][order],
+        "origin": store["origin"][order],
+        "parent": store["parent"][order],
+        "nuclide": names[file_of_line],
+        "half_life": np.asarray(nuclides_list["half_life"].to_value("yr"))[list_row[file_of_line]],
+    }
@@ -0,0 +1,209 @@
+"""A module to calculate the detected emission of radionuclide sources."""
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+import astropy.units as u
+
+from roentgen.absorption.material import Material, Response, Stack
+from roentgen.lines.spectrum import _profile_weights
+from roentgen.nuclides.nuclides import load_nuclides
+
+__all__ = ["SourceSpectra"]
+
+# the energy range of the mass attenuation data in keV
+_MIN_ENERGY_KEV = 1.0
+_MAX_ENERGY_KEV = 20000.0
+
+
+class SourceSpectra(object):
+    """
+    An object which calculates the rates and the spectrum of the photons from
+    one or more radionuclide sources which are detected through shielding.
+
+    The photon emissions of all sources are collected once on the union of
+    their energies, as a matrix of the emissions per decay of each source at
+    each energy. The transmission and response are then evaluated once per
+    energy, and the rates of any number of source activities are one matrix
+    product.
+
+    Parameters
+    ----------
+    sources : `Nuclide`, str, tuple or list of those
+        The radionuclides, given as `Nuclide` objects, as names (e.g. "Am-241")
+        or as (symbol, mass_number, metastable) tuples.
+
+    Attributes
+    ----------
+    nuclides : list of `Nuclide`
+        The sources.
+    names : list of str
+        The name of each source.
+    energy : `astropy.units.Quantity`
+        The sorted energies of all photon emissions of all sources, within the
+        energy range of the mass attenuation data (1 keV to 20 MeV).
+    emissions : `np.ndarray`
+        The number of photons emitted per decay of each source (rows) at each
+        energy (columns).
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> import astropy.units as u
+    >>> from roentgen.absorption import Material, Response
+    >>> from roentgen.nuclides import SourceSpectra
+    >>> sources = SourceSpectra(["Am-241", "Ba-133", "Cs-137"])
+    >>> resp = Response(Material('Be', 100 * u.um), detector=Material('cdte', 1 * u.mm))
+    >>> rates = sources.line_rates([1, 1, 1] * u.kBq, shielding=Material('Al', 1 * u.mm), response=resp)
+    >>> energy_edges = u.Quantity(np.arange(1, 700, 0.5), 'keV')
+    >>> spectrum = sources.spectrum(energy_edges, [1, 1, 1] * u.kBq, response=resp, resolution=1 * u.keV)
+    """
+
+    def __init__(self, sources):
+        if isinstance(sources, (str, tuple)) or hasattr(sources, "emissions"):
+            sources = [sources]
+        nuclides = [
+            this_source if hasattr(this_source, "emissions") else load_nuclides([this_source])[0]
+            for this_source in sources
+        ]
+        energies, source_index, intensities = [], [], []
+        for i, this_nuclide in enumerate(nuclides):
+            emissions = this_nuclide.emissions
+            energy = emissions["energy"].to_value("keV")
+            # alpha particles are not photons
+            select = ~np.char.startswith(np.asarray(emissions["type"], dtype=str), "a")
+            select &= (energy >= _MIN_ENERGY_KEV) & (energy <= _MAX_ENERGY_KEV)
+            energies.append(energy[select])
+            intensities.append(np.asarray(emissions["intensity"])[select] / 100.0)
+            source_index.append(np.full(np.count_nonzero(select), i))
+        energy, energy_index = np.unique(np.concatenate(energies), return_inverse=True)
+        emissions = np.zeros((len(nuclides), len(energy)))
+        np.add.at(
+            emissions, (np.concatenate(source_index), energy_index), np.concatenate(intensities)
+        )
+
+        self.nuclides = nuclides
+        self.names = [this_nuclide.name for this_nuclide in nuclides]
+        self.energy = u.Quantity(energy, "keV")
+        self.emissions = emissions
+
+    def __repr__(self) -> str:
+        """Returns a developer-relevant representation."""
+        # at this point, no reason for this to be different than __str__
+        return self.__str__()
+
+    def __str__(self) -> str:
+        """Returns a human-readable user-focused representation."""
+        txt = f"SourceSpectra({self.names})"
+        return txt
+
+    def efficiency(self, shielding=None, response=None):
+        """Return the fraction of the photons at each energy which is detected.
+
+        Parameters
+        ----------
+        shielding : `Material`, `Stack` or list of those, optional
+            The shielding between the sources and the detector. For a list,
+            the result has one row per shielding.
+        response : `Response`, optional
+            The response of the detector. If not given, all photons which are
+            transmitted through the shielding are detected.
+
+        Returns
+        -------
+        efficiency : `np.ndarray`
+            The detected fraction at each energy in ``energy``.
+        """
+        if response is None:
+            result = np.ones(len(self.energy))
+        elif isinstance(response, Response):
+            result = np.asarray(response.response(self.energy))
+        else:
+            raise TypeError("response must be a Response")
+        if shielding is None:
+            return result
+        if isinstance(shielding, (Material, Stack)):
+            return result * shielding.transmission(self.energy)
+        return result * np.array(
+            [this_shield.transmission(self.energy) for this_shield in shielding]
+        )
+
+    @u.quantity_input(activity=u.Bq)
+    def line_rates(self, activity, shielding=None, response=None):
+        """Return the rate of detected photons at each energy.
+
+        Parameters
+        ----------
+        activity : `astropy.units.Quantity`
+            The activity of each source, or an array of such activities whose
+            last dimension is the source. Use a diagonal matrix to obtain the
+            rates of each source separately.
+        shielding : `Material`, `Stack` or list of those, optional
+            The shielding between the sources and the detector. For a list,
+            the result has an additional first dimension with one entry per
+            shielding.
+        response : `Response`, optional
+            The response of the detector.
+
+        Returns
+        -------
+        rates : `astropy.units.Quantity`
+            The detected rate at each energy in ``energy``, summed over sources.
+        """
+        activity_bq = activity.to_value(u.Bq)
+        if np.shape(activity_bq)[-1:] != (len(self.names),):
+            raise ValueError(f"activity must have one value per source ({len(self.names)}).")
+        emitted = activity_bq @ self.emissions
+        efficiency = self.efficiency(shielding, response)
+        if efficiency.ndim == 2:
+            efficiency = efficiency.reshape(
+                (len(efficiency),) + (1,) * (emitted.ndim - 1) + (len(self.energy),)
+            )
+        return u.Quantity(emitted * efficiency, 1 / u.s)
+
+    @u.quantity_input(energy_edges=u.keV, activity=u.Bq)
+    def spectrum(
+        self,
+        energy_edges,
+        activity,
+        shielding=None,
+        response=None,
+        resolution=None,
+        window: float = 20.0,
+    ):
+        """Return the binned spectrum of the detected photons.
+
+        Parameters
+        ----------
+        energy_edges : `astropy.units.Quantity`
+            The increasing edges of the energy bins.
+        activity : `astropy.units.Quantity`
+            The activity of each source, see `line_rates`.
+        shielding : `Material`, `Stack` or list of those, optional
+            The shielding between the sources and the detector, see `line_rates`.
+        response : `Response`, optional
+            The response of the detector.
+        resolution : `astropy.units.Quantity` or callable, optional
+            The detector resolution (FWHM), see `roentgen.lines.line_spectrum`.
+            If not given, each line is added to the bin which includes its energy.
+        window : float, optional
+            The half width of the window around each line, in units of the
+            resolution.
+
+        Returns
+        -------
+        spectrum : `astropy.units.Quantity`
+            The detected rate in each bin, with the same leading dimensions as
+            the result of `line_rates`.
+        """
+        rates = self.line_rates(activity, shielding, response)
+        edges = energy_edges.to_value("keV")
+        line, bin_index, fraction = _profile_weights(
+            self.energy.value, np.zeros(len(self.energy)), edges, resolution, window
+        )
+        redistribution = csr_matrix(
+            (fraction, (line, bin_index)), shape=(len(self.energy), len(edges) - 1)
+        )
+        flat_rates = rates.value.reshape(-1, len(self.energy))
+        result = (redistribution.T @ flat_rates.T).T
+        return u.Quantity(result.reshape(rates.shape[:-1] + (len(edges) - 1,)), rates.unit)
@@ -0,0 +1,462 @@
+"""A local HTTP service which answers roentgen queries with JSON."""
+
+import asyncio
+import json
+import sys
+from collections import OrderedDict
+from functools import lru_cache
+from http import HTTPStatus
+
+import numpy as np
+
+import astropy.units as u
+
+from roentgen.absorption.material import Material
+from roentgen.cli import _energy_grid, _to_quantity
+from roentgen.lines.lines import get_lines
+from roentgen.nuclides.search import _get_emission_index, find_nuclides
+
+__all__ = ["ComputeServer", "serve"]
+
+# the largest accepted request body in bytes
+_MAX_BODY_SIZE = 16 * 1024 * 1024
+# the number of materials whose attenuation data is kept in memory
+_MATERIAL_CACHE_SIZE = 256
+# the names of the JSON types of the accepted Python types, for error messages
+_JSON_TYPE_NAMES = {
+    str: "a string",
+    float: "a number",
+    list: "a list",
+    dict: "an object",
+    type(None): "null",
+}
+
+
+class ComputeServer(object):
+    """
+    A lightweight asyncio HTTP server which calculates transmissions, responses,
+    emission lines and radionuclide emissions for clients which are not written
+    in Python.
+
+    Each endpoint accepts a POST request with a JSON body and returns JSON.
+
+    * ``/transmission`` and ``/response`` take a configuration as described in
+      `roentgen.cli.read_configurations`, where ``energy`` may also be a list of
+      energies in keV, and return ``energy`` (keV) and ``transmission`` or
+      ``response``. A configuration without a ``detector`` is a transmission.
+    * ``/lines`` takes the arguments of `roentgen.lines.get_lines` and returns
+      its table as a mapping of columns.
+    * ``/nuclides`` takes the arguments of `roentgen.nuclides.find_nuclides` and
+      returns its table as a mapping of columns.
+
+    Quantities are given as strings with units (e.g. "100 um") or as numbers
+    in keV for energies. Tables have a ``units`` entry with the unit of each
+    column which has one.
+
+    A request whose arguments have the wrong JSON types or cannot be
+    evaluated (e.g. an unknown material) is answered with status 400, and a
+    request which fails for any other reason with status 500, both with an
+    ``error`` entry.
+
+    Requests for transmissions and responses on the same energies which arrive
+    within ``batch_delay`` of each other are evaluated together, so that the
+    mass attenuation coefficient of each material is interpolated once and all
+    optical depths are one matrix product. The attenuation data of the 256
+    most recently used materials is kept in memory, and the most recent results
+    are cached.
+
+    Parameters
+    ----------
+    host : str, optional
+        The address to listen on, only the local machine by default.
+    port : int, optional
+        The port to listen on. With 0, a free port is chosen when the server
+        starts.
+    batch_delay : float, optional
+        The time in seconds to wait for requests to evaluate together.
+    cache_size : int, optional
+        The number of results to cache.
+
+    Examples
+    --------
+    >>> import asyncio
+    >>> from roentgen.server import ComputeServer
+    >>> async def run():
+    ...     server = ComputeServer(port=0)
+    ...     await server.start()
+    ...     await server.close()
+    >>> asyncio.run(run())
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8080,
+        batch_delay: float = 0.002,
+        cache_size: int = 1024,
+    ):
+        self.host = host
+        self.port = port
+        self.batch_delay = batch_delay
+        self.cache_size = cache_size
+        self._server = None
+        self._cache = OrderedDict()
+        # the configurations waiting to be evaluated with their futures, per energy grid
+        self._pending = {}
+        # the running batch evaluations, which must be referenced until they are done
+        self._tasks = set()
+        self._endpoints = {
+            "/transmission": self._transmission,
+            "/response": self._transmission,
+            "/lines": self._lines,
+            "/nuclides": self._nuclides,
+        }
+
+    def __repr__(self) -> str:
+        """Returns a developer-relevant representation."""
+        # at this point, no reason for this to be different than __str__
+        return self.__str__()
+
+    def __str__(self) -> str:
+        """Returns a human-readable user-focused representation."""
+        txt = f"ComputeServer(http://{self.host}:{self.port})"
+        return txt
+
+    async def start(self):
+        """Load the emission data and start listening."""
+        await asyncio.get_running_loop().run_in_executor(None, _get_emission_index)
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        """Start the server if needed and serve until cancelled."""
+        if self._server is None:
+            await self.start()
+        await self._server.serve_forever()
+
+    async def close(self):
+        """Stop listening and close the server."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle_connection(self, reader, writer):
+        """Answer the requests of one connection until it is closed."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    method, path, version = request_line.decode("latin-1").split()
+                    content_length = int(headers.get("content-length", 0))
+                except ValueError:
+                    # the body cannot be found, so the connection cannot be reused
+                    method, content_length = None, 0
+                if method is None:
+                    status = HTTPStatus.BAD_REQUEST
+                    payload = _dumps({"error": "Malformed request."})
+                    keep_alive = False
+                elif content_length > _MAX_BODY_SIZE:
+                    status, payload = HTTPStatus.REQUEST_ENTITY_TOO_LARGE, b"{}"
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(content_length)
+                    status, payload = await self._dispatch(method, path.split("?")[0], body)
+                    keep_alive = (
+                        version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                    )
+                writer.write(
+                    (
+                        f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                        "Content-Type: application/json\r\n"
+                        f"Content-Length: {len(payload)}\r\n"
+                        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+                    ).encode("latin-1")
+                    + payload
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            # truncated requests and closed connections end the connection
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method, path, body):
+        """Return the status and the JSON payload of a request."""
+        if path not in self._endpoints:
+            return HTTPStatus.NOT_FOUND, _dumps({"error": f"Unknown endpoint {path}."})
+        if method != "POST":
+            return HTTPStatus.METHOD_NOT_ALLOWED, _dumps({"error": "Use POST."})
+        try:
+            arguments = json.loads(body or b"{}")
+            key = (path, json.dumps(arguments, sort_keys=True))
+        except (ValueError, TypeError) as error:
+            return HTTPStatus.BAD_REQUEST, _dumps({"error": str(error)})
+        if not isinstance(arguments, dict):
+            return HTTPStatus.BAD_REQUEST, _dumps({"error": "The body must be a JSON object."})
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return HTTPStatus.OK, self._cache[key]
+        try:
+            payload = _dumps(await self._endpoints[path](arguments))
+        except (ValueError, TypeError, KeyError, u.UnitsError) as error:
+            return HTTPStatus.BAD_REQUEST, _dumps({"error": str(error)})
+        except Exception as error:
+            return HTTPStatus.INTERNAL_SERVER_ERROR, _dumps(
+                {"error": f"{type(error).__name__}: {error}"}
+            )
+        self._cache[key] = payload
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return HTTPStatus.OK, payload
+
+    async def _transmission(self, arguments):
+        """Evaluate one configuration together with the others on the same energies."""
+        _check_configuration(arguments)
+        energy = arguments.get("energy")
+        if isinstance(energy, dict):
+            energy_key = tuple(
+                _to_quantity(energy[this_key], u.keV).value for this_key in ("low", "high", "step")
+            )
+            energy_kev = _energy_grid(*energy_key).value
+        elif energy is not None:
+            energy_kev = np.atleast_1d(np.asarray(energy, dtype=float))
+            energy_key = tuple(energy_kev)
+        else:
+            raise ValueError("No energies given.")
+        configuration = _parse_configuration(arguments)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if energy_key not in self._pending:
+            self._pending[energy_key] = (energy_kev, [])
+            loop.call_later(self.batch_delay, self._evaluate_pending, energy_key)
+        self._pending[energy_key][1].append((configuration, future))
+        values = await future
+        name = "response" if configuration[1] is not None else "transmission"
+        return {"energy": energy_kev.tolist(), name: values.tolist()}
+
+    def _evaluate_pending(self, energy_key):
+        """Evaluate the configurations waiting on one energy grid in a thread."""
+        energy_kev, requests = self._pending.pop(energy_key)
+        task = asyncio.ensure_future(self._evaluate_batch(energy_kev, requests))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _evaluate_batch(self, energy_kev, requests):
+        configurations = [configuration for configuration, _ in requests]
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                None, _evaluate_configurations, configurations, energy_kev
+            )
+        except Exception:
+            # evaluate separately so that a bad configuration only fails its own request
+            for configuration, future in requests:
+                try:
+                    future.set_result(_evaluate_configurations([configuration], energy_kev)[0])
+                except Exception as error:
+                    future.set_exception(error)
+            return
+        for (_, future), values in zip(requests, results):
+            future.set_result(values)
+
+    async def _lines(self, arguments):
+        _check_type(arguments.get("energy_low"), "energy_low", str, float)
+        _check_type(arguments.get("energy_high"), "energy_high", str, float)
+        _check_type(arguments.get("element"), "element", str, type(None))
+        _check_type(arguments.get("min_intensity", 0), "min_intensity", float)
+        return _table_to_json(
+            get_lines(
+                _to_quantity(arguments["energy_low"], u.keV),
+                _to_quantity(arguments["energy_high"], u.keV),
+                element=arguments.get("element"),
+                min_intensity=arguments.get("min_intensity", 0),
+            )
+        )
+
+    async def _nuclides(self, arguments):
+        energy = arguments.get("energy")
+        _check_type(energy, "energy", str, float, list)
+        _check_type(arguments.get("window"), "window", str, float)
+        _check_type(arguments.get("emission_type"), "emission_type", str, type(None))
+        _check_type(arguments.get("min_intensity", 0.0), "min_intensity", float)
+        for this_key in ("half_life_low", "half_life_high"):
+            _check_type(arguments.get(this_key), this_key, str, float, type(None))
+        if isinstance(energy, list):
+            for i, this_energy in enumerate(energy):
+                _check_type(this_energy, f"energy[{i}]", str, float)
+            energy = u.Quantity([_to_quantity(this, u.keV) for this in energy])
+        else:
+            energy = _to_quantity(energy, u.keV)
+        half_life = {
+            this_key: _to_quantity(arguments[this_key], u.yr)
+            for this_key in ("half_life_low", "half_life_high")
+            if arguments.get(this_key) is not None
+        }
+        return _table_to_json(
+            find_nuclides(
+                energy,
+                _to_quantity(arguments["window"], u.keV),
+                emission_type=arguments.get("emission_type"),
+                min_intensity=arguments.get("min_intensity", 0.0),
+                **half_life,
+            )
+        )
+
+
+async def serve(host: str = "127.0.0.1", port: int = 8080, **kwargs):
+    """
+    Run a `ComputeServer` until cancelled.
+
+    Parameters
+    ----------
+    host : str, optional
+        The address to listen on.
+    port : int, optional
+        The port to listen on.
+    **kwargs
+        The other arguments of `ComputeServer`.
+    """
+    server = ComputeServer(host, port, **kwargs)
+    await server.start()
+    print(f"Serving on http://{server.host}:{server.port}", file=sys.stderr)
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+
+@lru_cache(maxsize=_MATERIAL_CACHE_SIZE)
+def _get_material(material_key) -> Material:
+    """Return the material of a JSON material key, whose data is only read once."""
+    return Material(json.loads(material_key), 1 * u.cm)
+
+
+def _check_type(value, name, *types):
+    """Raise a TypeError if a JSON value is not one of the given types, where
+    float stands for any JSON number."""
+    if float in types and isinstance(value, int) and not isinstance(value, bool):
+        return
+    if not isinstance(value, types):
+        expected = " or ".join(_JSON_TYPE_NAMES[this_type] for this_type in types)
+        found = _JSON_TYPE_NAMES.get(type(value), type(value).__name__)
+        if isinstance(value, (bool, int)):
+            found = "a boolean" if isinstance(value, bool) else "a number"
+        raise TypeError(f"{name} must be {expected}, not {found}.")
+
+
+def _check_layer(layer, name):
+    """Raise a TypeError if a layer does not have the JSON types of a layer."""
+    _check_type(layer, name, dict)
+    material = layer.get("material")
+    _check_type(material, f"{name}.material", str, dict)
+    if isinstance(material, dict):
+        for this_name, this_fraction in material.items():
+            _check_type(this_fraction, f"{name}.material.{this_name}", float)
+    _check_type(layer.get("thickness"), f"{name}.thickness", str, float)
+    _check_type(layer.get("density"), f"{name}.density", str, float, type(None))
+
+
+def _check_configuration(configuration):
+    """Raise a TypeError if a configuration does not have the JSON types of a
+    configuration, so that it is rejected before it is evaluated."""
+    layers = configuration.get("layers")
+    _check_type(layers, "layers", list)
+    for i, layer in enumerate(layers):
+        _check_layer(layer, f"layers[{i}]")
+    if configuration.get("detector"):
+        _check_layer(configuration["detector"], "detector")
+    energy = configuration.get("energy")
+    _check_type(energy, "energy", dict, list, float)
+    if isinstance(energy, dict):
+        for this_key in ("low", "high", "step"):
+            _check_type(energy.get(this_key), f"energy.{this_key}", str, float)
+    elif isinstance(energy, list):
+        for i, this_energy in enumerate(energy):
+            _check_type(this_energy, f"energy[{i}]", float)
+
+
+def _parse_layer(layer):
+    """Return the JSON material key and the areal density (g/cm^2) of a layer."""
+    material_key = json.dumps(layer["material"], sort_keys=True)
+    density = layer.get("density")
+    if density is None or density == "":
+        density = _get_material(material_key).density
+    else:
+        density = _to_quantity(density, u.g / u.cm**3)
+    areal_density = (_to_quantity(layer["thickness"], u.cm) * density).to_value(u.g / u.cm**2)
+    return material_key, areal_density
+
+
+def _parse_configuration(configuration):
+    """Return the layers and the detector (or None) of a configuration."""
+    layers = [_parse_layer(layer) for layer in configuration["layers"]]
+    if not layers:
+        raise ValueError("A configuration needs at least one layer.")
+    detector = configuration.get("detector")
+    return layers, None if not detector else _parse_layer(detector)
+
+
+def _evaluate_configurations(configurations, energy_kev):
+    """Return the transmission or response of parsed configurations on the same
+    energies. The mass attenuation coefficient of each material is interpolated
+    once and the optical depths of all configurations are a matrix product."""
+    material_keys = sorted(
+        {
+            material_key
+            for layers, detector in configurations
+            for material_key, _ in layers + ([detector] if detector else [])
+        }
+    )
+    position = {material_key: i for i, material_key in enumerate(material_keys)}
+    coefficients = np.array(
+        [
+            _get_material(material_key)._mass_attenuation_values(energy_kev)
+            for material_key in material_keys
+        ]
+    ).reshape(len(material_keys), len(energy_kev))
+    path_density = np.zeros((len(configurations), len(material_keys)))
+    detector_density = np.zeros((len(configurations), len(material_keys)))
+    for i, (layers, detector) in enumerate(configurations):
+        for material_key, areal_density in layers:
+            path_density[i, position[material_key]] += areal_density
+        if detector is not None:
+            detector_density[i, position[detector[0]]] += detector[1]
+    result = np.exp(-path_density @ coefficients)
+    has_detector = np.array([detector is not None for _, detector in configurations])
+    result[has_detector] *= 1 - np.exp(-detector_density[has_detector] @ coefficients)
+    return list(result)
+
+
+def _table_to_json(table) -> dict:
+    """Return a table as a mapping of column names to lists, with masked and
+    not-a-number values as None, and the units of the columns in ``units``."""
+    result = {"units": {}}
+    for name in table.colnames:
+        column = table[name]
+        if getattr(column, "unit", None) is not None:
+            result["units"][name] = str(column.unit)
+        values = np.asarray(getattr(column, "value", column))
+        mask = np.asarray(getattr(column, "mask", np.zeros(len(values), dtype=bool)))
+        values = np.asarray(getattr(values, "data", values))
+        if values.dtype.kind == "f":
+            mask = mask | np.isnan(values)
+        result[name] = [
+            None if this_mask else this_value
+            for this_value, this_mask in zip(values.tolist(), np.broadcast_to(mask, values.shape))
+        ]
+    return result
+
+
+def _dumps(result) -> bytes:
+    return json.dumps(result).encode("utf-8")
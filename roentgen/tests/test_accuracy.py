@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+import astropy.units as u
+
+from roentgen.absorption import accuracy
+from roentgen.absorption.accuracy import (
+    check_evaluation_modes,
+    compare_evaluation_modes,
+    get_cxro_references,
+)
+from roentgen.cli import main
+
+
+@pytest.fixture(scope="module")
+def comparison():
+    return compare_evaluation_modes(repeat=1)
+
+
+def test_get_cxro_references():
+    references = get_cxro_references()
+    assert len(references) == 6
+    for material, energy, transmission in references:
+        assert energy.unit == u.keV
+        assert len(energy) == len(transmission)
+        assert np.all((transmission >= 0) & (transmission <= 1))
+
+
+def test_all_modes_within_tolerance(comparison):
+    assert len(comparison) == 6 * len(accuracy._MODES)
+    failed = comparison[~comparison["passed"]]
+    assert len(failed) == 0, str(failed)
+
+
+def test_default_is_baseline(comparison):
+    default = comparison[comparison["mode"] == "default"]
+    assert np.all(default["max error"] == 0)
+    assert np.all(default["speedup"] == 1)
+
+
+def test_default_agrees_with_cxro(comparison):
+    # the NIST and CXRO data differ most near edges, see docs/guide/cxro_compare.rst
+    default = comparison[comparison["mode"] == "default"]
+    assert np.all(default["cxro max error"] < 0.05)
+
+
+def test_tolerance_exceeded(monkeypatch):
+    def _offset(material, energy_kev):
+        return lambda: np.exp(-material._optical_depth_values(energy_kev)) + 1e-3
+
+    monkeypatch.setitem(accuracy._MODES, "offset", (_offset, 1e-4, 0.0))
+    comparison = compare_evaluation_modes(["offset"], repeat=1)
+    assert not np.any(comparison[comparison["mode"] == "offset"]["passed"])
+    with pytest.raises(ValueError, match="offset"):
+        check_evaluation_modes(["offset"], repeat=1)
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        compare_evaluation_modes(["float16"])
+
+
+def test_main_accuracy(capsys):
+    assert main(["accuracy", "--repeat", "1"]) == 0
+    assert "adaptive grid" in capsys.readouterr().out
@@ -0,0 +1,210 @@
+import csv
+import json
+
+import numpy as np
+import pytest
+
+import astropy.units as u
+
+import roentgen.cli
+from roentgen.absorption import Material, Response, Stack
+from roentgen.cli import evaluate_configuration, evaluate_configurations, main, read_configurations
+
+configurations = [
+    {
+        "name": "be_si",
+        "layers": [{"material": "Be", "thickness": "100 um"}],
+        "detector": {"material": "Si", "thickness": "500 um"},
+    },
+    {
+        "name": "al_air",
+        "layers": [
+            {"material": "Al", "thickness": "1 mm"},
+            {"material": "air", "thickness": "1 m", "density": "1.2 kg / m3"},
+        ],
+        "energy": {"low": 5, "high": 20, "step": 1},
+    },
+]
+
+
+def expected_values(energy):
+    be_si = Response(Material("Be", 100 * u.um), detector=Material("Si", 500 * u.um))
+    al_air = Stack(
+        [Material("Al", 1 * u.mm), Material("air", 1 * u.m, density=1.2 * u.kg / u.m**3)]
+    )
+    return be_si.response(energy), al_air.transmission(u.Quantity(np.arange(5, 21), "keV"))
+
+
+@pytest.fixture
+def json_file(tmp_path):
+    file_path = tmp_path / "configurations.json"
+    file_path.write_text(json.dumps(configurations))
+    return file_path
+
+
+def test_read_configurations_formats(tmp_path, json_file):
+    csv_path = tmp_path / "configurations.csv"
+    csv_path.write_text(
+        "name,materials,thicknesses,densities,detector,detector_thickness,energy_low,energy_high,energy_step\n"
+        "be_si,Be,100 um,,Si,500 um,,,\n"
+        "al_air,Al;air,1 mm;1 m,;1.2 kg / m3,,,5,20,1\n"
+    )
+    yaml_path = tmp_path / "configurations.yaml"
+    yaml_path.write_text(
+        "- name: be_si\n"
+        "  layers:\n"
+        "    - {material: Be, thickness: 100 um}\n"
+        "  detector: {material: Si, thickness: 500 um}\n"
+        "- name: al_air\n"
+        "  layers:\n"
+        "    - {material: Al, thickness: 1 mm}\n"
+        "    - {material: air, thickness: 1 m, density: 1.2 kg / m3}\n"
+        "  energy: {low: 5, high: 20, step: 1}\n"
+    )
+    energy = u.Quantity(np.arange(1, 10), "keV")
+    for file_path in [json_file, csv_path, yaml_path]:
+        results = [evaluate_configuration(this, energy) for this in read_configurations(file_path)]
+        assert [name for name, _, _ in results] == ["be_si", "al_air"]
+        for (_, _, values), expected in zip(results, expected_values(energy)):
+            assert np.allclose(values, expected)
+
+
+def test_read_configurations_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        read_configurations(tmp_path / "configurations.txt")
+
+
+def test_read_configurations_default_units(tmp_path):
+    csv_path = tmp_path / "configurations.csv"
+    csv_path.write_text("name,materials,thicknesses,densities\nal,Al,1,2.7\n")
+    energy = u.Quantity(np.arange(5, 20), "keV")
+    _, _, values = evaluate_configuration(read_configurations(csv_path)[0], energy)
+    expected = Material("Al", 1 * u.mm, density=2.7 * u.g / u.cm**3).transmission(energy)
+    assert np.allclose(values, expected)
+
+
+@pytest.mark.parametrize(
+    "text,match",
+    [
+        ("name,materials\nbe,Be\n", "thicknesses"),
+        ("name,materials,thicknesses,detector\nbe,Be,1,Si\n", "Configuration 1 .*detector"),
+        (
+            "name,materials,thicknesses,detector,detector_thickness\nbe,Be,1,,\nbe_si,Be,1,Si,\n",
+            "Configuration 2 .*detector without a thickness",
+        ),
+        ("name,materials,thicknesses\nbe,Be,1\nbe,Be,\n", "Configuration 2 .*thickness"),
+        ("name,materials,thicknesses,energy_low\nbe,Be,1,5\n", "Configuration 1 .*high"),
+        ("name,materials,thicknesses\nbe,Be;Si,1\n", "Configuration 1 "),
+        ("name,materials,thicknesses,energy_high\nbe,Be,1,20\n", "Configuration 1 .*without low"),
+        (
+            "name,materials,thicknesses,energy_high,energy_step\nbe,Be,1,,0.1\n",
+            "Configuration 1 .*without low",
+        ),
+        ("name,materials,thicknesses\nbe,unobtainium,1\n", "unknown material unobtainium"),
+        ("name,materials,thicknesses\nbe,Be;Si,1;1 keV\n", "thickness '1 keV' .*length"),
+        ("name,materials,thicknesses,densities\nbe,Be,1,thick\n", "density 'thick' .*density"),
+        ("name,materials,thicknesses,densities\nbe,Be,1,1 mm\n", "Configuration 1 .*density"),
+        (
+            "name,materials,thicknesses,energy_low,energy_high,energy_step\nbe,Be,1,1 um,2,1\n",
+            "energy low '1 um' .*energy",
+        ),
+    ],
+)
+def test_read_configurations_csv_missing_values(tmp_path, text, match):
+    csv_path = tmp_path / "configurations.csv"
+    csv_path.write_text(text)
+    with pytest.raises(ValueError, match=match):
+        read_configurations(csv_path)
+
+
+def test_read_configurations_json_missing_values(tmp_path):
+    json_path = tmp_path / "configurations.json"
+    json_path.write_text(json.dumps([configurations[0], {"name": "be", "layers": []}]))
+    with pytest.raises(ValueError, match="Configuration 2 .*no layers"):
+        read_configurations(json_path)
+    json_path.write_text(json.dumps([{"name": "be", "layers": [{"material": "Be"}]}]))
+    with pytest.raises(ValueError, match="Configuration 1 .*thickness"):
+        read_configurations(json_path)
+
+
+def test_read_configurations_json_invalid_values(tmp_path):
+    json_path = tmp_path / "configurations.json"
+    layer = {"material": {"Be": 0.5, "unobtainium": 0.5}, "thickness": "1 mm"}
+    json_path.write_text(json.dumps([{"name": "be", "layers": [layer]}]))
+    with pytest.raises(ValueError, match="unknown material unobtainium"):
+        read_configurations(json_path)
+    layer = {"material": "Be", "thickness": [1, 2]}
+    json_path.write_text(json.dumps([{"name": "be", "layers": [layer]}]))
+    with pytest.raises(ValueError, match="not a single value"):
+        read_configurations(json_path)
+    json_path.write_text(json.dumps([dict(configurations[0], energy=[1, 2, 3])]))
+    with pytest.raises(ValueError, match="not a mapping"):
+        read_configurations(json_path)
+
+
+def test_evaluate_configuration_reuses_materials():
+    roentgen.cli._get_material.cache_clear()
+    energy = u.Quantity(np.arange(1, 10), "keV")
+    list(evaluate_configurations(configurations * 3, energy))
+    info = roentgen.cli._get_material.cache_info()
+    assert info.currsize == 4
+    assert info.hits == 8
+    mixture = {"material": {"Si": 0.5, "Ge": 0.5}, "thickness": "1 mm"}
+    _, _, values = evaluate_configuration({"name": "sige", "layers": [mixture]}, energy)
+    expected = Material({"Si": 0.5, "Ge": 0.5}, 1 * u.mm).transmission(energy)
+    assert np.allclose(values, expected)
+
+
+def test_evaluate_configuration_requires_energy():
+    with pytest.raises(ValueError):
+        evaluate_configuration(configurations[0])
+
+
+@pytest.mark.parametrize("n_workers", [1, 2])
+def test_evaluate_configurations_workers(n_workers):
+    energy = u.Quantity(np.arange(1, 10), "keV")
+    results = list(evaluate_configurations(configurations * 3, energy, n_workers=n_workers))
+    assert [name for name, _, _ in results] == ["be_si", "al_air"] * 3
+    for (_, this_energy, values), expected in zip(results, expected_values(energy) * 3):
+        assert len(this_energy) == len(values)
+        assert np.allclose(values, expected)
+
+
+def test_main_csv(tmp_path, json_file, capsys):
+    output = tmp_path / "results.csv"
+    main(
+        [
+            "batch",
+            str(json_file),
+            str(output),
+            "--energy-low",
+            "1",
+            "--energy-high",
+            "9",
+            "--energy-step",
+            "1",
+        ]
+    )
+    with open(output, newline="") as csv_file:
+        rows = list(csv.DictReader(csv_file))
+    assert len(rows) == 9 + 16
+    be_si = [float(row["response"]) for row in rows if row["name"] == "be_si"]
+    assert np.allclose(be_si, expected_values(u.Quantity(np.arange(1, 10), "keV"))[0])
+    assert "configurations/s" in capsys.readouterr().err
+
+
+def test_main_npz(tmp_path, json_file):
+    output = tmp_path / "results.npz"
+    main(["batch", str(json_file), str(output), "--workers", "2"])
+    with np.load(output) as results:
+        assert list(results["names"]) == ["be_si", "al_air"]
+        assert np.allclose(results["energy_0"], np.linspace(1, 50, 491))
+        assert np.allclose(results["response_1"], expected_values(results["energy_0"] * u.keV)[1])
+
+
+def test_main_parquet(tmp_path, json_file):
+    pq = pytest.importorskip("pyarrow.parquet")
+    output = tmp_path / "results.parquet"
+    main(["batch", str(json_file), str(output)])
+    table = pq.read_table(output)
+    assert table.num_rows == 491 + 16
@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+from scipy.linalg import expm
+
+import astropy.units as u
+
+from roentgen.nuclides import DecayChain, Nuclide, nuclides_list
+
+all_parents = [
+    (str(row["symbol"]), int(row["mass_number"]), bool(row["metastable"])) for row in nuclides_list
+]
+
+
+@pytest.mark.parametrize("parent", all_parents)
+def test_activity_matches_matrix_exponential(parent):
+    """Check the solution against the matrix exponential of the Bateman equations"""
+    chain = DecayChain(parent, 10 * u.Bq)
+    decay_constant = chain.decay_constant.to_value(1 / u.s)
+    matrix = chain.branching_ratio * decay_constant - np.diag(decay_constant)
+    initial_atoms = np.zeros(len(decay_constant))
+    initial_atoms[0] = 10 / decay_constant[0]
+    half_life = np.log(2) / decay_constant[0]
+    time = np.array([0, 0.1, 1, 10]) * half_life
+    activity = chain.activity(time * u.s).to_value(u.Bq)
+    assert activity.shape == (4, len(chain.nuclides))
+    for this_time, this_activity in zip(time, activity):
+        expected = expm(matrix * this_time) @ initial_atoms * decay_constant
+        assert np.allclose(this_activity, expected, rtol=1e-6, atol=1e-9 * 10)
+
+
+def test_decay_parent():
+    cs137 = DecayChain("Cs-137", 1 * u.MBq)
+    activity = cs137.activity([0, 30.018125586229623] * u.yr)
+    assert u.allclose(activity[:, 0], [1, 0.5] * u.MBq)
+
+
+def test_decay_branching():
+    """Check the equilibrium of a daughter fed by a branch"""
+    chain = DecayChain("Ag-108m")
+    assert chain.nuclides == ["Ag-108m", "Ag-108"]
+    assert chain.branching_ratio[1, 0] == pytest.approx(0.091)
+    activity = chain.activity(1 * u.yr)
+    assert (activity[1] / activity[0]).to_value(u.one) == pytest.approx(0.091, rel=1e-3)
+
+
+def test_decay_secular_equilibrium():
+    chain = DecayChain("Ra-226")
+    activity = chain.activity(100 * u.yr)
+    ratio = activity[chain.nuclides.index("Rn-222")] / activity[0]
+    assert ratio.to_value(u.one) == pytest.approx(1, rel=1e-3)
+
+
+def test_decay_many_parents():
+    parents = ["Am-241", "Cs-137", ("Ra", 226), Nuclide("Co", 57)]
+    chain = DecayChain(parents, [1, 2, 3, 4] * u.Bq)
+    assert chain.parents == ["Am-241", "Cs-137", "Ra-226", "Co-57"]
+    time = np.linspace(0, 100, 100_000) * u.yr
+    activity = chain.activity(time)
+    assert activity.shape == (100_000, len(chain.nuclides))
+    for parent, initial in zip(chain.parents, [1, 2, 3, 4]):
+        single = DecayChain(parent, initial * u.Bq)
+        position = [chain.nuclides.index(this_name) for this_name in single.nuclides]
+        assert u.allclose(activity[::1000, position[0]], single.activity(time[::1000])[:, 0])
+
+
+def test_line_rates():
+    chain = DecayChain("Co-57", 100 * u.Bq)
+    lines, rates = chain.line_rates([0, 1] * u.yr, 100 * u.keV, 130 * u.keV)
+    assert np.all((lines["energy"] >= 100 * u.keV) & (lines["energy"] <= 130 * u.keV))
+    assert rates.shape == (2, len(lines))
+    line = np.argmin(np.abs(lines["energy"] - 122.06065 * u.keV))
+    assert rates[0, line].to_value(1 / u.s) == pytest.approx(85.49)
+    activity = chain.activity(1 * u.yr)[0]
+    assert rates[1, line].to_value(1 / u.s) == pytest.approx(activity.to_value(u.Bq) * 0.8549)
+
+
+def test_decay_bad_input():
+    with pytest.raises(KeyError):
+        DecayChain("Co-1")
+    with pytest.raises(ValueError):
+        DecayChain("Co 57")
+
+
+@pytest.mark.parametrize(
+    "parent,members,isomer,energy",
+    [
+        ("Mo-99", ["Mo-99", "Tc-99"], "Tc-99m", 140.511),
+        ("Cs-137", ["Cs-137"], "Ba-137m", 661.6553),
+    ],
+)
+def test_decay_skips_isomers(parent, members, isomer, energy):
+    """The LARA daughters are never metastable, so chains go to the ground
+    state (Ba-137 is stable and ends the chain) and the gamma rays of the
+    isomer are lines of the parent."""
+    chain = DecayChain(parent)
+    assert chain.nuclides == members
+    assert DecayChain(isomer).nuclides[0] == isomer
+    lines = chain.lines[np.isclose(chain.lines["energy"].to_value("keV"), energy)]
+    assert list(lines["nuclide"]) == [parent]
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+import astropy.units as u
+
+from roentgen.absorption import EventThinner, Material, Response
+
+optical_path = Material("Be", 100 * u.um) + Material("air", 10 * u.cm)
+response = Response(optical_path, detector=Material("cdte", 1 * u.mm))
+rng = np.random.default_rng(42)
+events = u.Quantity(rng.uniform(1, 200, 100_000), "keV")
+
+
+@pytest.mark.parametrize("model", [Material("Al", 1 * u.mm), optical_path, response])
+def test_probability_matches_model(model):
+    thinner = EventThinner(model)
+    energy = u.Quantity(np.geomspace(1, 20000, 10_000), "keV")
+    if isinstance(model, Response):
+        expected = model.response(energy)
+    else:
+        expected = model.transmission(energy)
+    assert np.allclose(thinner.detection_probability(energy), expected, atol=1e-4)
+
+
+def test_bad_model():
+    with pytest.raises(TypeError):
+        EventThinner("Si")
+
+
+def test_detected_fraction():
+    thinner = EventThinner(response)
+    detected = np.concatenate(list(thinner.thin(events, chunk_size=10_000, seed=1)))
+    assert isinstance(detected, u.Quantity)
+    expected = np.sum(response.response(events))
+    assert np.isclose(len(detected), expected, rtol=0.02)
+
+
+def test_reproducible_across_workers():
+    thinner = EventThinner(response)
+    serial = np.concatenate(list(thinner.thin(events, chunk_size=7_000, seed=5)))
+    parallel = np.concatenate(list(thinner.thin(events, chunk_size=7_000, seed=5, n_workers=4)))
+    assert np.array_equal(serial, parallel)
+
+
+def test_generator_and_memmap_input(tmp_path):
+    thinner = EventThinner(response)
+    values = events.to_value("keV")
+    memmap = np.lib.format.open_memmap(
+        tmp_path / "events.npy", mode="w+", dtype=float, shape=values.shape
+    )
+    memmap[:] = values
+    from_memmap = np.concatenate(list(thinner.thin(memmap, chunk_size=10_000, seed=3)))
+    chunks = (values[i : i + 10_000] for i in range(0, len(values), 10_000))
+    from_generator = np.concatenate(list(thinner.thin(chunks, seed=3)))
+    assert np.array_equal(from_memmap, from_generator)
+
+
+def test_raise_outside_of_data_range():
+    thinner = EventThinner(response)
+    with pytest.raises(ValueError):
+        thinner.detect(u.Quantity([0.5, 10], "keV"))
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+import astropy.units as u
+
+from roentgen.absorption import Material, Response, Stack, adaptive_energy_grid
+
+models = [
+    Material("Au", 10 * u.um),
+    Stack([Material("air", 10 * u.cm), Material("Al", 1 * u.mm)]),
+    Response(Material("Be", 100 * u.um), detector=Material("cdte", 1 * u.mm)),
+]
+
+
+def evaluate(model, energy):
+    if isinstance(model, Response):
+        return model.response(energy)
+    return model.transmission(energy)
+
+
+@pytest.mark.parametrize("model", models)
+@pytest.mark.parametrize("rtol", [1e-2, 1e-3])
+def test_adaptive_energy_grid_tolerance(model, rtol):
+    """Check that interpolating on the grid is within the tolerance everywhere"""
+    energy = adaptive_energy_grid(model, 1 * u.keV, 100 * u.keV, rtol=rtol)
+    assert energy[0] == 1 * u.keV
+    assert energy[-1] == 100 * u.keV
+    assert np.all(np.diff(energy) > 0)
+    fine = u.Quantity(np.geomspace(1, 100, 100_001), "keV")
+    exact = evaluate(model, fine)
+    interpolated = np.interp(fine.value, energy.value, evaluate(model, energy))
+    assert np.all(np.abs(interpolated - exact) <= rtol * np.abs(exact) + 1e-12)
+
+
+def test_adaptive_energy_grid_edges():
+    """Check that there is a node on both sides of an edge"""
+    energy = adaptive_energy_grid(Material("Au", 10 * u.um), 70 * u.keV, 90 * u.keV)
+    assert 80.72 * u.keV in energy
+    assert np.any(np.isclose(energy.value, 80.72 - 1e-6, rtol=0, atol=1e-9))
+
+
+def test_adaptive_energy_grid_smaller():
+    resp = Response(Material("Be", 100 * u.um), detector=Material("Si", 500 * u.um))
+    energy = adaptive_energy_grid(resp, 1 * u.keV, 50 * u.keV, rtol=1e-3)
+    assert len(energy) < len(np.arange(1, 50, 0.1)) / 2
+
+
+def test_adaptive_energy_grid_bad_input():
+    material = Material("Si", 1 * u.mm)
+    with pytest.raises(ValueError):
+        adaptive_energy_grid(material, 0.5 * u.keV, 10 * u.keV)
+    with pytest.raises(ValueError):
+        adaptive_energy_grid(material, 10 * u.keV, 1 * u.keV)
+    with pytest.raises(ValueError):
+        adaptive_energy_grid(material, 1 * u.keV, 10 * u.keV, rtol=0)
+    with pytest.raises(ValueError):
+        adaptive_energy_grid(material, 1 * u.keV, 10 * u.keV, rtol=1e-9, max_nodes=10)
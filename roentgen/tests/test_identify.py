@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+import astropy.units as u
+
+from roentgen.lines import identify_peaks
+
+
+@pytest.mark.parametrize(
+    "energy,label",
+    [
+        (6.404 * u.keV, "Fe"),
+        (8.048 * u.keV, "Cu"),
+        (22.163 * u.keV, "Ag"),
+    ],
+)
+def test_identify_xrf_peaks(energy, label):
+    candidates = identify_peaks(energy, 10 * u.eV, sources=("xrf",))
+    assert candidates[candidates["rank"] == 0]["label"][0] == label
+
+
+@pytest.mark.parametrize(
+    "energy,label",
+    [
+        (661.66 * u.keV, ("Cs-137", "Ba-137m")),
+        (1332.5 * u.keV, ("Co-60",)),
+        (59.54 * u.keV, ("Am-241", "U-237")),
+    ],
+)
+def test_identify_nuclide_peaks(energy, label):
+    candidates = identify_peaks(energy, 0.2 * u.keV, sources=("nuclide",))
+    assert candidates[candidates["rank"] == 0]["label"][0] in label
+
+
+def test_candidates_within_tolerance_and_ranked():
+    peaks = np.random.default_rng(0).uniform(1, 2000, 1000) * u.keV
+    candidates = identify_peaks(peaks, 1 * u.keV, tolerance=2, max_candidates=3)
+    assert np.all(np.abs(candidates["delta"]) <= 2 * u.keV)
+    assert np.all(candidates["rank"] < 3)
+    for peak in np.unique(candidates["peak"])[:50]:
+        scores = candidates[candidates["peak"] == peak]["score"]
+        assert np.all(np.diff(scores) <= 0)
+
+
+def test_identify_batch():
+    spectra = [[6.404, 8.048] * u.keV, [22.163] * u.keV]
+    candidates = identify_peaks(spectra, [[10, 10] * u.eV, [10] * u.eV], sources=("xrf",))
+    best = candidates[candidates["rank"] == 0]
+    assert list(best["spectrum"]) == [0, 0, 1]
+    assert list(best["peak"]) == [0, 1, 0]
+    assert list(best["label"]) == ["Fe", "Cu", "Ag"]
+
+
+def test_identify_bad_input():
+    with pytest.raises(ValueError):
+        identify_peaks(6.4 * u.keV, 0 * u.eV)
+    with pytest.raises(ValueError):
+        identify_peaks(6.4 * u.keV, 10 * u.eV, sources=("optical",))
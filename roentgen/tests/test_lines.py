@@ -1,10 +1,21 @@
+import numpy as np
 import pytest
 
 import astropy.units as u
 from astropy.table import QTable
 
 import roentgen
-from roentgen.lines import emission_lines, get_edges, get_lines
+from roentgen.absorption import MassAttenuationCoefficient, Material
+from roentgen.lines import (
+    absorption_edges,
+    emission_lines,
+    get_edge_indices,
+    get_edges,
+    get_elements_with_edges,
+    get_line_indices,
+    get_lines,
+    get_material_edges,
+)
 
 # remove H and He and z > 92
 all_elements = list(roentgen.elements["symbol"])[2:-6]
@@ -68,3 +79,172 @@ def test_get_edges(element_str):
 def test_get_edges_values(element_str, edge_index, energy):
     """Check a few specific cases"""
     assert get_edges(element_str)[edge_index]["energy"] == energy
+
+
+def _select_lines(energy_low, energy_high, element=None, min_intensity=0):
+    """Select lines with a boolean mask over the whole table, as a reference."""
+    energies = emission_lines["energy"]
+    mask = (energies > energy_low) & (energies < energy_high)
+    if element is not None:
+        mask &= emission_lines["z"] == roentgen.util.get_atomic_number(element)
+    if min_intensity > 0:
+        mask &= emission_lines["intensity"] >= min_intensity
+    return np.flatnonzero(mask)
+
+
+@pytest.mark.parametrize("min_intensity", [0, 50])
+def test_get_line_indices_matches_mask(min_intensity):
+    """Check that the batched query gives the same lines as a mask per range"""
+    rng = np.random.default_rng(0)
+    energy_low = rng.uniform(0, 100, 200)
+    energy_high = energy_low + rng.uniform(0, 5, 200)
+    element = list(rng.choice(all_elements + [None] * 20, 200))
+    indices = get_line_indices(
+        energy_low * u.keV, energy_high * u.keV, element=element, min_intensity=min_intensity
+    )
+    assert len(indices) == 200
+    for index, low, high, this_element in zip(indices, energy_low, energy_high, element):
+        expected = _select_lines(low * u.keV, high * u.keV, this_element, min_intensity)
+        assert np.array_equal(np.sort(index), expected)
+        lines = get_lines(low * u.keV, high * u.keV, this_element, min_intensity)
+        assert len(lines) == len(expected)
+        if len(expected) > 0:
+            assert np.all(lines["energy"] == emission_lines["energy"][expected])
+
+
+@pytest.mark.parametrize(
+    "energy_low,energy_high",
+    [(1 * u.keV, 2 * u.MeV), (-5 * u.MeV, 10 * u.keV), (0 * u.keV, 1 * u.GeV)],
+)
+@pytest.mark.parametrize("element_str", ["Fe", "Co", "U"])
+def test_get_lines_element_wide_range(energy_low, energy_high, element_str):
+    """Check that wide ranges do not return the lines of other elements"""
+    lines = get_lines(energy_low, energy_high, element=element_str)
+    expected = _select_lines(energy_low, energy_high, element_str)
+    assert len(lines) == len(expected) > 0
+    assert np.all(lines["symbol"] == element_str)
+
+
+def test_get_lines_returns_copy():
+    """Check that changing a result does not change the emission lines"""
+    intensity = emission_lines["intensity"].copy()
+    lines = get_lines(6 * u.keV, 7 * u.keV, element="Fe")
+    lines["intensity"][0] = -999
+    lines = get_lines(0 * u.keV, 200 * u.keV)
+    lines["intensity"][:] = -999
+    assert np.all(emission_lines["intensity"] == intensity)
+
+
+def test_get_line_indices_bad_element():
+    with pytest.raises(ValueError):
+        get_line_indices([1, 2] * u.keV, [3, 4] * u.keV, element=["Fe"])
+
+
+@pytest.mark.parametrize("element_str", all_elements)
+def test_get_material_edges_element(element_str):
+    """Check that the edges of an element are the same as from get_edges"""
+    edges = get_material_edges(element_str)
+    assert np.all(edges["symbol"] == element_str)
+    assert np.all(np.sort(get_edges(element_str)["energy"]) == edges["energy"])
+
+
+@pytest.mark.parametrize(
+    "material,symbols",
+    [
+        ("cdte", ["Cd", "Te"]),
+        ("air", ["Ar"]),
+        ({"Si": 0.5, "cdte": 0.5}, ["Cd", "Si", "Te"]),
+        (Material({"Si": 0.5, "Ge": 0.5}, 1 * u.mm), ["Ge", "Si"]),
+    ],
+)
+def test_get_material_edges_constituents(material, symbols):
+    edges = get_material_edges(material, 1.5 * u.keV)
+    assert sorted(set(edges["symbol"])) == symbols
+    assert np.all(edges["energy"] >= 1.5 * u.keV)
+    assert np.all(np.diff(edges["energy"]) >= 0)
+
+
+@pytest.mark.parametrize(
+    "material,symbols",
+    [
+        ("mylar", ["C", "H", "O"]),
+        ("water", ["H", "O"]),
+        ("air", ["Ar", "C", "N", "O"]),
+        ("Polyvinyl Chloride", ["C", "Cl", "H"]),
+    ],
+)
+def test_get_material_edges_all_constituents(material, symbols):
+    """Check that elements without edges above 1 keV are included"""
+    assert sorted(set(get_material_edges(material)["symbol"])) == symbols
+
+
+@pytest.mark.parametrize("symbol", roentgen.compounds["symbol"])
+def test_get_material_edges_compounds(symbol):
+    assert len(get_material_edges(symbol)) > 0
+
+
+@pytest.mark.parametrize("symbol", roentgen.compounds["symbol"])
+def test_compound_elements_explain_attenuation_edges(symbol):
+    """Check that every edge in the attenuation data of a compound is an edge
+    of one of its elements, the NIST and CXRO edge energies differ by up to 1%"""
+    edges = get_material_edges(symbol)["energy"].to_value("eV")
+    for this_edge in MassAttenuationCoefficient(symbol).edges.to_value("eV"):
+        assert np.any(np.abs(edges - this_edge) <= 0.01 * this_edge), this_edge
+
+
+def test_get_material_edges_unknown():
+    with pytest.raises(ValueError):
+        get_material_edges("unobtainium")
+
+
+def test_get_material_edges_inclusive():
+    edges = get_material_edges("Fe", 7112 * u.eV, 7112 * u.eV)
+    assert len(edges) == 1
+    assert edges["edge name"][0] == "K"
+
+
+def test_get_elements_with_edges():
+    edges = get_elements_with_edges(8.9 * u.keV, 9 * u.keV)
+    assert "Cu" in edges["symbol"]
+    assert np.all((edges["energy"] >= 8.9 * u.keV) & (edges["energy"] <= 9 * u.keV))
+    assert len(get_elements_with_edges(1 * u.MeV, 2 * u.MeV)) == 0
+
+
+def _select_edges(energy_low, energy_high, material=None):
+    """Select the edges with a mask over the table, to compare with get_edge_indices."""
+    energy = absorption_edges["energy"].to_value("eV")
+    mask = (energy >= energy_low) & (energy <= energy_high)
+    if material is not None:
+        symbols = set(get_material_edges(material)["symbol"])
+        mask &= np.isin(absorption_edges["symbol"], list(symbols))
+    return np.nonzero(mask)[0]
+
+
+def test_get_edge_indices():
+    rng = np.random.default_rng(2)
+    energy_low = rng.uniform(0, 100e3, 50)
+    energy_high = energy_low + rng.uniform(0, 20e3, 50)
+    materials = [None, "Fe", "cdte", "water", {"Si": 0.5, "air": 0.5}] * 10
+    indices = get_edge_indices(energy_low * u.eV, energy_high * u.eV, materials)
+    assert len(indices) == 50
+    for index, low, high, material in zip(indices, energy_low, energy_high, materials):
+        assert np.array_equal(index, _select_edges(low, high, material))
+
+
+def test_get_edge_indices_defaults():
+    assert np.array_equal(get_edge_indices()[0], np.arange(len(absorption_edges)))
+    assert np.all(np.diff(absorption_edges["energy"]) >= 0)
+    index = get_edge_indices(material=["Fe", "U"])
+    assert set(absorption_edges["symbol"][index[0]]) == {"Fe"}
+    assert set(absorption_edges["symbol"][index[1]]) == {"U"}
+
+
+def test_get_edge_indices_mismatch():
+    with pytest.raises(ValueError):
+        get_edge_indices([1, 2] * u.keV, [3, 4] * u.keV, ["Fe", "Cu", "Ni"])
+
+
+def test_get_material_edges_copy():
+    edges = get_material_edges("Fe")
+    edges["z"][:] = 0
+    assert np.all(absorption_edges["z"] > 0)
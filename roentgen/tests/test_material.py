@@ -247,3 +247,43 @@ def test_repr_str():
     this_mat = Material(a, 5 * u.m)
     assert isinstance(this_mat.__repr__(), str)
     assert isinstance(this_mat.__str__(), str)
+
+
+def test_sample_interaction_depth_within_thickness():
+    mat = Material("cdte", 2 * u.mm)
+    energy = u.Quantity(np.random.default_rng(0).uniform(10, 500, 100_000), "keV")
+    depth = mat.sample_interaction_depth(energy, rng=1)
+    assert depth.shape == energy.shape
+    assert depth.unit == u.mm
+    assert np.all(depth >= 0 * u.mm) and np.all(depth <= mat.thickness)
+    assert mat.sample_interaction_depth(50 * u.keV, rng=1).isscalar
+
+
+@pytest.mark.parametrize("energy", [20 * u.keV, 100 * u.keV, 500 * u.keV])
+def test_sample_interaction_depth_mean(energy):
+    """The mean depth should match that of the truncated exponential profile"""
+    mat = Material("Ge", 5 * u.mm)
+    depth = mat.sample_interaction_depth(np.full(200_000, energy.value) * energy.unit, rng=2)
+    mu = mat.linear_attenuation_coefficient(energy).to_value("1/mm")
+    thickness = mat.thickness.to_value("mm")
+    expected = 1 / mu - thickness * np.exp(-mu * thickness) / (1 - np.exp(-mu * thickness))
+    assert np.isclose(depth.to_value("mm").mean(), expected, rtol=0.01)
+
+
+def test_ray_transmission_matches_thicker_material():
+    mat = Material("Al", 100 * u.um)
+    energy = u.Quantity(np.arange(1, 100), "keV")
+    result = mat.ray_transmission(energy, path_scale=[1, 2.5])
+    assert result.shape == (2, len(energy))
+    assert np.allclose(result[0], mat.transmission(energy))
+    assert np.allclose(result[1], Material("Al", 250 * u.um).transmission(energy))
+
+
+def test_ray_transmission_bad_input():
+    mat = Material("Al", 100 * u.um)
+    with pytest.raises(ValueError):
+        mat.ray_transmission(energy_array)
+    with pytest.raises(ValueError):
+        mat.ray_transmission(energy_array, incidence_angle=[0, 10] * u.deg, path_scale=[1, 2])
+    with pytest.raises(ValueError):
+        mat.ray_transmission(energy_array, incidence_angle=[90] * u.deg)
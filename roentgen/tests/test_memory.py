@@ -0,0 +1,60 @@
+import numpy as np
+
+import astropy.units as u
+
+import roentgen
+from roentgen.absorption import Material
+from roentgen.nuclides import Nuclide
+from roentgen.nuclides.nuclides import _get_lara_store
+from roentgen.util import memory_size, memory_usage
+
+
+def test_memory_size_array():
+    values = np.zeros(1000)
+    assert memory_size(values) >= values.nbytes * u.byte
+    # an array is counted once however often it is referred to
+    assert memory_size([values, values]) < 2 * values.nbytes * u.byte
+    # a view keeps the array which owns the data
+    assert memory_size(values[:10]) >= values.nbytes * u.byte
+
+
+def test_memory_size_table():
+    table = roentgen.QTable([np.arange(1000), np.zeros(1000)], names=["a", "b"])
+    size = memory_size(table)
+    assert size >= (table["a"].nbytes + table["b"].nbytes) * u.byte
+    table.add_index("a")
+    assert memory_size(table) > size
+
+
+def test_memory_usage_default():
+    usage = memory_usage()
+    assert list(usage["name"][:5]) == [
+        "elements",
+        "compounds",
+        "emission_lines",
+        "binding_energies",
+        "nuclides_list",
+    ]
+    assert np.all(usage["size"] > 0)
+    # all of the tables are indexed
+    assert np.all(usage["index size"][:5] > 0)
+    assert np.all(usage["index size"] < usage["size"])
+    assert np.all(usage["unique size"] <= usage["size"])
+
+
+def test_memory_usage_materials():
+    usage = memory_usage([Material("Si", 1 * u.mm), Material("Si", 2 * u.mm)])
+    assert list(usage["name"]) == ["Silicon 0", "Silicon 1"]
+    assert list(usage["type"]) == ["Material", "Material"]
+    assert usage["size"][0] == usage["size"][1]
+    # each material holds its own mass attenuation data
+    assert usage["unique size"][1] > 0
+    assert np.all(usage["index size"] == 0)
+
+
+def test_memory_usage_nuclides():
+    # the emission tables of a nuclide are views of the store of all nuclides
+    usage = memory_usage({"store": _get_lara_store(), "Am-241": Nuclide("Am", 241)})
+    assert usage["size"][1] > usage["unique size"][1]
+    assert usage["unique size"][1] < usage["size"][0]
+    assert memory_size(Nuclide("Am", 241).lines) > 0 * u.byte
@@ -0,0 +1,141 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+import numpy as np
+import pytest
+
+import astropy.units as u
+
+from roentgen.nuclides import (
+    Nuclide,
+    get_lara_file,
+    get_nuclide,
+    get_nuclide_mass_numbers,
+    load_nuclides,
+    nuclides_list,
+    read_lara_header,
+    read_lara_tables,
+)
+from roentgen.nuclides.nuclides import (
+    _get_cached_nuclide,
+    _lara_directory,
+    _lara_store_file,
+    _pack_lara_files,
+)
+
+all_nuclides = [
+    (row["symbol"], int(row["mass_number"]), row["metastable"], str(row["filename"]))
+    for row in nuclides_list
+]
+
+
+def test_lara_store_up_to_date():
+    """Check that the store file holds the same data as the lara files"""
+    expected = _pack_lara_files()
+    with np.load(_lara_store_file) as store:
+        assert sorted(store.files) == sorted(expected.keys())
+        for key, value in expected.items():
+            np.testing.assert_array_equal(store[key], value)
+
+
+def test_nuclide_tables_read_only():
+    am241 = Nuclide("Am", 241)
+    energy = am241.lines["energy"].copy()
+    for this_table in [am241.lines, am241.emissions]:
+        with pytest.raises(ValueError):
+            this_table["intensity"][0] = -999
+        with pytest.raises(ValueError):
+            this_table["energy"][:] = 0 * u.keV
+    assert np.all(Nuclide("Am", 241).lines["energy"] == energy)
+    # copies can be changed
+    lines = am241.lines.copy()
+    lines["intensity"][0] = -999
+    assert Nuclide("Am", 241).lines["intensity"][0] != -999
+
+
+@pytest.mark.parametrize("symbol,mass_number,metastable,filename", all_nuclides)
+def test_nuclide_matches_lara_file(symbol, mass_number, metastable, filename):
+    """Check that the lines and metadata are the same as parsed from the lara file"""
+    nuclide = Nuclide(symbol, mass_number, metastable)
+    assert nuclide.meta == read_lara_header(_lara_directory / filename)
+    tables = read_lara_tables(_lara_directory / filename)
+    if len(tables[0]) == 0:
+        assert len(nuclide.lines) == 0
+        return
+    energy = np.sort(
+        np.concatenate([this_table["energy"].to_value("keV") for this_table in tables])
+    )
+    assert nuclide.lines.colnames == ["energy", "intensity", "origin", "parent"]
+    assert np.all(nuclide.lines["energy"] == energy * u.keV)
+    assert len(nuclide.emissions) == len(nuclide.lines)
+    assert np.all(nuclide.emissions["intensity"] == nuclide.lines["intensity"])
+
+
+def test_nuclide_emissions():
+    co57 = Nuclide("Co", 57)
+    line = co57.emissions[co57.emissions["energy"] == 122.06065 * u.keV][0]
+    assert line["energy_uncertainty"] == 0.00012
+    assert line["intensity_uncertainty"] == 0.14
+    assert line["type"] == "g"
+    assert line["origin"] == "Fe-57"
+    assert line["parent"] == "Co-57"
+    assert (line["level_start"], line["level_end"]) == (2, 1)
+    assert np.isnan(co57.emissions["level_start"][0])
+    assert co57.emissions["type"][0] == "XL"
+
+
+@pytest.mark.parametrize("symbol,mass_number,metastable,filename", all_nuclides)
+def test_get_lara_file(symbol, mass_number, metastable, filename):
+    assert get_lara_file(symbol, mass_number, metastable).name == filename
+    assert get_lara_file(symbol, mass_number, str(metastable)).name == filename
+
+
+def test_get_lara_file_metastable():
+    assert get_lara_file("Ag", 108).name == "Ag-108.lara.txt"
+    assert get_lara_file("Ag", 108, metastable=True).name == "Ag-108m.lara.txt"
+    with pytest.raises(KeyError):
+        get_lara_file("Co", 57, metastable=True)
+    with pytest.raises(KeyError):
+        get_lara_file("Co", 1)
+
+
+def test_get_nuclide_mass_numbers():
+    assert list(get_nuclide_mass_numbers("Ag")) == [108, 108, 110, 110]
+    with pytest.raises(ValueError):
+        get_nuclide_mass_numbers("Xx")
+
+
+def test_get_nuclide_cached():
+    am241 = get_nuclide("Am", 241)
+    assert get_nuclide("am", 241) is am241
+    assert get_nuclide("Ag", 108, True) is not get_nuclide("Ag", 108)
+    assert get_nuclide("Ag", 108, True).name == "Ag-108m"
+
+
+def test_get_nuclide_threads():
+    _get_cached_nuclide.cache_clear()
+    # start all requests at once so that they miss the cache together
+    barrier = threading.Barrier(8)
+
+    def get_co57(i):
+        barrier.wait()
+        return get_nuclide("Co", 57)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        result = list(executor.map(get_co57, range(8)))
+    co57 = get_nuclide("Co", 57)
+    assert all(this_nuclide is co57 for this_nuclide in result)
+
+
+def test_load_nuclides():
+    nuclides = load_nuclides(["Co-57", "ba133", ("Ag", 108, True), ("Am", 241)])
+    assert [this_nuclide.name for this_nuclide in nuclides] == [
+        "Co-57",
+        "Ba-133",
+        "Ag-108m",
+        "Am-241",
+    ]
+    assert nuclides[3] is get_nuclide("Am", 241)
+    assert len(load_nuclides()) == len(nuclides_list)
+    with pytest.raises(ValueError):
+        load_nuclides(["Am241x"])
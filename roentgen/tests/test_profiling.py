@@ -0,0 +1,81 @@
+import json
+
+import numpy as np
+import pytest
+
+import astropy.units as u
+
+from roentgen.absorption import MassAttenuationCoefficient, Material, Response
+from roentgen.lines import get_edges, get_lines
+from roentgen.nuclides import Nuclide, get_lara_file, read_lara_tables
+from roentgen.util import Profiler
+
+energy = u.Quantity(np.arange(5, 50), "keV")
+
+
+def test_profiler_sections():
+    with Profiler() as profiler:
+        MassAttenuationCoefficient("Si")
+        resp = Response(Material("Be", 100 * u.um), detector=Material("cdte", 1 * u.mm))
+        resp.response(energy)
+        get_lines(6 * u.keV, 7 * u.keV)
+        get_edges("Fe")
+        Nuclide("Am", 241)
+        read_lara_tables(get_lara_file("Fe", 55))
+    summary = profiler.summary()
+    for section in [
+        "absorption.load_data",
+        "absorption.build_interpolator",
+        "absorption.interpolate",
+        "absorption.units",
+        "absorption.exp",
+        "lines.units",
+        "lines.build_table",
+        "nuclides.build_table",
+        "nuclides.load_data",
+    ]:
+        assert section in summary["section"]
+    # one transmission for the optical path and one for the detector
+    exp = summary.loc["absorption.exp"]
+    assert exp["calls"] == 2
+    assert exp["size"] == 2 * len(energy)
+    assert np.all(np.diff(summary["time"]) <= 0)
+    assert profiler.to_dict()["absorption.exp"]["calls"] == 2
+
+
+def test_profiler_only_records_while_active():
+    profiler = Profiler()
+    Material("Si", 1 * u.mm).transmission(energy)
+    assert len(profiler.summary()) == 0
+    profiler.start()
+    Material("Si", 1 * u.mm).transmission(energy)
+    profiler.stop()
+    Material("Si", 1 * u.mm).transmission(energy)
+    assert profiler.summary().loc["absorption.exp"]["calls"] == 1
+
+
+def test_profiler_nested():
+    with Profiler() as outer:
+        Material("Si", 1 * u.mm).transmission(energy)
+        with Profiler() as inner:
+            Material("Si", 1 * u.mm).transmission(energy)
+    assert outer.summary().loc["absorption.exp"]["calls"] == 2
+    assert inner.summary().loc["absorption.exp"]["calls"] == 1
+
+
+def test_profiler_trace_events(tmp_path):
+    with Profiler(trace=True) as profiler:
+        Material("Si", 1 * u.mm).transmission(energy)
+    file_path = tmp_path / "trace.json"
+    profiler.write_trace_events(file_path)
+    events = json.loads(file_path.read_text())["traceEvents"]
+    assert "absorption.exp" in [event["name"] for event in events]
+    assert all(event["ph"] == "X" and event["dur"] >= 0 for event in events)
+    with pytest.raises(ValueError):
+        Profiler().write_trace_events(file_path)
+
+
+def test_profiler_cprofile():
+    with Profiler(cprofile=True) as profiler:
+        Material("Si", 1 * u.mm).transmission(energy)
+    assert profiler.stats.total_calls > 0
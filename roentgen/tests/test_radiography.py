@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+import astropy.units as u
+
+from roentgen.absorption import Material, PolychromaticTransmission
+
+energy = u.Quantity(np.arange(10, 120, 0.5), "keV")
+spectrum = np.exp(-energy.value / 40)
+weights = spectrum / spectrum.sum()
+aluminum = Material("Al", 1 * u.mm)
+copper = Material("Cu", 1 * u.mm)
+
+
+def direct_transmission(*thicknesses):
+    transmission = np.ones(len(energy))
+    for material, thickness in zip([aluminum, copper], thicknesses):
+        transmission *= Material(material.name, thickness).transmission(energy)
+    return np.sum(weights * transmission)
+
+
+def test_one_material():
+    radiograph = PolychromaticTransmission(aluminum, energy, spectrum, 5 * u.cm)
+    image = np.random.default_rng(0).uniform(0, 5, (20, 30)) * u.cm
+    result = radiograph(image)
+    assert result.shape == image.shape
+    expected = [direct_transmission(this_thickness) for this_thickness in image.ravel()[:40]]
+    assert np.allclose(result.ravel()[:40], expected, rtol=1e-3)
+    # no material means all is transmitted
+    assert np.isclose(radiograph(0 * u.cm), 1)
+
+
+def test_two_materials_chunked_memmap_output(tmp_path):
+    radiograph = PolychromaticTransmission(
+        [aluminum, copper], energy, spectrum, [5 * u.cm, 2 * u.mm], n_samples=256
+    )
+    rng = np.random.default_rng(1)
+    volume_al = rng.uniform(0, 5, (4, 10, 10))
+    volume_cu = rng.uniform(0, 2, (4, 10, 10))
+    result = radiograph(volume_al, volume_cu, out=tmp_path / "out.npy", chunk_size=150)
+    assert isinstance(result, np.memmap)
+    assert np.allclose(np.load(tmp_path / "out.npy"), result)
+    expected = [
+        direct_transmission(al * u.cm, cu * u.mm)
+        for al, cu in zip(volume_al.ravel()[:20], volume_cu.ravel()[:20])
+    ]
+    assert np.allclose(result.ravel()[:20], expected, rtol=1e-3)
+
+
+def test_bad_input():
+    radiograph = PolychromaticTransmission(aluminum, energy, spectrum, 5 * u.cm)
+    with pytest.raises(ValueError):
+        radiograph([6] * u.cm)
+    with pytest.raises(ValueError):
+        radiograph([1] * u.cm, [1] * u.cm)
+    with pytest.raises(ValueError):
+        PolychromaticTransmission(aluminum, energy, spectrum[:-1], 5 * u.cm)
+    with pytest.raises(ValueError, match="max_thickness"):
+        PolychromaticTransmission(aluminum, energy, spectrum, 0 * u.cm)
+    with pytest.raises(ValueError, match="max_thickness"):
+        PolychromaticTransmission([aluminum, aluminum], energy, spectrum, [1 * u.cm, -1 * u.cm])
+    for n_samples in [0, 1]:
+        with pytest.raises(ValueError, match="n_samples"):
+            PolychromaticTransmission(aluminum, energy, spectrum, 5 * u.cm, n_samples=n_samples)
@@ -4,7 +4,7 @@ import pytest
 import astropy.units as u
 
 import roentgen
-from roentgen.absorption import Material, Response
+from roentgen.absorption import CollectionEfficiency, Material, Response
 
 all_materials = list(roentgen.elements["symbol"]) + list(roentgen.compounds["symbol"])
 energy_array = u.Quantity(np.arange(1, 100, 1), "keV")
@@ -63,3 +63,99 @@ def test_repr_str():
     resp = Response(optical_path=Material("air", thickness=1e-30 * u.um), detector=thin_material)
     assert isinstance(resp.__repr__(), str)
     assert isinstance(resp.__str__(), str)
+
+
+def test_uniform_collection_efficiency():
+    """A fully efficient detector should give the same response as no profile"""
+    ce = CollectionEfficiency([0, 1] * u.mm, [1, 1])
+    resp = Response(thin_material, detector=detector, collection_efficiency=ce)
+    assert np.allclose(
+        resp.response(energy_array),
+        Response(thin_material, detector=detector).response(energy_array),
+    )
+
+
+def test_dead_layer_response():
+    """A dead layer should act like a filter of the detector material"""
+    dead = 20 * u.um
+    resp = Response(
+        thin_material,
+        detector=detector,
+        collection_efficiency=CollectionEfficiency.dead_layer(dead),
+    )
+    expected = (
+        Material("Si", dead).transmission(energy_array)
+        * Material("Si", detector.thickness - dead).absorption(energy_array)
+        * thin_material.transmission(energy_array)
+    )
+    assert np.allclose(resp.response(energy_array), expected)
+    # second call uses the cached result
+    assert np.allclose(resp.response(energy_array), expected)
+
+
+def test_collected_absorption_cache_updates():
+    """Changing the detector or collection efficiency must not reuse cached results"""
+    energy = u.Quantity([5, 20, 80], "keV")
+    resp = Response(
+        thin_material,
+        detector=detector,
+        collection_efficiency=CollectionEfficiency.dead_layer(1 * u.um),
+    )
+    before = resp.response(energy)
+    resp.collection_efficiency = CollectionEfficiency.dead_layer(400 * u.um)
+    expected = Response(
+        thin_material,
+        detector=detector,
+        collection_efficiency=CollectionEfficiency.dead_layer(400 * u.um),
+    ).response(energy)
+    assert not np.allclose(resp.response(energy), before)
+    assert np.allclose(resp.response(energy), expected)
+    # a different material with the same thickness and density
+    germanium = Material("Ge", detector.thickness, density=detector.density)
+    resp.detector = germanium
+    expected = Response(
+        thin_material,
+        detector=germanium,
+        collection_efficiency=CollectionEfficiency.dead_layer(400 * u.um),
+    ).response(energy)
+    assert np.allclose(resp.response(energy), expected)
+    with pytest.raises(TypeError):
+        resp.detector = None
+
+
+def test_collection_efficiency_quadrature():
+    """Compare the exact segment integration against brute force quadrature"""
+    ce = CollectionEfficiency([0, 100, 500] * u.um, [0.2, 1, 0.5])
+    mu = detector.linear_attenuation_coefficient(u.Quantity([5, 20, 80], "keV"))
+    depth = np.linspace(0, 500, 200_001) * u.um
+    expected = [
+        np.trapezoid((this_mu * np.exp(-this_mu * depth)).to_value("1/um") * ce(depth), depth.value)
+        for this_mu in mu
+    ]
+    assert np.allclose(ce.absorption(mu, detector.thickness), expected, rtol=1e-6)
+
+
+def test_collection_efficiency_bad_input():
+    with pytest.raises(ValueError):
+        CollectionEfficiency([0, 2, 1] * u.mm, [1, 1, 1])
+    with pytest.raises(ValueError):
+        CollectionEfficiency([0, 1] * u.mm, [1, 1, 1])
+    with pytest.raises(TypeError):
+        Response(thin_material, detector=detector, collection_efficiency="dead layer")
+
+
+@pytest.mark.parametrize("collection_efficiency", [None, CollectionEfficiency.dead_layer(5 * u.um)])
+def test_ray_response(collection_efficiency):
+    optical_path = Material("Be", 100 * u.um)
+    resp = Response(optical_path, detector=detector, collection_efficiency=collection_efficiency)
+    result = resp.ray_response(energy_array, path_scale=[1, 2])
+    assert result.shape == (2, len(energy_array))
+    assert np.allclose(result[0], resp.response(energy_array))
+    doubled = Response(
+        Material("Be", 200 * u.um),
+        detector=Material("Si", 1000 * u.micron),
+        collection_efficiency=None
+        if collection_efficiency is None
+        else CollectionEfficiency.dead_layer(10 * u.um),
+    )
+    assert np.allclose(result[1], doubled.response(energy_array))
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+import astropy.units as u
+
+from roentgen.nuclides import find_nuclides, load_nuclides
+
+
+@pytest.mark.parametrize("energy", [14.4, 59.54, 122.06, 661.66, 1332.5])
+@pytest.mark.parametrize("min_intensity", [0, 1])
+def test_find_nuclides_matches_get_lines(energy, min_intensity):
+    """Check against searching the lines of every nuclide"""
+    window = 0.5
+    result = find_nuclides(energy * u.keV, window * u.keV, min_intensity=min_intensity)
+    expected = []
+    for nuclide in load_nuclides():
+        if len(nuclide.lines) == 0:
+            continue
+        lines = nuclide.lines
+        select = np.abs(lines["energy"].to_value("keV") - energy) <= window
+        select &= lines["intensity"] >= min_intensity
+        expected += [(nuclide.name, this_energy) for this_energy in lines["energy"][select].value]
+    assert sorted(zip(result["nuclide"], result["energy"].value)) == sorted(expected)
+    assert np.all(np.diff(result["energy"]) >= 0)
+
+
+def test_find_nuclides_batch():
+    energy = [59.54, 122.06, 661.66] * u.keV
+    result = find_nuclides(energy, [0.05, 0.05, 0.1] * u.keV)
+    for i, this_energy in enumerate(energy):
+        single = find_nuclides(this_energy, 0.1 * u.keV if i == 2 else 0.05 * u.keV)
+        assert np.all(result[result["query"] == i]["energy"] == single["energy"])
+        assert np.all(result[result["query"] == i]["nuclide"] == single["nuclide"])
+
+
+def test_find_nuclides_filters():
+    result = find_nuclides(
+        [30, 100, 500] * u.keV, 30 * u.keV, emission_type=("XK", "g"), min_intensity=5
+    )
+    types = np.asarray(result["type"])
+    assert np.all(np.char.startswith(types, "XK") | np.char.startswith(types, "g"))
+    assert "g511" in types
+    assert np.all(result["intensity"] >= 5)
+    result = find_nuclides(
+        [100, 500] * u.keV, 100 * u.keV, half_life_low=1 * u.yr, half_life_high=100 * u.yr
+    )
+    assert len(result) > 0
+    assert np.all((result["half_life"] >= 1 * u.yr) & (result["half_life"] <= 100 * u.yr))
+    assert "Cs-137" in find_nuclides(661.66 * u.keV, 1 * u.keV, half_life_low=1 * u.yr)["nuclide"]
+    assert (
+        "Ba-137m" not in find_nuclides(661.66 * u.keV, 1 * u.keV, half_life_low=1 * u.yr)["nuclide"]
+    )
+    assert len(find_nuclides(661.66 * u.keV, 1 * u.keV, emission_type="XL")) == 0
+
+
+def test_find_nuclides_bad_window():
+    with pytest.raises(ValueError):
+        find_nuclides(100 * u.keV, -1 * u.keV)
@@ -0,0 +1,197 @@
+import asyncio
+import json
+import urllib.error
+import urllib.request
+
+import numpy as np
+import pytest
+
+import astropy.units as u
+
+import roentgen.server
+from roentgen.absorption import Material, Response, Stack
+from roentgen.server import ComputeServer
+
+be_si = {
+    "layers": [{"material": "Be", "thickness": "100 um"}],
+    "detector": {"material": "Si", "thickness": "500 um"},
+    "energy": {"low": 1, "high": 20, "step": 0.5},
+}
+al_air = {
+    "layers": [
+        {"material": "Al", "thickness": "1 mm"},
+        {"material": "air", "thickness": "1 m", "density": "1.2 kg / m3"},
+    ],
+    "energy": [5, 10, 15],
+}
+
+
+def post(port, path, arguments):
+    """Return the status and the decoded JSON answer of a request."""
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{port}{path}", data=json.dumps(arguments).encode(), method="POST"
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=10) as answer:
+            return answer.status, json.loads(answer.read())
+    except urllib.error.HTTPError as error:
+        return error.code, json.loads(error.read())
+
+
+def run_requests(requests, **kwargs):
+    """Start a server on a free port, send the requests concurrently and return
+    their answers."""
+
+    async def run():
+        server = ComputeServer(port=0, **kwargs)
+        await server.start()
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.gather(
+                *[
+                    loop.run_in_executor(None, post, server.port, path, arguments)
+                    for path, arguments in requests
+                ]
+            )
+        finally:
+            await server.close()
+
+    return asyncio.run(run())
+
+
+def test_server_response_and_transmission():
+    (status, response), (_, transmission) = run_requests(
+        [("/response", be_si), ("/transmission", al_air)]
+    )
+    assert status == 200
+    energy = u.Quantity(np.arange(1, 20.5, 0.5), "keV")
+    assert np.allclose(response["energy"], energy.value)
+    expected = Response(Material("Be", 100 * u.um), detector=Material("Si", 500 * u.um))
+    assert np.allclose(response["response"], expected.response(energy))
+    expected = Stack(
+        [Material("Al", 1 * u.mm), Material("air", 1 * u.m, density=1.2 * u.kg / u.m**3)]
+    )
+    assert np.allclose(transmission["transmission"], expected.transmission([5, 10, 15] * u.keV))
+
+
+def test_server_batches_requests(monkeypatch):
+    batch_sizes = []
+    evaluate = roentgen.server._evaluate_configurations
+
+    def counting_evaluate(configurations, energy_kev):
+        batch_sizes.append(len(configurations))
+        return evaluate(configurations, energy_kev)
+
+    monkeypatch.setattr(roentgen.server, "_evaluate_configurations", counting_evaluate)
+    requests = [
+        ("/response", dict(be_si, layers=[{"material": "Be", "thickness": f"{i} um"}]))
+        for i in range(1, 5)
+    ]
+    answers = run_requests(requests, batch_delay=0.5)
+    assert [status for status, _ in answers] == [200] * 4
+    assert batch_sizes == [4]
+    # thicker filters transmit less
+    assert np.all(np.diff([answer["response"][0] for _, answer in answers]) < 0)
+
+
+def test_server_caches_results(monkeypatch):
+    batch_sizes = []
+    evaluate = roentgen.server._evaluate_configurations
+
+    def counting_evaluate(configurations, energy_kev):
+        batch_sizes.append(len(configurations))
+        return evaluate(configurations, energy_kev)
+
+    monkeypatch.setattr(roentgen.server, "_evaluate_configurations", counting_evaluate)
+
+    async def run():
+        server = ComputeServer(port=0)
+        await server.start()
+        loop = asyncio.get_running_loop()
+        try:
+            first = await loop.run_in_executor(None, post, server.port, "/response", be_si)
+            second = await loop.run_in_executor(None, post, server.port, "/response", be_si)
+        finally:
+            await server.close()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == second
+    assert batch_sizes == [1]
+
+
+def test_server_lines_and_nuclides():
+    (_, lines), (_, nuclides) = run_requests(
+        [
+            ("/lines", {"energy_low": 6.3, "energy_high": "6.5 keV", "element": "Fe"}),
+            ("/nuclides", {"energy": 661.7, "window": 0.1, "emission_type": "g"}),
+        ]
+    )
+    assert lines["units"]["energy"] == "keV"
+    assert "Kα1" in lines["transition"]
+    assert set(lines["symbol"]) == {"Fe"}
+    assert "Cs-137" in nuclides["nuclide"]
+
+
+@pytest.mark.parametrize(
+    "path,arguments,status",
+    [
+        ("/unknown", {}, 404),
+        ("/response", [1, 2], 400),
+        ("/response", {"layers": [{"material": "Be", "thickness": "1 um"}]}, 400),
+        ("/response", dict(be_si, layers=[{"material": "unobtainium", "thickness": "1 um"}]), 400),
+        ("/lines", {"energy_low": 1}, 400),
+        ("/lines", {"energy_low": [1, 2], "energy_high": 3}, 400),
+        ("/nuclides", {"energy": {"low": 661}, "window": 1}, 400),
+        ("/response", dict(be_si, energy=[[1, 2], [3, 4]]), 400),
+        ("/response", dict(be_si, energy="10 keV"), 400),
+        ("/response", dict(be_si, layers={"material": "Be", "thickness": "1 um"}), 400),
+        ("/response", dict(be_si, layers=[{"material": ["Be", "Si"], "thickness": "1 um"}]), 400),
+        ("/response", dict(be_si, layers=[{"material": "Be", "thickness": [1, 2]}]), 400),
+        ("/response", dict(be_si, detector={"material": {"Si": "half"}, "thickness": 1}), 400),
+    ],
+)
+def test_server_errors(path, arguments, status):
+    ((answer_status, answer),) = run_requests([(path, arguments)])
+    assert answer_status == status
+    assert "error" in answer
+
+
+def test_server_bad_configuration_only_fails_its_request():
+    bad = dict(be_si, layers=[{"material": "unobtainium", "thickness": "1 um", "density": 1}])
+    (good_status, _), (bad_status, _) = run_requests(
+        [("/response", be_si), ("/response", bad)], batch_delay=0.5
+    )
+    assert good_status == 200
+    assert bad_status == 400
+
+
+def test_server_unexpected_error(monkeypatch):
+    def failing_evaluate(configurations, energy_kev):
+        raise RuntimeError("out of cheese")
+
+    monkeypatch.setattr(roentgen.server, "_evaluate_configurations", failing_evaluate)
+    ((status, answer),) = run_requests([("/response", be_si)])
+    assert status == 500
+    assert "out of cheese" in answer["error"]
+
+
+def test_server_malformed_request_line():
+    async def run():
+        server = ComputeServer(port=0)
+        await server.start()
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            writer.write(b"GARBAGE\r\n\r\n")
+            await writer.drain()
+            answer = await reader.read()
+            writer.close()
+        finally:
+            await server.close()
+        return answer
+
+    assert asyncio.run(run()).startswith(b"HTTP/1.1 400")
+
+
+def test_material_cache_is_bounded():
+    assert roentgen.server._get_material.cache_info().maxsize == 256
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+import astropy.units as u
+
+from roentgen.absorption import Material, Response, Stack
+from roentgen.nuclides import Nuclide, SourceSpectra
+
+names = ["Am-241", "Ba-133", "Cs-137", "Co-57"]
+resp = Response(Material("Be", 100 * u.um), detector=Material("cdte", 1 * u.mm))
+shield = Stack([Material("Al", 1 * u.mm), Material("Pb", 100 * u.um)])
+
+
+@pytest.fixture(scope="module")
+def sources():
+    return SourceSpectra(names)
+
+
+def test_source_spectra_emissions(sources):
+    assert sources.names == names
+    assert sources.emissions.shape == (4, len(sources.energy))
+    assert np.all(np.diff(sources.energy) > 0)
+    assert np.all(sources.energy >= 1 * u.keV)
+    cs137 = Nuclide("Cs", 137)
+    index = np.searchsorted(sources.energy.value, 661.6553)
+    assert sources.emissions[2, index] == pytest.approx(0.8501)
+    # alpha particles are not included
+    am241 = Nuclide("Am", 241)
+    alpha = am241.emissions[np.char.startswith(np.asarray(am241.emissions["type"]), "a")]
+    assert not np.any(
+        np.isin(alpha["energy"].value, sources.energy.value[sources.emissions[0] > 0])
+    )
+    assert len(cs137.emissions) > 0
+
+
+def test_source_spectra_line_rates(sources):
+    """Check against evaluating each source separately"""
+    activity = [1, 2, 3, 4] * u.kBq
+    rates = sources.line_rates(activity, shielding=shield, response=resp)
+    expected = 0
+    for this_name, this_activity in zip(names, activity):
+        single = SourceSpectra(this_name)
+        single_rates = single.line_rates([this_activity.value] * u.kBq, shield, resp)
+        expected += single_rates.sum()
+        efficiency = resp.response(single.energy) * shield.transmission(single.energy)
+        assert u.allclose(
+            single_rates, this_activity * single.emissions[0] * efficiency / u.Bq / u.s
+        )
+    assert u.isclose(rates.sum(), expected)
+
+
+def test_source_spectra_batch(sources):
+    activity = np.random.default_rng(0).uniform(0, 1, (10, 4)) * u.kBq
+    shields = [Material("Pb", thickness * u.mm) for thickness in [0.1, 0.5, 1]]
+    rates = sources.line_rates(activity, shielding=shields, response=resp)
+    assert rates.shape == (3, 10, len(sources.energy))
+    for i, this_shield in enumerate(shields):
+        for j in [0, 9]:
+            assert u.allclose(rates[i, j], sources.line_rates(activity[j], this_shield, resp))
+    per_source = sources.line_rates(np.diag([1, 1, 1, 1]) * u.Bq)
+    assert u.allclose(per_source.value, sources.emissions)
+
+
+def test_source_spectra_spectrum(sources):
+    activity = [1, 2, 3, 4] * u.kBq
+    energy_edges = u.Quantity(np.arange(1, 2000, 0.5), "keV")
+    rates = sources.line_rates(activity, shield, resp)
+    spectrum = sources.spectrum(energy_edges, activity, shield, resp)
+    assert spectrum.shape == (len(energy_edges) - 1,)
+    assert u.isclose(spectrum.sum(), rates.sum())
+    smooth = sources.spectrum(
+        energy_edges, activity, shield, resp, resolution=2 * u.keV, window=1000
+    )
+    assert u.isclose(smooth.sum(), rates.sum(), rtol=1e-3)
+    batch = sources.spectrum(energy_edges, np.array([[1, 2, 3, 4]] * 2) * u.kBq, [shield], resp)
+    assert batch.shape == (1, 2, len(energy_edges) - 1)
+    assert u.allclose(batch[0, 1], spectrum)
+
+
+def test_source_spectra_bad_input(sources):
+    with pytest.raises(ValueError):
+        sources.line_rates([1, 2] * u.kBq)
+    with pytest.raises(TypeError):
+        sources.line_rates([1, 2, 3, 4] * u.kBq, response=Material("Si", 1 * u.mm))
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+from scipy.special import voigt_profile
+
+import astropy.units as u
+from astropy.table import QTable
+
+from roentgen.absorption import Material
+from roentgen.lines import get_lines, line_spectrum
+from roentgen.nuclides import Nuclide
+
+energy_edges = u.Quantity(np.arange(1, 100, 0.01), "keV")
+
+
+@pytest.mark.parametrize("element_str", ["Fe", "Cu", "Ag", "Au"])
+def test_line_spectrum_total_intensity(element_str):
+    """Check that all lines in the grid are included"""
+    line_list = get_lines(0 * u.keV, 150 * u.keV, element_str)
+    edges = u.Quantity(np.arange(0.01, 150, 0.01), "keV")
+    spectrum = line_spectrum(element_str, edges, resolution=100 * u.eV, window=1000)
+    assert spectrum.shape == (len(edges) - 1,)
+    assert np.isclose(spectrum.sum(), line_list["intensity"].sum(), rtol=1e-2)
+
+
+def test_line_spectrum_no_width():
+    """Check that lines without width are added to a single bin"""
+    lines = QTable({"energy": [5.002, 5.006, 120] * u.keV, "intensity": [1.0, 2.0, 3.0]})
+    spectrum = line_spectrum(lines, energy_edges)
+    assert spectrum.sum() == 3.0
+    assert np.count_nonzero(spectrum) == 1
+    assert spectrum[np.searchsorted(energy_edges.value, 5.006, side="right") - 1] == 3.0
+
+
+def test_line_spectrum_voigt():
+    """Check the profile against a Voigt profile"""
+    lines = QTable({"energy": [10.0] * u.keV, "intensity": [1.0], "width": [50.0] * u.eV})
+    edges = np.arange(9.5, 10.5, 0.002)
+    spectrum = line_spectrum(lines, edges * u.keV, resolution=100 * u.eV, window=1000)
+    centers = (edges[1:] + edges[:-1]) / 2
+    expected = voigt_profile(centers - 10, 0.1 / (2 * np.sqrt(2 * np.log(2))), 0.025) * 0.002
+    assert np.allclose(spectrum, expected, rtol=0, atol=0.02 * expected.max())
+
+
+def test_line_spectrum_window():
+    """Check that a narrower window only removes the tails"""
+    wide = line_spectrum("Cu", energy_edges, resolution=150 * u.eV, window=1000)
+    narrow = line_spectrum("Cu", energy_edges, resolution=150 * u.eV, window=5)
+    peak = np.argmax(wide)
+    assert np.isclose(wide[peak], narrow[peak], rtol=1e-3)
+    assert narrow.sum() < wide.sum()
+    assert np.count_nonzero(narrow) < np.count_nonzero(wide)
+
+
+def test_line_spectrum_sources():
+    nuclide = Nuclide("Am", 241)
+    resolution = lambda energy: 0.1 * u.keV + 0.01 * energy  # noqa: E731
+    spectrum = line_spectrum(nuclide, energy_edges, resolution=resolution)
+    assert np.isclose(spectrum.sum(), nuclide.get_lines(1 * u.keV, 99 * u.keV)["intensity"].sum())
+    cdte = line_spectrum(Material("cdte", 1 * u.mm), energy_edges, resolution=200 * u.eV)
+    assert np.allclose(
+        cdte,
+        line_spectrum("Cd", energy_edges, resolution=200 * u.eV)
+        + line_spectrum("Te", energy_edges, resolution=200 * u.eV),
+    )
+    # compounds include their light elements
+    pvc = line_spectrum(Material("pvc", 1 * u.mm), energy_edges, resolution=200 * u.eV)
+    assert pvc.sum() > 0
+    assert np.allclose(
+        pvc,
+        sum(
+            line_spectrum(this_element, energy_edges, resolution=200 * u.eV)
+            for this_element in ["C", "Cl", "H"]
+        ),
+    )
+
+
+def test_line_spectrum_bad_input():
+    with pytest.raises(ValueError):
+        line_spectrum("Fe", energy_edges[::-1])
+    with pytest.raises(ValueError):
+        line_spectrum("Fe", energy_edges, window=0)
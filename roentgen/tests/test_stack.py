@@ -68,3 +68,16 @@ def test_repr_str():
     stack = Material("Ge", 500 * u.micron) + Material("Si", 100 * u.micron)
     assert isinstance(stack.__repr__(), str)
     assert isinstance(stack.__str__(), str)
+
+
+def test_stack_ray_transmission():
+    stack = Material("Be", 100 * u.micron) + Material("Al", 20 * u.micron)
+    angle = [0, 30, 60] * u.deg
+    result = stack.ray_transmission(energy_array, incidence_angle=angle)
+    assert result.shape == (len(angle), len(energy_array))
+    for this_angle, this_result in zip(angle, result):
+        scale = 1 / np.cos(this_angle)
+        expected = (
+            Material("Be", 100 * u.micron * scale) + Material("Al", 20 * u.micron * scale)
+        ).transmission(energy_array)
+        assert np.allclose(this_result, expected)
@@ -1 +1,3 @@
 from .util import *
+from .profiling import *
+from .memory import *
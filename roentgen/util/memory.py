@@ -0,0 +1,175 @@
+"""A module to report the memory used by the tables and objects of roentgen."""
+
+import sys
+import types
+import weakref
+
+import numpy as np
+
+import astropy.units as u
+from astropy.table import QTable, Table
+
+import roentgen
+
+__all__ = ["memory_size", "memory_usage"]
+
+# objects which are shared by everything that refers to them or which do not
+# hold data, and are never counted
+_SKIPPED_TYPES = (
+    type,
+    types.ModuleType,
+    types.FunctionType,
+    types.BuiltinFunctionType,
+    types.MethodType,
+    weakref.ReferenceType,
+    u.UnitBase,
+)
+
+
+def memory_size(obj) -> u.Quantity:
+    """
+    Return the memory held by an object and everything it refers to.
+
+    An array which does not own its data (e.g. a column of a table which slices
+    a larger array) is counted with the array which owns the data, since it
+    keeps it in memory, and an object which is referred to several times is
+    only counted once. Units, functions, classes and modules are shared and are
+    not counted. Tables are counted with their columns, their indices and their
+    metadata.
+
+    Parameters
+    ----------
+    obj : object
+        For example a `astropy.table.QTable`, a `Material` or a `Nuclide`.
+
+    Returns
+    -------
+    size : `astropy.units.Quantity`
+        The size in bytes.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from roentgen.util import memory_size
+    >>> values = np.zeros(1000)
+    >>> int(memory_size([values, values, values[:10]]).to_value('byte')) < 9000
+    True
+    """
+    return _Sizer().size(obj) * u.byte
+
+
+def memory_usage(objects=None):
+    """
+    Return the memory held by each of a set of objects.
+
+    Objects are counted in order, and memory which is shared with an object
+    earlier in the list (e.g. the same array referred to by two materials) is
+    reported as shared, so that the sum of the ``unique size`` column is the
+    memory held by all of the objects together.
+
+    Parameters
+    ----------
+    objects : dict or list, optional
+        The objects by name, or a list of objects which are named by their
+        ``name`` attribute or their type. By default, the tables loaded by
+        roentgen: ``elements``, ``compounds``, ``emission_lines``,
+        ``binding_energies`` and ``nuclides_list``, and the store of all
+        radionuclide emissions if it is loaded.
+
+    Returns
+    -------
+    usage : `astropy.table.QTable`
+        One row per object with its name, its type, its size, the size of its
+        table indices (zero if it is not a table) and its size which is not
+        shared with an earlier object.
+
+    Examples
+    --------
+    >>> import astropy.units as u
+    >>> from roentgen.absorption import Material
+    >>> from roentgen.util import memory_usage
+    >>> usage = memory_usage([Material('Si', 1 * u.mm), Material('Ge', 1 * u.mm)])
+    >>> usage["name"].tolist()
+    ['Silicon', 'Germanium']
+    """
+    if objects is None:
+        objects = _loaded_tables()
+    elif not isinstance(objects, dict):
+        objects = list(objects)
+        names = [str(getattr(obj, "name", type(obj).__name__)) for obj in objects]
+        if len(set(names)) < len(names):
+            names = [f"{this_name} {i}" for i, this_name in enumerate(names)]
+        objects = dict(zip(names, objects))
+    shared_sizer = _Sizer()
+    rows = []
+    for name, obj in objects.items():
+        size = _Sizer().size(obj)
+        if isinstance(obj, Table):
+            index_sizer = _Sizer()
+            index_sizer.size([obj[this_colname] for this_colname in obj.colnames])
+            index_size = sum(index_sizer.size(this_index) for this_index in obj.indices)
+        else:
+            index_size = 0
+        rows.append((name, type(obj).__name__, size, index_size, shared_sizer.size(obj)))
+    usage = QTable(
+        rows=rows,
+        names=["name", "type", "size", "index size", "unique size"],
+        dtype=[str, str, float, float, float],
+    )
+    for this_colname in ["size", "index size", "unique size"]:
+        usage[this_colname] = u.Quantity(usage[this_colname], u.byte)
+    return usage
+
+
+class _Sizer(object):
+    """Add up the memory of objects, counting each object and each array buffer once."""
+
+    def __init__(self):
+        # the objects by id, which are kept so that the ids of temporary objects
+        # are not reused while counting
+        self._seen = {}
+
+    def size(self, obj) -> int:
+        if isinstance(obj, _SKIPPED_TYPES) or id(obj) in self._seen:
+            return 0
+        self._seen[id(obj)] = obj
+        # the size of an array includes its data only if it owns it, otherwise
+        # the data is held by its base
+        result = sys.getsizeof(obj)
+        if isinstance(obj, np.ndarray):
+            if obj.base is not None:
+                result += self.size(obj.base)
+            if obj.dtype == object:
+                result += sum(self.size(item) for item in obj.flat)
+            return result
+        if isinstance(obj, Table):
+            result += sum(self.size(obj[this_colname]) for this_colname in obj.colnames)
+            result += self.size(obj.indices) + self.size(obj.meta)
+        elif isinstance(obj, dict):
+            result += sum(self.size(key) + self.size(value) for key, value in obj.items())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            result += sum(self.size(item) for item in obj)
+        elif not isinstance(obj, (str, bytes, int, float, complex, bool)):
+            if hasattr(obj, "__dict__"):
+                result += self.size(vars(obj))
+            for this_slot in getattr(type(obj), "__slots__", ()):
+                result += self.size(getattr(obj, this_slot, None))
+        return result
+
+
+def _loaded_tables() -> dict:
+    """Return the tables loaded by roentgen by name."""
+    from roentgen.lines.lines import binding_energies, emission_lines
+    from roentgen.nuclides import nuclides_list
+    from roentgen.nuclides.nuclides import _get_lara_store
+
+    result = {
+        "elements": roentgen.elements,
+        "compounds": roentgen.compounds,
+        "emission_lines": emission_lines,
+        "binding_energies": binding_energies,
+        "nuclides_list": nuclides_list,
+    }
+    if _get_lara_store.cache_info().currsize > 0:
+        result["lara store"] = _get_lara_store()
+    return result
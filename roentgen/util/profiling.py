@@ -0,0 +1,219 @@
+"""A module to record where time is spent in the hot paths of roentgen."""
+
+import cProfile
+import json
+import os
+import pstats
+import threading
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+import numpy as np
+
+import astropy.units as u
+from astropy.table import QTable
+
+__all__ = ["Profiler"]
+
+# the profilers which are recording, sections are only timed if there are any
+_active_profilers = []
+_lock = threading.Lock()
+# the context of a section while no profiler is recording
+_NOT_RECORDING = nullcontext()
+
+
+class Profiler(object):
+    """
+    An object which records the number of calls, the time spent and the number
+    of values processed in the instrumented sections of roentgen.
+
+    The sections are the loading of data files (``*.load_data``), the
+    construction of tables and interpolators (``*.build_table`` and
+    ``absorption.build_interpolator``), interpolation
+    (``absorption.interpolate``), exponentiation (``absorption.exp``) and unit
+    handling (``*.units``) in `roentgen.absorption`, `roentgen.lines` and
+    `roentgen.nuclides`. Sections are only timed while a profiler is recording
+    so that there is no cost otherwise.
+
+    Use it as a context manager, or call `start` and `stop` to record across a
+    larger part of a program. Sections may be nested, so the times of the
+    sections do not add up to the total time.
+
+    Parameters
+    ----------
+    trace : bool, optional
+        If True, every call is kept so that they can be written as trace events
+        with `write_trace_events`, otherwise only the totals are kept.
+    cprofile : bool, optional
+        If True, the whole program is also profiled with `cProfile` while
+        recording, see ``stats``.
+
+    Attributes
+    ----------
+    stats : `pstats.Stats` or None
+        The `cProfile` statistics, if ``cprofile`` is True.
+
+    Examples
+    --------
+    >>> import astropy.units as u
+    >>> from roentgen.absorption import Material
+    >>> from roentgen.util import Profiler
+    >>> with Profiler() as profiler:
+    ...     transmission = Material('Si', 100 * u.um).transmission([5, 10, 20] * u.keV)
+    >>> summary = profiler.summary()
+    >>> int(summary.loc["absorption.exp"]["size"])
+    3
+    """
+
+    def __init__(self, trace: bool = False, cprofile: bool = False):
+        self.trace = trace
+        self.stats = None
+        self._cprofile = cProfile.Profile() if cprofile else None
+        # the calls, total time and total size of each section
+        self._totals = {}
+        self._events = []
+        self._start_time = None
+
+    def __repr__(self) -> str:
+        """Returns a developer-relevant representation."""
+        # at this point, no reason for this to be different than __str__
+        return self.__str__()
+
+    def __str__(self) -> str:
+        """Returns a human-readable user-focused representation."""
+        txt = f"Profiler({len(self._totals)} sections)"
+        return txt
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def start(self):
+        """Start recording."""
+        if self._start_time is None:
+            self._start_time = time.perf_counter()
+        with _lock:
+            if self not in _active_profilers:
+                _active_profilers.append(self)
+        if self._cprofile is not None:
+            self._cprofile.enable()
+
+    def stop(self):
+        """Stop recording."""
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self.stats = pstats.Stats(self._cprofile)
+        with _lock:
+            if self in _active_profilers:
+                _active_profilers.remove(self)
+
+    def summary(self) -> QTable:
+        """Return the number of calls, the total and mean time and the total
+        number of values of each section, sorted by decreasing total time.
+
+        Returns
+        -------
+        summary : `astropy.table.QTable`
+            One row per section, indexed by section.
+        """
+        names = sorted(self._totals, key=lambda name: -self._totals[name][1])
+        totals = np.array([self._totals[name] for name in names], dtype=float).reshape(-1, 3)
+        result = QTable()
+        result["section"] = np.array(names, dtype=str)
+        result["calls"] = totals[:, 0].astype(int)
+        result["time"] = u.Quantity(totals[:, 1], u.s)
+        result["mean time"] = u.Quantity(
+            np.divide(totals[:, 1], totals[:, 0], out=np.zeros(len(names)), where=totals[:, 0] > 0),
+            u.s,
+        )
+        result["size"] = totals[:, 2].astype(np.int64)
+        result.add_index("section")
+        return result
+
+    def to_dict(self) -> dict:
+        """Return the summary as a mapping of section to a mapping of calls,
+        time (s) and size, for example to be saved as JSON."""
+        return {
+            name: {"calls": calls, "time": total_time, "size": size}
+            for name, (calls, total_time, size) in self._totals.items()
+        }
+
+    def write_trace_events(self, file_path):
+        """Write every recorded call in the trace event format, which can be
+        opened with e.g. ``chrome://tracing`` or Perfetto.
+
+        Parameters
+        ----------
+        file_path : str or `pathlib.Path`
+            The JSON file to write.
+
+        Raises
+        ------
+        ValueError
+            If the profiler does not keep every call (``trace`` is False).
+        """
+        if not self.trace:
+            raise ValueError("Trace events are only kept with trace=True.")
+        process_id = os.getpid()
+        events = [
+            {
+                "name": name,
+                "cat": name.split(".")[0],
+                "ph": "X",
+                "ts": (start - self._start_time) * 1e6,
+                "dur": duration * 1e6,
+                "pid": process_id,
+                "tid": thread_id,
+                "args": {"size": size},
+            }
+            for name, start, duration, size, thread_id in self._events
+        ]
+        Path(file_path).write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}))
+
+    def _record(self, name, start, duration, size):
+        with _lock:
+            totals = self._totals.setdefault(name, [0, 0.0, 0])
+            totals[0] += 1
+            totals[1] += duration
+            totals[2] += size
+            if self.trace:
+                self._events.append((name, start, duration, size, threading.get_ident()))
+
+
+class _Section(object):
+    """Time one call of a section for all recording profilers."""
+
+    __slots__ = ("name", "size", "start")
+
+    def __init__(self, name, size):
+        self.name = name
+        self.size = size
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        duration = time.perf_counter() - self.start
+        for profiler in list(_active_profilers):
+            profiler._record(self.name, self.start, duration, self.size)
+
+
+def _section(name: str, size: int = 0):
+    """Return a context manager which records one call of a section, and which
+    does nothing if no profiler is recording.
+
+    Parameters
+    ----------
+    name : str
+        The name of the section, as ``<subpackage>.<kind>``.
+    size : int, optional
+        The number of values processed in the call.
+    """
+    if _active_profilers:
+        return _Section(name, int(size))
+    return _NOT_RECORDING
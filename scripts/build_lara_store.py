@@ -0,0 +1,9 @@
+"""Parse all lara files into the single columnar store loaded by roentgen.nuclides.
+
+Run this script after adding or updating files in roentgen/data/lara.
+"""
+
+from roentgen.nuclides.nuclides import _build_lara_store, _lara_store_file
+
+_build_lara_store(_lara_store_file)
+print(f"Wrote {_lara_store_file}")